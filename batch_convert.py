@@ -0,0 +1,232 @@
+# batch_convert.py
+"""无界面批量转换：遍历目录树，使用进程池并行调用 doc_parser.parse_document。
+
+用法示例：
+    python batch_convert.py input_files -o output -j 4
+    main.exe batch input_files -o output -j 4
+
+本模块不导入任何 PyQt5 组件，可在无图形界面的服务器上运行。
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import doc_parser
+from conversion_cache import DEFAULT_MAX_BYTES, ConversionCache
+from pdf_engine import merge_stats
+from search_index import SearchIndex, default_index_path
+
+SUPPORTED_EXTS = (".docx", ".pdf")
+
+# 每个工作进程复用同一个缓存对象，只在首次淘汰时扫描一次缓存目录
+_caches = {}
+_indexes = {}
+
+
+def iter_documents(root_dir):
+    """按稳定顺序遍历目录树，返回所有受支持的文档路径。"""
+    for dir_path, dir_names, file_names in os.walk(root_dir):
+        dir_names.sort()
+        for name in sorted(file_names):
+            # 跳过 Word 打开文档时生成的 "~$xxx.docx" 临时锁文件
+            if name.startswith("~$"):
+                continue
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTS:
+                yield os.path.join(dir_path, name)
+
+
+def count_pages(file_path):
+    """统计文档页数：PDF 读取页数，Word 读取 docProps/app.xml 中记录的页数（缺失时为 0）。"""
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        if ext == ".pdf":
+            import fitz
+            with fitz.open(file_path) as pdf:
+                return pdf.page_count
+        with zipfile.ZipFile(file_path) as archive:
+            app_xml = archive.read("docProps/app.xml").decode("utf-8", "ignore")
+        match = re.search(r"<Pages>(\d+)</Pages>", app_xml)
+        return int(match.group(1)) if match else 0
+    except Exception:
+        return 0
+
+
+def _get_cache(cache_dir, cache_size):
+    if cache_dir is None:
+        return None
+    if cache_dir not in _caches:
+        _caches[cache_dir] = ConversionCache(cache_dir, cache_size)
+    return _caches[cache_dir]
+
+
+def _get_index(index_path):
+    if index_path is None:
+        return None
+    if index_path not in _indexes:
+        _indexes[index_path] = SearchIndex(index_path)
+    return _indexes[index_path]
+
+
+def convert_one(file_path, output_dir, page_workers=1, cache_dir=None, cache_size=None, incremental=False,
+                profile=False, index_path=None):
+    """在工作进程中转换单个文档，任何异常都转换为失败记录而不向上抛出。"""
+    start = time.perf_counter()
+    result = {"file": file_path, "pages": 0}
+    stats = {}
+    try:
+        cache = _get_cache(cache_dir, cache_size)
+        result["md_path"] = doc_parser.parse_document(file_path, output_dir=output_dir,
+                                                      workers=page_workers, stats=stats, cache=cache,
+                                                      incremental=incremental, profile=profile,
+                                                      search_index=_get_index(index_path))
+        result["pages"] = count_pages(file_path)
+        result["status"] = "ok"
+        result["stats"] = stats
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def target_dir(file_path, root_dir, output_dir):
+    """保持输入目录结构，避免不同子目录中的同名文档互相覆盖。"""
+    rel_dir = os.path.relpath(os.path.dirname(os.path.abspath(file_path)), os.path.abspath(root_dir))
+    return output_dir if rel_dir == os.curdir else os.path.join(output_dir, rel_dir)
+
+
+def run_batch(root_dir, output_dir=None, workers=None, on_result=None, page_workers=1,
+              cache_dir=None, cache_size=None, incremental=False, profile=False, index_path=None):
+    """批量转换 root_dir 下的所有文档，返回包含逐文件结果与吞吐量的汇总字典。
+
+    单个文件失败不会中断批次；工作进程崩溃时，受影响的文件会在新进程池中重试一次。
+    指定 cache_dir 时启用转换缓存，cache_size 为缓存总大小上限（字节）；
+    incremental 为 True 时只重新解析上次转换后发生变化的页面或部件；
+    profile 为 True 时为每个文档在其 Markdown 旁写出分阶段剖析报告（.profile.json）；
+    指定 index_path 时把内容有变化的文档加入该全文检索索引（见 search_index）。
+    """
+    if cache_size is None:
+        cache_size = DEFAULT_MAX_BYTES
+    if output_dir is None:
+        output_dir = doc_parser.get_output_dir()
+    files = list(iter_documents(root_dir))
+    results = []
+    start = time.perf_counter()
+    pending = files
+    attempts = {}
+    while pending:
+        retry = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(convert_one, f, target_dir(f, root_dir, output_dir), page_workers,
+                                cache_dir, cache_size, incremental, profile, index_path): f
+                for f in pending
+            }
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    attempts[file_path] = attempts.get(file_path, 0) + 1
+                    if attempts[file_path] < 2:
+                        retry.append(file_path)
+                        continue
+                    result = {"file": file_path, "pages": 0, "seconds": 0.0,
+                              "status": "error", "error": "工作进程异常退出"}
+                results.append(result)
+                if on_result:
+                    on_result(result)
+        pending = retry
+
+    elapsed = time.perf_counter() - start
+    ok = [r for r in results if r["status"] == "ok"]
+    pages = sum(r["pages"] for r in ok)
+    stats = {}
+    for r in ok:
+        merge_stats(stats, r.get("stats", {}))
+    return {
+        "total": len(files),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "pages": pages,
+        "seconds": elapsed,
+        "docs_per_second": len(ok) / elapsed if elapsed else 0.0,
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+        "stats": stats,
+        "results": results,
+        "failures": [r for r in results if r["status"] != "ok"],
+    }
+
+
+def _print_result(result):
+    if result["status"] == "ok":
+        print(f"[OK]   {result['file']} ({result['pages']} 页, {result['seconds']:.2f}s)", flush=True)
+    else:
+        print(f"[FAIL] {result['file']}: {result['error']}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量将目录中的 Word/PDF 文档转换为 Markdown")
+    parser.add_argument("input_dir", help="待转换的文档目录（递归遍历）")
+    parser.add_argument("-o", "--output", help="输出目录，默认为项目下的 output 文件夹")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="并行进程数，默认为 CPU 核心数")
+    parser.add_argument("--page-workers", type=int, default=1,
+                        help="单个 PDF 内按页并行解析的进程数，适合少量超大 PDF（默认 1，即串行）")
+    parser.add_argument("--cache", action="store_true",
+                        help="启用转换缓存（缓存目录默认为 output/.cache），内容未变的文档直接从缓存还原")
+    parser.add_argument("--cache-dir", help="转换缓存目录（指定后自动启用缓存）")
+    parser.add_argument("--cache-size", type=int, default=512,
+                        help="转换缓存总大小上限（MB），超出后按最近最少使用淘汰，默认 512")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量转换：在输出目录中记录每页/每个部件的指纹，只重新解析发生变化的部分")
+    parser.add_argument("--profile", action="store_true",
+                        help="分阶段剖析：为每个文档在其 Markdown 旁写出 {文档名}.profile.json（各阶段/各页的耗时、"
+                             "调用次数、写入字节数与峰值内存增长）")
+    parser.add_argument("--index", nargs="?", const="", metavar="PATH",
+                        help="同时建立全文检索索引（默认为 output/.search_index.sqlite），图形界面中可直接检索")
+    parser.add_argument("--report", help="将汇总结果以 JSON 格式写入该文件")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"目录不存在: {args.input_dir}")
+
+    cache_dir = args.cache_dir
+    if cache_dir is None and args.cache:
+        cache_dir = doc_parser.get_cache_dir()
+    index_path = args.index
+    if index_path == "":
+        index_path = default_index_path()
+    summary = run_batch(args.input_dir, args.output, args.workers, on_result=_print_result,
+                        page_workers=args.page_workers, cache_dir=cache_dir,
+                        cache_size=args.cache_size * 1024 * 1024, incremental=args.incremental,
+                        profile=args.profile, index_path=index_path)
+    print(f"共 {summary['total']} 个文件，成功 {summary['succeeded']}，失败 {summary['failed']}；"
+          f"耗时 {summary['seconds']:.2f}s，{summary['docs_per_second']:.2f} 文档/秒，"
+          f"{summary['pages_per_second']:.2f} 页/秒")
+    stats = summary["stats"]
+    if stats.get("pages"):
+        print(f"表格预筛：{stats['pages']} 页中跳过 {stats['table_pages_skipped']} 页的表格提取，"
+              f"{stats.get('table_plumber_pages', 0)} 页由 pdfplumber 提取")
+    if stats.get("cache_hits") or stats.get("cache_misses"):
+        print(f"转换缓存：命中 {stats.get('cache_hits', 0)}，未命中 {stats.get('cache_misses', 0)}")
+    if stats.get("units_total"):
+        print(f"增量转换：{stats['units_total']} 个单元中复用 {stats['units_reused']} 个")
+    if stats.get("image_writes_saved"):
+        print(f"图片去重：省去 {stats['image_writes_saved']} 次写入，共 {stats['image_bytes_saved']} 字节")
+    for failure in summary["failures"]:
+        print(f"  失败: {failure['file']}: {failure['error']}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
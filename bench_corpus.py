@@ -0,0 +1,203 @@
+# bench_corpus.py
+"""基准测试用的合成文档语料生成器。
+
+按给定的页数、每页表格数、每页图片数与中英文比例生成 DOCX 与 PDF 文档；相同的参数与随机种子
+总是生成内容相同的语料，保证不同提交之间的基准结果可以比较。生成结果与参数一并记录在语料目录
+下的 manifest.json 中。
+
+用法示例：
+    python bench_corpus.py bench_corpus
+    python bench_corpus.py bench_corpus --pages 200 --tables 2 --images 1 --cjk 0.8
+    python bench_corpus.py bench_corpus --pages 200 --no-toc
+"""
+import argparse
+import io
+import json
+import os
+import random
+
+import docx
+import fitz
+from docx.shared import Inches
+from PIL import Image, ImageDraw
+
+# 生成器版本号：生成规则变化时递增，基准结果只与同一版本生成的语料比较
+CORPUS_VERSION = 2
+MANIFEST_FILE = "manifest.json"
+
+# 默认语料：常规文档、表格密集、图片密集、纯中文长文档与没有书签的 PDF（覆盖首遍的目录推断扫描）。
+# toc 默认为 True；为 False 时 PDF 不写书签，且只生成 PDF（Word 文档没有书签，目录总是来自标题）
+DEFAULT_PROFILES = [
+    {"name": "mixed", "pages": 40, "tables": 1, "images": 1, "cjk": 0.5},
+    {"name": "tables", "pages": 20, "tables": 4, "images": 0, "cjk": 0.3},
+    {"name": "images", "pages": 20, "tables": 0, "images": 4, "cjk": 0.3},
+    {"name": "cjk_long", "pages": 150, "tables": 0, "images": 0, "cjk": 1.0},
+    {"name": "no_toc", "pages": 40, "tables": 1, "images": 1, "cjk": 0.5, "toc": False},
+]
+
+PARAGRAPHS_PER_PAGE = 6
+TABLE_ROWS = 5
+TABLE_COLS = 4
+
+_CJK_CHARS = ("的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说"
+              "产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从"
+              "业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么"
+              "利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文")
+_LATIN_WORDS = ("document parser markdown export table image page section report analysis data system "
+                "performance memory stream layout heading paragraph figure result method value index").split()
+
+
+def _sentence(rng, cjk_ratio):
+    if rng.random() < cjk_ratio:
+        return "".join(rng.choice(_CJK_CHARS) for _ in range(rng.randint(12, 30))) + "。"
+    words = [rng.choice(_LATIN_WORDS) for _ in range(rng.randint(6, 14))]
+    return " ".join(words).capitalize() + ". "
+
+
+def _paragraph(rng, cjk_ratio, sentences=3):
+    return "".join(_sentence(rng, cjk_ratio) for _ in range(sentences)).strip()
+
+
+def _cell_text(rng, cjk_ratio):
+    if rng.random() < cjk_ratio:
+        return "".join(rng.choice(_CJK_CHARS) for _ in range(rng.randint(2, 6)))
+    return rng.choice(_LATIN_WORDS)
+
+
+def _image_bytes(rng, index):
+    """生成一张内容各不相同的小图片；奇数序号为 JPEG，偶数序号为 PNG（避免被去重掩盖写盘开销）。"""
+    im = Image.new("RGB", (320, 240), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(im)
+    for _ in range(12):
+        x0, y0 = rng.randrange(300), rng.randrange(220)
+        draw.rectangle([x0, y0, x0 + rng.randint(10, 120), y0 + rng.randint(10, 90)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    out = io.BytesIO()
+    if index % 2:
+        im.save(out, format="JPEG", quality=85)
+    else:
+        im.save(out, format="PNG")
+    return out.getvalue()
+
+
+def generate_docx(path, pages, tables=0, images=0, cjk=0.5, seed=0):
+    """生成 DOCX：每一“页”包含一个标题、若干段落、指定数量的表格与图片，页之间插入分页符。"""
+    rng = random.Random(seed)
+    document = docx.Document()
+    image_index = 0
+    for page in range(pages):
+        document.add_heading(f"{page + 1}. " + _sentence(rng, cjk).strip(" 。."), level=1 if page % 5 == 0 else 2)
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            document.add_paragraph(_paragraph(rng, cjk))
+        for _ in range(tables):
+            table = document.add_table(rows=TABLE_ROWS, cols=TABLE_COLS)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = _cell_text(rng, cjk)
+        for _ in range(images):
+            image_index += 1
+            document.add_picture(io.BytesIO(_image_bytes(rng, image_index)), width=Inches(3))
+        if page + 1 < pages:
+            document.add_page_break()
+    document.save(path)
+
+
+def generate_pdf(path, pages, tables=0, images=0, cjk=0.5, seed=0, toc=True):
+    """生成 PDF：每页包含一个标题、若干段落、带框线的表格（可被 pdfplumber 识别）与图片；
+    toc 为 True 时为每页添加书签，为 False 时不写书签，目录只能由字号推断。"""
+    rng = random.Random(seed)
+    pdf = fitz.open()
+    bookmarks = []
+    image_index = 0
+    for page_number in range(pages):
+        page = pdf.new_page(width=595, height=842)  # A4
+        title = f"{page_number + 1}. " + _sentence(rng, cjk).strip(" 。.")
+        bookmarks.append([1 if page_number % 5 == 0 else 2, title, page_number + 1])
+        page.insert_text((50, 60), title, fontname="china-s", fontsize=14)
+        y = 80
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            rect = fitz.Rect(50, y, 545, y + 60)
+            page.insert_textbox(rect, _paragraph(rng, cjk, sentences=2), fontname="china-s", fontsize=9)
+            y += 64
+        for _ in range(tables):
+            y = _draw_table(page, rng, cjk, y + 6)
+        for _ in range(images):
+            if y + 100 > 800:
+                break
+            image_index += 1
+            page.insert_image(fitz.Rect(50, y + 6, 183, y + 106), stream=_image_bytes(rng, image_index))
+            y += 110
+    if toc and bookmarks:
+        pdf.set_toc(bookmarks)
+    pdf.save(path, garbage=3, deflate=True)
+    pdf.close()
+
+
+def _draw_table(page, rng, cjk, top):
+    """在页面上绘制一个带完整框线的表格，返回表格下边缘的纵坐标。"""
+    row_height, col_width, left = 18, 110, 50
+    if top + row_height * TABLE_ROWS > 800:
+        return top
+    bottom = top + row_height * TABLE_ROWS
+    right = left + col_width * TABLE_COLS
+    for r in range(TABLE_ROWS + 1):
+        page.draw_line((left, top + r * row_height), (right, top + r * row_height), width=0.7)
+    for c in range(TABLE_COLS + 1):
+        page.draw_line((left + c * col_width, top), (left + c * col_width, bottom), width=0.7)
+    for r in range(TABLE_ROWS):
+        for c in range(TABLE_COLS):
+            page.insert_text((left + c * col_width + 4, top + r * row_height + 13),
+                             _cell_text(rng, cjk), fontname="china-s", fontsize=9)
+    return bottom
+
+
+def generate_corpus(output_dir, profiles=None, seed=0):
+    """按 profiles 生成语料（每个 profile 生成一个 DOCX 与一个 PDF），返回写入 manifest.json 的清单。"""
+    os.makedirs(output_dir, exist_ok=True)
+    profiles = profiles or DEFAULT_PROFILES
+    documents = []
+    for i, profile in enumerate(profiles):
+        params = {k: profile[k] for k in ("pages", "tables", "images", "cjk")}
+        toc = profile.get("toc", True)
+        kinds = [(".pdf", generate_pdf, {"toc": toc})]
+        if toc:
+            kinds.insert(0, (".docx", generate_docx, {}))
+        for kind, generate, options in kinds:
+            file_name = f"{profile['name']}{kind}"
+            generate(os.path.join(output_dir, file_name), seed=seed + i, **params, **options)
+            documents.append(dict(params, **options, file=file_name, profile=profile["name"]))
+    manifest = {"version": CORPUS_VERSION, "seed": seed, "profiles": profiles, "documents": documents}
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def load_manifest(corpus_dir):
+    with open(os.path.join(corpus_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成基准测试用的合成 DOCX/PDF 语料")
+    parser.add_argument("output_dir", help="语料输出目录")
+    parser.add_argument("--pages", type=int, help="页数（指定任一参数时只生成一组自定义语料）")
+    parser.add_argument("--tables", type=int, default=1, help="每页表格数，默认 1")
+    parser.add_argument("--images", type=int, default=1, help="每页图片数，默认 1")
+    parser.add_argument("--cjk", type=float, default=0.5, help="中文句子所占比例（0~1），默认 0.5")
+    parser.add_argument("--no-toc", action="store_true", help="PDF 不写书签（只生成 PDF），用于测量目录推断")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，默认 0")
+    args = parser.parse_args(argv)
+    profiles = None
+    if args.pages is not None:
+        profiles = [{"name": "custom", "pages": args.pages, "tables": args.tables,
+                     "images": args.images, "cjk": args.cjk}]
+        if args.no_toc:
+            profiles[0]["toc"] = False
+    manifest = generate_corpus(args.output_dir, profiles, args.seed)
+    for document in manifest["documents"]:
+        print(f"{document['file']}: {document['pages']} 页")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
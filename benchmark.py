@@ -0,0 +1,396 @@
+# benchmark.py
+"""可复现的转换性能基准：在合成语料（见 bench_corpus.py）上逐阶段计时，并与保存的基线比较。
+
+每个“文档 × 阶段”在一个全新的子进程中运行，记录墙钟时间（多次重复取中位数）、每秒页数与
+子进程的峰值内存（RSS），互不影响。测得的时间或峰值内存超过基线一定比例时以非 0 状态码退出，
+可直接用于提交前检查或持续集成。
+
+用法示例：
+    python benchmark.py --save-baseline bench_baseline.json      # 生成语料并记录基线
+    python benchmark.py --baseline bench_baseline.json           # 与基线比较，退化超过 20% 时失败
+    python benchmark.py --baseline bench_baseline.json --threshold 0.3 --stages doc_parser,main_window
+    python benchmark.py --table-agreement                         # 快速表格提取与 pdfplumber 的速度及一致率
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bench_corpus
+from conversion_profile import peak_rss_bytes
+
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "doc_parser_bench_corpus")
+DEFAULT_THRESHOLD = 0.2
+# 低于该差值的变化视为测量噪声，不判定为退化
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 8
+
+
+# --- 各阶段 ---------------------------------------------------------------------------------
+# 阶段函数签名为 (文档路径, 临时输出目录)，在子进程中调用；各模块在函数内导入，
+# 导入耗时不计入阶段时间，但其内存计入峰值 RSS。
+
+def _stage_pdf_text(file_path, output_dir):
+    import fitz
+    with fitz.open(file_path) as pdf:
+        for page in pdf:
+            page.get_text()
+
+
+def _stage_pdf_outline(file_path, output_dir):
+    import fitz
+    from pdf_headings import infer_headings, page_text_lines
+    with fitz.open(file_path) as pdf:
+        infer_headings([page_text_lines(page)[1] for page in pdf])
+
+
+def _stage_pdf_tables(file_path, output_dir):
+    from pdf_engine import PdfEngine
+    with PdfEngine(file_path) as engine:
+        for page_index in range(len(engine)):
+            engine.extract_tables(page_index)
+
+
+def _stage_pdf_tables_plumber(file_path, output_dir):
+    from pdf_engine import PdfEngine
+    with PdfEngine(file_path, fast_tables=False) as engine:
+        for page_index in range(len(engine)):
+            engine.extract_tables(page_index)
+
+
+def _stage_pdf_images(file_path, output_dir):
+    import fitz
+    with fitz.open(file_path) as pdf:
+        for page in pdf:
+            for img in page.get_images(full=True):
+                pdf.extract_image(img[0])
+
+
+def _stage_docx_blocks(file_path, output_dir):
+    from docx_stream import DocxStreamReader
+    with DocxStreamReader(file_path) as reader:
+        for _ in reader.iter_blocks():
+            pass
+
+
+def _stage_docx_images(file_path, output_dir):
+    from docx_stream import DocxStreamReader
+    with DocxStreamReader(file_path) as reader:
+        for _ in reader.iter_images():
+            pass
+
+
+def _stage_doc_parser(file_path, output_dir):
+    import doc_parser
+    doc_parser.parse_document(file_path, output_dir)
+
+
+def _stage_pdf_parser(file_path, output_dir):
+    import pdf_parser
+    pdf_parser.parse_pdf(file_path, output_dir)
+
+
+def _stage_word_parser(file_path, output_dir):
+    import word_parser
+    word_parser.parse_docx(file_path, output_dir)
+
+
+def _stage_main_window(file_path, output_dir):
+    import main_window
+    # main_window 把 Markdown 与图片写在文档旁边；_run_stage 已在计时前把文档复制到临时目录
+    main_window.parse_document(file_path, use_cache=False)
+
+
+# 阶段名 -> (适用的扩展名, 阶段函数, 需要预先导入的模块)
+STAGES = {
+    "pdf_text": (".pdf", _stage_pdf_text, ("fitz",)),
+    "pdf_outline": (".pdf", _stage_pdf_outline, ("pdf_headings",)),
+    "pdf_tables": (".pdf", _stage_pdf_tables, ("pdf_engine",)),
+    "pdf_tables_plumber": (".pdf", _stage_pdf_tables_plumber, ("pdf_engine",)),
+    "pdf_images": (".pdf", _stage_pdf_images, ("fitz",)),
+    "docx_blocks": (".docx", _stage_docx_blocks, ("docx_stream",)),
+    "docx_images": (".docx", _stage_docx_images, ("docx_stream",)),
+    "doc_parser": ((".pdf", ".docx"), _stage_doc_parser, ("doc_parser",)),
+    "pdf_parser": (".pdf", _stage_pdf_parser, ("pdf_parser",)),
+    "word_parser": (".docx", _stage_word_parser, ("word_parser",)),
+    "main_window": ((".pdf", ".docx"), _stage_main_window, ("main_window",)),
+}
+
+
+def _run_stage(stage, file_path, repeat):
+    """在子进程中运行一个阶段 repeat 次，返回每次的耗时与进程峰值内存。"""
+    _, func, modules = STAGES[stage]
+    for module in modules:
+        __import__(module)
+    times = []
+    for _ in range(repeat):
+        work_dir = tempfile.mkdtemp(prefix="bench_")
+        try:
+            target = os.path.join(work_dir, os.path.basename(file_path))
+            shutil.copyfile(file_path, target)
+            output_dir = os.path.join(work_dir, "output")
+            os.makedirs(output_dir)
+            start = time.perf_counter()
+            func(target, output_dir)
+            times.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return {"times": times, "peak_rss": peak_rss_bytes()}
+
+
+def _applies(stage, file_name):
+    exts = STAGES[stage][0]
+    if isinstance(exts, str):
+        exts = (exts,)
+    return os.path.splitext(file_name)[1].lower() in exts
+
+
+def run_benchmark(corpus_dir, stages=None, repeat=3, on_result=None):
+    """在语料上运行各阶段，返回 {"文档/阶段": 结果} 字典（按语料顺序）。"""
+    manifest = bench_corpus.load_manifest(corpus_dir)
+    stages = stages or list(STAGES)
+    results = {}
+    # 每个任务使用全新的进程（spawn），峰值内存互不干扰
+    context = multiprocessing.get_context("spawn")
+    for document in manifest["documents"]:
+        file_path = os.path.join(corpus_dir, document["file"])
+        for stage in stages:
+            if not _applies(stage, document["file"]):
+                continue
+            key = f"{document['file']}/{stage}"
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                try:
+                    measured = pool.submit(_run_stage, stage, file_path, repeat).result()
+                except Exception as e:
+                    result = {"error": f"{type(e).__name__}: {e}"}
+                else:
+                    seconds = statistics.median(measured["times"])
+                    result = {
+                        "seconds": round(seconds, 4),
+                        "min_seconds": round(min(measured["times"]), 4),
+                        "pages": document["pages"],
+                        "pages_per_second": round(document["pages"] / seconds, 2) if seconds > 0 else None,
+                        "peak_rss_mb": (round(measured["peak_rss"] / (1024 * 1024), 1)
+                                        if measured["peak_rss"] is not None else None),
+                    }
+            results[key] = result
+            if on_result is not None:
+                on_result(key, result)
+    return results
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """与基线比较，返回退化描述列表（为空表示没有退化）。只比较两边都有的条目。"""
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None or "error" in base:
+            continue
+        if "error" in current:
+            regressions.append(f"{key}: 运行失败（{current['error']}）")
+            continue
+        seconds, base_seconds = current["seconds"], base["seconds"]
+        if seconds > base_seconds * (1 + threshold) and seconds - base_seconds > MIN_SECONDS_DELTA:
+            regressions.append(f"{key}: 耗时 {base_seconds:.3f}s -> {seconds:.3f}s "
+                               f"(+{(seconds / base_seconds - 1) * 100:.0f}%)")
+        rss, base_rss = current.get("peak_rss_mb"), base.get("peak_rss_mb")
+        if rss is not None and base_rss:
+            if rss > base_rss * (1 + threshold) and rss - base_rss > MIN_RSS_DELTA_MB:
+                regressions.append(f"{key}: 峰值内存 {base_rss:.1f}MB -> {rss:.1f}MB "
+                                   f"(+{(rss / base_rss - 1) * 100:.0f}%)")
+    return regressions
+
+
+def _normalize_table(table):
+    return [[" ".join(cell.split()) if cell is not None else None for cell in row] for row in table]
+
+
+def compare_table_extractors(file_path):
+    """在一个 PDF 的候选页（通过表格预筛的页面）上比较 pdf_tables 与 pdfplumber 的耗时与结果。
+
+    单元格文本按空白归一化后比较；表格的行列数与全部单元格都相同才算一致。
+    快速提取无法处理而回退的页面只计入 fallback_pages，不参与比较。
+    """
+    import fitz
+    import pdfplumber
+    import pdf_tables
+    from pdf_engine import page_may_have_table
+    result = {"pages": 0, "fallback_pages": 0, "fast_seconds": 0.0, "plumber_seconds": 0.0,
+              "tables": 0, "tables_matched": 0, "cells": 0, "cells_matched": 0}
+    with fitz.open(file_path) as doc, pdfplumber.open(file_path) as plumber:
+        for page_index, page in enumerate(doc):
+            if not page_may_have_table(page):
+                continue
+            start = time.perf_counter()
+            fast = pdf_tables.extract_tables(page)
+            fast_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            expected = plumber.pages[page_index].extract_tables()
+            plumber_seconds = time.perf_counter() - start
+            plumber.pages[page_index].close()
+            if fast is None:
+                result["fallback_pages"] += 1
+                continue
+            result["pages"] += 1
+            result["fast_seconds"] += fast_seconds
+            result["plumber_seconds"] += plumber_seconds
+            result["tables"] += max(len(fast), len(expected))
+            for got, want in zip(fast, expected):
+                got, want = _normalize_table(got), _normalize_table(want)
+                result["tables_matched"] += got == want
+                result["cells"] += sum(len(row) for row in want)
+                result["cells_matched"] += sum(
+                    a == b for got_row, want_row in zip(got, want) for a, b in zip(got_row, want_row))
+            for want in expected[len(fast):]:
+                result["cells"] += sum(len(row) for row in want)
+    return result
+
+
+_AGREEMENT_COUNTS = ("pages", "fallback_pages", "fast_seconds", "plumber_seconds",
+                     "tables", "tables_matched", "cells", "cells_matched")
+
+
+def run_table_agreement(corpus_dir, on_result=None):
+    """在语料的全部 PDF 上运行 compare_table_extractors，返回 {"文档": 结果, "total": 合计}。"""
+    manifest = bench_corpus.load_manifest(corpus_dir)
+    results = {}
+    total = dict.fromkeys(_AGREEMENT_COUNTS, 0)
+    for document in manifest["documents"]:
+        if not document["file"].lower().endswith(".pdf"):
+            continue
+        result = compare_table_extractors(os.path.join(corpus_dir, document["file"]))
+        _finish_agreement(result)
+        results[document["file"]] = result
+        for key in _AGREEMENT_COUNTS:
+            total[key] += result[key]
+        if on_result is not None:
+            on_result(document["file"], result)
+    results["total"] = _finish_agreement(total)
+    if on_result is not None:
+        on_result("total", total)
+    return results
+
+
+def _finish_agreement(result):
+    """补充加速比与一致率（没有可比较的表格时一致率为 1）。"""
+    result["speedup"] = (round(result["plumber_seconds"] / result["fast_seconds"], 1)
+                         if result.get("fast_seconds") else None)
+    result["table_agreement"] = result["tables_matched"] / result["tables"] if result.get("tables") else 1.0
+    result["cell_agreement"] = result["cells_matched"] / result["cells"] if result.get("cells") else 1.0
+    return result
+
+
+def _print_agreement(name, result):
+    speedup = f"{result['speedup']:.1f}x" if result["speedup"] is not None else "-"
+    print(f"{name:<24} {result['pages']:>4} 页  pdf_tables {result['fast_seconds']:.3f}s  "
+          f"pdfplumber {result['plumber_seconds']:.3f}s  加速 {speedup:>7}  "
+          f"表格一致 {result['table_agreement']:.1%}  单元格一致 {result['cell_agreement']:.1%}  "
+          f"回退 {result['fallback_pages']} 页")
+
+
+def _corpus_signature(manifest):
+    return {"version": manifest["version"], "seed": manifest["seed"], "profiles": manifest["profiles"]}
+
+
+def _ensure_corpus(corpus_dir, seed, refresh=False):
+    """语料目录中没有清单时生成默认语料；refresh 为 True 时语料由其他版本或种子生成也重新生成。"""
+    try:
+        manifest = bench_corpus.load_manifest(corpus_dir)
+        if not refresh or (manifest["version"] == bench_corpus.CORPUS_VERSION and manifest["seed"] == seed):
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    print(f"生成基准语料：{corpus_dir}")
+    return bench_corpus.generate_corpus(corpus_dir, seed=seed)
+
+
+def _print_result(key, result):
+    if "error" in result:
+        print(f"[失败] {key}: {result['error']}")
+        return
+    rss = f"{result['peak_rss_mb']:.1f}MB" if result["peak_rss_mb"] is not None else "-"
+    print(f"{key:<32} {result['seconds']:>8.3f}s {result['pages_per_second'] or 0:>9.1f} 页/秒  峰值内存 {rss}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在合成语料上逐阶段测量转换性能，并与基线比较")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR,
+                        help="语料目录（不存在时自动生成默认语料；可用 bench_corpus.py 生成自定义语料）")
+    parser.add_argument("--seed", type=int, default=0, help="自动生成语料时使用的随机种子，默认 0")
+    parser.add_argument("--stages", help=f"只运行指定阶段（逗号分隔），可选：{','.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="每个阶段重复次数，取中位数，默认 3")
+    parser.add_argument("--baseline", help="与该基线 JSON 比较，退化超过阈值时以状态码 1 退出")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"允许的退化比例，默认 {DEFAULT_THRESHOLD}（即 {DEFAULT_THRESHOLD:.0%}）")
+    parser.add_argument("--save-baseline", metavar="PATH", help="将本次结果保存为基线 JSON")
+    parser.add_argument("--report", help="将本次结果保存为 JSON 文件")
+    parser.add_argument("--table-agreement", action="store_true",
+                        help="不运行各阶段，改为在语料的 PDF 上比较快速表格提取与 pdfplumber 的速度与一致率")
+    parser.add_argument("--min-agreement", type=float, default=None,
+                        help="与 --table-agreement 一起使用：单元格一致率低于该值（0~1）时以状态码 1 退出")
+    args = parser.parse_args(argv)
+
+    stages = args.stages.split(",") if args.stages else None
+    unknown = [stage for stage in stages or () if stage not in STAGES]
+    if unknown:
+        parser.error(f"未知的阶段：{', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    manifest = _ensure_corpus(args.corpus, args.seed, refresh=args.corpus == DEFAULT_CORPUS_DIR)
+    if baseline is not None and baseline.get("corpus") != _corpus_signature(manifest):
+        print("基线使用的语料与当前语料不同，无法比较", file=sys.stderr)
+        return 2
+
+    if args.table_agreement:
+        agreement = run_table_agreement(args.corpus, on_result=_print_agreement)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump({"corpus": _corpus_signature(manifest), "table_agreement": agreement},
+                          f, ensure_ascii=False, indent=2)
+        if args.min_agreement is not None and agreement["total"]["cell_agreement"] < args.min_agreement:
+            print(f"\n单元格一致率低于 {args.min_agreement:.1%}")
+            return 1
+        return 0
+
+    results = run_benchmark(args.corpus, stages, args.repeat, on_result=_print_result)
+    report = {
+        "corpus": _corpus_signature(manifest),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "repeat": args.repeat,
+        "results": results,
+    }
+    for path in (args.report, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+    exit_code = 1 if any("error" in result for result in results.values()) else 0
+    if baseline is not None:
+        regressions = compare_results(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n与基线相比退化超过 {args.threshold:.0%}：")
+            for line in regressions:
+                print(f"  {line}")
+            exit_code = 1
+        else:
+            print(f"\n未发现超过 {args.threshold:.0%} 的退化")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,168 @@
+# conversion_cache.py
+"""基于内容哈希的持久化转换缓存。
+
+缓存键由输入文件内容的 SHA-256、转换器版本号与转换选项共同决定；缓存条目保存
+生成的 Markdown、图片、目录结构与全文文本。重复转换未修改过的文档时只需查表并拷贝文件。
+缓存总大小超过上限时按最近最少使用（LRU）顺序淘汰条目。
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+META_FILE = "meta.json"
+MARKDOWN_FILE = "content.md"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 默认缓存上限 512 MB
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """分块计算文件内容的 SHA-256，避免一次性读入大文件。"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """磁盘上的转换结果缓存，带 LRU 淘汰与命中/未命中计数。
+
+    每个条目是 cache_dir 下的一个子目录，目录的修改时间即最近访问时间；
+    新条目先写入临时目录再整体重命名，多个进程共享同一缓存目录时不会读到写了一半的条目。
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._sizes = None  # 条目名 -> 字节数，首次需要时扫描缓存目录得到
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "cache_evictions": 0}
+
+    def make_key(self, file_path, version, options=None):
+        """根据文件内容、转换器版本与选项生成缓存键。"""
+        digest = hashlib.sha256()
+        digest.update(file_digest(file_path).encode("ascii"))
+        digest.update(str(version).encode("utf-8"))
+        digest.update(json.dumps(options or {}, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def restore(self, key, md_path):
+        """缓存命中时把 Markdown 与图片还原到 md_path 所在目录，并返回条目元数据；未命中返回 None。
+
+        元数据中包含 images（相对 Markdown 目录的图片路径）、outline 与 full_text。
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            target_dir = os.path.dirname(os.path.abspath(md_path))
+            for rel_path in meta["images"]:
+                dest = os.path.join(target_dir, rel_path)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                shutil.copyfile(os.path.join(entry_dir, "images", rel_path), dest)
+            shutil.copyfile(os.path.join(entry_dir, MARKDOWN_FILE), md_path)
+            os.utime(entry_dir)  # 刷新访问时间，供 LRU 淘汰使用
+        except (OSError, ValueError, KeyError):
+            self.stats["cache_misses"] += 1
+            return None
+        self.stats["cache_hits"] += 1
+        return meta
+
+    def store(self, key, md_path, images=(), outline=None, full_text=None, extra=None):
+        """保存一次转换结果。images 为相对于 Markdown 所在目录的图片路径列表，
+        extra 为需要一并保存到元数据中的其他可 JSON 序列化的字段。"""
+        source_dir = os.path.dirname(os.path.abspath(md_path))
+        tmp_dir = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            size = 0
+            for rel_path in images:
+                dest = os.path.join(tmp_dir, "images", rel_path)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                shutil.copyfile(os.path.join(source_dir, rel_path), dest)
+                size += os.path.getsize(dest)
+            shutil.copyfile(md_path, os.path.join(tmp_dir, MARKDOWN_FILE))
+            size += os.path.getsize(md_path)
+            meta = {
+                "images": list(images),
+                "outline": outline,
+                "full_text": full_text,
+                "created": time.time(),
+            }
+            if extra:
+                meta.update(extra)
+            meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+            with open(os.path.join(tmp_dir, META_FILE), "wb") as f:
+                f.write(meta_bytes)
+            size += len(meta_bytes)
+            entry_dir = self._entry_dir(key)
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # 其他进程已抢先写入了同一条目，内容相同，直接丢弃本次结果
+                if not os.path.isdir(entry_dir):
+                    raise
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        sizes = self._entry_sizes()
+        sizes[key] = size
+        self._evict(keep=key)
+
+    def total_bytes(self):
+        return sum(self._entry_sizes().values())
+
+    def _entry_sizes(self):
+        if self._sizes is None:
+            self._sizes = {}
+            for name in os.listdir(self.cache_dir):
+                entry_dir = self._entry_dir(name)
+                if name.startswith(".") or not os.path.isdir(entry_dir):
+                    continue
+                self._sizes[name] = _dir_size(entry_dir)
+        return self._sizes
+
+    def _evict(self, keep=None):
+        """按目录修改时间从旧到新淘汰条目（刚写入的条目保留）。
+
+        超过上限后一次淘汰到上限的 90%，避免缓存满载时每次写入都重新排序全部条目。
+        """
+        sizes = self._entry_sizes()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        low_water = self.max_bytes * 0.9
+
+        def access_time(name):
+            try:
+                return os.path.getmtime(self._entry_dir(name))
+            except OSError:
+                return 0.0
+
+        for name in sorted(sizes, key=access_time):
+            if total <= low_water:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(self._entry_dir(name), ignore_errors=True)
+            total -= sizes.pop(name)
+            self.stats["cache_evictions"] += 1
+
+
+def _dir_size(path):
+    total = 0
+    for dir_path, _, file_names in os.walk(path):
+        for name in file_names:
+            try:
+                total += os.path.getsize(os.path.join(dir_path, name))
+            except OSError:
+                pass
+    return total
@@ -0,0 +1,207 @@
+# conversion_profile.py
+"""转换过程的分阶段性能剖析：按阶段、按页统计耗时、调用次数、写入字节数与峰值内存增长。
+
+转换代码在关键步骤处使用：
+    with conversion_profile.stage("pdf_tables", page=3) as s:
+        ...
+        s.add_bytes(len(data))
+未启用剖析时 stage() 直接返回一个共享的空上下文，只多一次函数调用与全局变量判断，开销可以忽略。
+在 profiling() 上下文中执行转换即可启用，结束时可把报告写成 JSON（通常与 .md 放在一起，
+文件名为 "{文档名}.profile.json"）。
+
+内存以进程峰值常驻内存（RSS）的增长量记录：某阶段执行期间峰值 RSS 上升了多少，就记在该阶段上，
+可以据此找出把内存推高的步骤。页并行模式下工作进程的剖析结果会合并到主进程的报告中。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_SUFFIX = ".profile.json"
+
+_active = None  # 当前进程中启用的 Profiler，None 表示未启用
+
+
+def peak_rss_bytes():
+    """当前进程的峰值常驻内存（字节）；无法获取时返回 None。"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 为单位，macOS 以字节为单位
+        return peak if sys.platform == "darwin" else peak * 1024
+    if sys.platform == "win32":
+        return _windows_peak_rss()
+    return None
+
+
+def _windows_peak_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class _Counters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = _Counters()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return counters.PeakWorkingSetSize
+    return None
+
+
+def profile_path(md_path):
+    """与 Markdown 文件对应的剖析报告路径。"""
+    return os.path.splitext(md_path)[0] + PROFILE_SUFFIX
+
+
+class _NullStage:
+    """未启用剖析时使用的空阶段。"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add_bytes(self, count):
+        pass
+
+    def add_text(self, text):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def current():
+    """当前进程中启用的 Profiler；未启用剖析时返回 None。"""
+    return _active
+
+
+def stage(name, page=None):
+    """返回一个计时上下文；page 为 1 起始的页码，省略时使用当前线程通过 set_page 设置的页码。"""
+    profiler = _active
+    if profiler is None:
+        return _NULL_STAGE
+    return _Stage(profiler, name, page)
+
+
+def set_page(page):
+    """设置当前线程正在处理的页码（1 起始，None 表示不属于某一页），之后未指定页码的阶段计入该页。"""
+    profiler = _active
+    if profiler is not None:
+        profiler.local.page = page
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "page", "bytes", "start", "rss")
+
+    def __init__(self, profiler, name, page):
+        self.profiler = profiler
+        self.name = name
+        self.page = page if page is not None else getattr(profiler.local, "page", None)
+        self.bytes = 0
+
+    def __enter__(self):
+        self.rss = peak_rss_bytes()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        rss = peak_rss_bytes()
+        growth = rss - self.rss if rss is not None and self.rss is not None else 0
+        self.profiler.record(self.name, self.page, elapsed, self.bytes, growth)
+        return False
+
+    def add_bytes(self, count):
+        self.bytes += count
+
+    def add_text(self, text):
+        self.bytes += len(text.encode("utf-8"))
+
+
+def _new_entry():
+    return {"seconds": 0.0, "calls": 0, "bytes": 0, "peak_rss_growth": 0}
+
+
+def _add_entry(entry, seconds, calls, count, growth):
+    entry["seconds"] += seconds
+    entry["calls"] += calls
+    entry["bytes"] += count
+    entry["peak_rss_growth"] += growth
+
+
+class Profiler:
+    """收集一次转换中各阶段（以及各页中各阶段）的统计。多线程同时记录时是安全的。"""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.stages = {}  # 阶段名 -> 统计
+        self.pages = {}   # 页码 -> {阶段名 -> 统计}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._start_rss = peak_rss_bytes()
+
+    def record(self, name, page, seconds, count=0, growth=0, calls=1):
+        with self._lock:
+            _add_entry(self.stages.setdefault(name, _new_entry()), seconds, calls, count, growth)
+            if page is not None:
+                page_stages = self.pages.setdefault(page, {})
+                _add_entry(page_stages.setdefault(name, _new_entry()), seconds, calls, count, growth)
+
+    def merge(self, data):
+        """合并另一进程中 Profiler.as_dict() 的结果（页并行模式的工作进程）。"""
+        for name, entry in data["stages"].items():
+            self.record(name, None, entry["seconds"], entry["bytes"], entry["peak_rss_growth"], entry["calls"])
+        with self._lock:
+            for page, page_stages in data["pages"].items():
+                target = self.pages.setdefault(int(page), {})
+                for name, entry in page_stages.items():
+                    _add_entry(target.setdefault(name, _new_entry()), entry["seconds"], entry["calls"],
+                               entry["bytes"], entry["peak_rss_growth"])
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+                "pages": {str(page): {name: dict(entry) for name, entry in page_stages.items()}
+                          for page, page_stages in sorted(self.pages.items())},
+            }
+
+    def report(self, **extra):
+        """完整报告：总耗时、进程峰值内存及其在本次转换中的增长、各阶段与各页统计，以及 extra 中的附加信息。"""
+        rss = peak_rss_bytes()
+        report = dict(extra)
+        report["total_seconds"] = time.perf_counter() - self._start
+        report["peak_rss"] = rss
+        report["peak_rss_growth"] = (rss - self._start_rss
+                                     if rss is not None and self._start_rss is not None else None)
+        report.update(self.as_dict())
+        return report
+
+    def write_report(self, path, **extra):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**extra), f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def profiling():
+    """在当前进程中启用剖析，产出 Profiler；退出时恢复之前的状态（允许嵌套）。"""
+    global _active
+    previous = _active
+    profiler = _active = Profiler()
+    try:
+        yield profiler
+    finally:
+        _active = previous
@@ -0,0 +1,377 @@
+# convert_server.py
+"""常驻本地转换服务：预热的工作进程池 + HTTP 接口，逐个提交的文档不再每次付出启动与导入的开销。
+
+用法示例：
+    python convert_server.py -j 4 --port 8765
+    main.exe serve -j 4 --port 8765
+
+接口（默认只监听 127.0.0.1）：
+    POST /convert?name=报告.pdf        请求体为文档字节，返回 zip 包（Markdown 与图片）
+    POST /convert?name=报告.pdf&format=tar   返回 tar 包（format=tar.gz 为 gzip 压缩的 tar 包）
+    POST /convert?name=报告.pdf&format=json
+                                       返回 JSON：{"markdown": ..., "outline": ..., "text": ...,
+                                       "images": {文件名: base64}, "stats": ...}
+    POST /convert  (Content-Type: application/json，{"path": "D:/docs/报告.pdf"})
+                                       转换服务器本地文件，仅在启动时指定 --path-root 且文件位于该目录内时允许
+    GET  /status                       队列深度、在途任务数、完成/失败/拒绝计数
+    GET  /latency                      最近请求的延迟分位数（总延迟与转换耗时，单位秒）
+    GET  /health                       服务存活检查
+
+同时在处理或排队的请求数达到上限（工作进程数 + --queue-size）时，新请求立即得到 503 与 Retry-After，
+由调用方稍后重试（背压），服务端不会无限堆积请求。
+zip/tar 响应以分块传输编码（Transfer-Encoding: chunked）边打包边发送，不在内存中拼出整个归档；
+HTTP/1.0 客户端不支持分块传输，仍按 Content-Length 一次返回。
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from document_bundle import BUNDLE_FORMATS
+
+SUPPORTED_EXTS = (".docx", ".pdf")
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_MAX_UPLOAD_MB = 200
+# 延迟分位数基于最近这么多个请求计算
+LATENCY_WINDOW = 1000
+
+
+# --- 工作进程 -------------------------------------------------------------------------------
+
+# 工作进程启动时预先导入的模块
+WARM_MODULES = ("fitz", "pdfplumber", "docx", "PIL.Image", "doc_parser")
+
+
+def _warm_worker():
+    """工作进程初始化：提前导入解析所需的全部库，第一个请求不再承担导入开销。"""
+    for module in WARM_MODULES:
+        importlib.import_module(module)
+
+
+def _ping():
+    return os.getpid()
+
+
+def _convert_job(name, data=None, path=None):
+    """在工作进程中转换一个文档，返回 (DocumentBundle, 转换耗时)。
+
+    data 为上传的文档字节，path 为服务器本地文件路径；转换完全在内存中进行，不写临时文件。
+    """
+    import doc_parser
+
+    if path is not None:
+        with open(path, "rb") as f:
+            data = f.read()
+    start = time.perf_counter()
+    bundle = doc_parser.convert_bytes(data, name)
+    return bundle, time.perf_counter() - start
+
+
+# --- 服务状态 -------------------------------------------------------------------------------
+
+def percentile(values, fraction):
+    """最近秩法计算分位数；values 需已排序，为空时返回 None。"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+
+class ConversionService:
+    """管理预热的进程池、准入控制（背压）与延迟统计，与 HTTP 层无关。"""
+
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, path_root=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + queue_size
+        self.path_root = os.path.realpath(path_root) if path_root else None
+        self._lock = threading.Lock()
+        self._pending = 0  # 正在处理与排队中的请求数
+        self._latencies = deque(maxlen=LATENCY_WINDOW)  # 请求总延迟（含排队）
+        self._service_times = deque(maxlen=LATENCY_WINDOW)  # 工作进程中的转换耗时
+        self.counters = {"completed": 0, "failed": 0, "rejected": 0}
+        self._executor = self._start_pool()
+
+    def _start_pool(self):
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # 进程池按需启动工作进程；提交与进程数相同的空任务，使全部进程在服务开始接收请求前完成预热
+        for future in [executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def shutdown(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def try_acquire(self):
+        """准入检查：未达到容量上限时占用一个名额并返回 True，否则记为拒绝并返回 False。"""
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.counters["rejected"] += 1
+                return False
+            self._pending += 1
+            return True
+
+    def resolve_path(self, path):
+        """检查本地路径请求是否允许，返回规范化后的路径；不允许时抛出 PermissionError。"""
+        if self.path_root is None:
+            raise PermissionError("服务未启用本地路径转换（启动时指定 --path-root）")
+        real_path = os.path.realpath(path)
+        if os.path.commonpath([real_path, self.path_root]) != self.path_root:
+            raise PermissionError("路径不在允许的目录内")
+        return real_path
+
+    def release(self):
+        """归还 try_acquire 占用的名额。"""
+        with self._lock:
+            self._pending -= 1
+
+    def convert(self, name, data=None, path=None):
+        """转换一个文档（调用前必须已通过 try_acquire，结束后调用 release），返回 (DocumentBundle, 转换耗时)。"""
+        start = time.perf_counter()
+        try:
+            executor = self._executor
+            try:
+                result = executor.submit(_convert_job, name, data, path).result()
+            except BrokenProcessPool:
+                # 某个工作进程崩溃（例如解析畸形文档时被系统终止）：重建进程池，本请求按失败处理
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = self._start_pool()
+                raise RuntimeError("工作进程异常退出")
+        except Exception:
+            with self._lock:
+                self.counters["failed"] += 1
+            raise
+        else:
+            with self._lock:
+                self.counters["completed"] += 1
+                self._latencies.append(time.perf_counter() - start)
+                self._service_times.append(result[1])
+            return result
+
+    def status(self):
+        with self._lock:
+            return dict(self.counters, workers=self.workers, capacity=self.capacity,
+                        in_flight=min(self._pending, self.workers),
+                        queued=max(0, self._pending - self.workers))
+
+    def latency(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            service_times = sorted(self._service_times)
+        summary = {"count": len(latencies)}
+        for label, values in (("latency", latencies), ("conversion", service_times)):
+            summary[label] = {f"p{p}": percentile(values, p / 100) for p in (50, 90, 95, 99)}
+            summary[label]["max"] = values[-1] if values else None
+        return summary
+
+
+# --- HTTP 层 --------------------------------------------------------------------------------
+
+class _ChunkedWriter:
+    """以 HTTP/1.1 分块传输编码写出响应体的文件对象（不可定位），打包结果边生成边发送。
+
+    归档模块的小块写入先在缓冲区中合并，每个分块约 CHUNK_SIZE 字节。
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= self.CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            self._wfile.write(b"%X\r\n" % len(self._buffer))
+            self._wfile.write(self._buffer)
+            self._wfile.write(b"\r\n")
+            self._buffer.clear()
+
+    def close(self):
+        """发送剩余内容与结束分块。"""
+        self.flush()
+        self._wfile.write(b"0\r\n\r\n")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1：打包结果以分块传输编码流式发送；其他响应都带 Content-Length，连接可以复用
+    protocol_version = "HTTP/1.1"
+    service = None
+    max_upload = DEFAULT_MAX_UPLOAD_MB * 1024 * 1024
+
+    def log_message(self, format, *args):
+        pass  # 不在控制台逐条打印请求日志
+
+    def _send(self, code, body, content_type="application/json; charset=utf-8", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code, message, headers=None):
+        self._send(code, {"error": message}, headers=headers)
+
+    def do_GET(self):
+        route = urlparse(self.path).path
+        if route == "/status":
+            self._send(200, self.service.status())
+        elif route == "/latency":
+            self._send(200, self.service.latency())
+        elif route == "/health":
+            self._send(200, {"ok": True})
+        else:
+            self._error(404, "未知的接口")
+
+    def _discard_body(self, length):
+        while length > 0:
+            chunk = self.rfile.read(min(length, 1 << 16))
+            if not chunk:
+                break
+            length -= len(chunk)
+
+    def _read_request(self, query, body):
+        """解析转换请求，返回 (文件名, 上传的字节, 本地路径)；请求无效时发送错误响应并返回 None。"""
+        data = path = None
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                path = self.service.resolve_path(json.loads(body)["path"])
+            except PermissionError as e:
+                self._error(403, str(e))
+                return None
+            except (ValueError, KeyError, TypeError):
+                self._error(400, '请求体应为 {"path": "..."}')
+                return None
+            name = os.path.basename(path)
+        else:
+            data = body
+            name = os.path.basename(query.get("name", [""])[0])
+        if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTS:
+            self._error(400, "不支持的文件格式，name 的扩展名必须是 .docx 或 .pdf")
+            return None
+        if path is not None and not os.path.isfile(path):
+            self._error(404, "文件不存在")
+            return None
+        return name, data, path
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/convert":
+            self.close_connection = True  # 未读取的请求体不能留在复用的连接上
+            self._error(404, "未知的接口")
+            return
+        query = parse_qs(url.query)
+        response_format = query.get("format", ["zip"])[0]
+        if response_format not in BUNDLE_FORMATS + ("json",):
+            self.close_connection = True
+            self._error(400, f"format 只能是 {'、'.join(BUNDLE_FORMATS + ('json',))} 之一")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > self.max_upload:
+            self.close_connection = True  # 不读取请求体，直接关闭连接
+            self._error(413, "上传的文档过大")
+            return
+        # 先做准入检查再读取请求体：队列已满时分块丢弃上传的内容，不在内存中保留
+        if not self.service.try_acquire():
+            self._discard_body(length)
+            self._error(503, "队列已满，请稍后重试", headers={"Retry-After": "1"})
+            return
+        try:
+            request = self._read_request(query, self.rfile.read(length))
+            if request is None:
+                return
+            name, data, path = request
+            try:
+                bundle, seconds = self.service.convert(name, data, path)
+            except Exception as e:
+                self._error(500, f"{type(e).__name__}: {e}")
+                return
+        finally:
+            self.service.release()
+        headers = {"X-Conversion-Seconds": f"{seconds:.3f}"}
+        if response_format == "json":
+            self._send(200, bundle.as_dict(), headers=headers)
+            return
+        content_type = {"zip": "application/zip", "tar": "application/x-tar", "tar.gz": "application/gzip"}
+        headers["Content-Disposition"] = f"attachment; filename=bundle.{response_format}"
+        if self.request_version == "HTTP/1.0":
+            # HTTP/1.0 客户端不支持分块传输编码，只能整体打包后发送
+            self._send(200, bundle.to_bytes(response_format), content_type[response_format], headers)
+            return
+        self._send_stream(200, lambda stream: bundle.write(stream, response_format),
+                          content_type[response_format], headers)
+
+    def _send_stream(self, code, write_body, content_type, headers=None):
+        """以分块传输编码发送响应，write_body(stream) 把响应体写入 stream，不需要先在内存中生成整个响应体。"""
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        stream = _ChunkedWriter(self.wfile)
+        try:
+            write_body(stream)
+        except Exception:
+            # 响应头已经发出，无法再返回错误状态：直接断开连接，客户端会发现响应不完整
+            self.close_connection = True
+            raise
+        stream.close()
+
+
+def create_server(host="127.0.0.1", port=DEFAULT_PORT, workers=None, queue_size=DEFAULT_QUEUE_SIZE,
+                  path_root=None, max_upload_mb=DEFAULT_MAX_UPLOAD_MB):
+    """创建（尚未开始服务的）HTTP 服务器，工作进程在返回前已完成预热。"""
+    service = ConversionService(workers, queue_size, path_root)
+    handler = type("Handler", (_Handler,), {"service": service, "max_upload": max_upload_mb * 1024 * 1024})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="常驻本地转换服务（HTTP），使用预热的工作进程池")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，默认只监听本机 127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"监听端口，默认 {DEFAULT_PORT}")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="工作进程数，默认为 CPU 核心数")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"除正在转换的请求外最多排队的请求数，超出时返回 503，默认 {DEFAULT_QUEUE_SIZE}")
+    parser.add_argument("--path-root", help="允许按本地路径提交转换的目录（默认不允许路径请求）")
+    parser.add_argument("--max-upload", type=int, default=DEFAULT_MAX_UPLOAD_MB,
+                        help=f"上传文档大小上限（MB），默认 {DEFAULT_MAX_UPLOAD_MB}")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.workers, args.queue_size, args.path_root, args.max_upload)
+    service = server.service
+    print(f"转换服务已启动：http://{args.host}:{server.server_address[1]}"
+          f"（{service.workers} 个工作进程，最多 {service.capacity} 个并发请求）", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,30 @@
+import io
 import os
 import sys
-import re
+import hashlib
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 import fitz            # PyMuPDF，用于 PDF 文本和图片解析
-import pdfplumber      # 用于 PDF 表格提取
-from docx import Document
-from docx.parts.image import ImagePart
+from pdf_engine import PdfEngine, merge_stats  # 单次打开 PDF，表格提取按需调用 pdfplumber
+from image_store import ImageStore             # 图片编号与去重
+from markdown_writer import MarkdownBlockWriter
+from docx_stream import DocxStreamReader         # Word 正文流式解析
+from unit_cache import UnitCache, units_path     # 增量转换的单元指纹
+import conversion_profile                        # 分阶段性能剖析（默认关闭）
+import document_model                            # 中间文档模型与渲染器
+from document_model import Heading, Paragraph, Table, Image, block_markdown, block_text, iter_markdown
+try:
+    import pdf_headings                          # 没有书签的 PDF 按字体统计推断标题
+except ImportError:  # 未安装 NumPy 时没有书签的 PDF 不生成目录
+    pdf_headings = None
+
+# 转换器版本号：输出格式发生变化时递增，使旧的转换缓存自动失效
+CONVERTER_VERSION = "1.6"
+# 页并行模式下单个分片的最大页数
+MAX_SHARD_PAGES = 32
+# Word 增量转换时正文 Markdown 每段记录的块数
+DOCX_UNIT_BLOCKS = 1000
 
 def get_output_dir():
     """获取项目主目录下的 output 输出文件夹路径，如不存在则创建。"""
@@ -28,128 +48,628 @@ def get_output_dir():
     os.makedirs(output_path, exist_ok=True)  # 确保 output 文件夹存在
     return output_path
 
-def doc_to_markdown(doc_path):
-    """解析 Word 文档并返回对应的 Markdown 文本字符串。"""
-    doc = Document(doc_path)
-    output_dir = get_output_dir()
-    base_name = os.path.splitext(os.path.basename(doc_path))[0]  # 输入文件无扩展名部分
-    md_lines = []
-
-    # 提取段落文本
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        if text:
-            md_lines.append(text)
-
-    # 提取表格并转换为 Markdown 表格格式
-    for table in doc.tables:
-        rows = []
-        for row in table.rows:
-            # 获取该行所有单元格文本，去除首尾空白
-            cells = [cell.text.strip() for cell in row.cells]
-            rows.append(cells)
-        if rows:
-            # 将表格第一个行作为表头
-            header = rows[0]
-            col_count = len(header)
-            md_lines.append('|' + '|'.join(header) + '|')
-            md_lines.append('|' + '|'.join(['---'] * col_count) + '|')
-            for row in rows[1:]:
-                md_line = '|' + '|'.join(row) + '|'
-                md_lines.append(md_line)
-
-    # 提取图片并保存到 output 文件夹，Markdown 中插入对应引用
-    image_count = 0
-    for rel in doc.part.rels.values():
-        if isinstance(rel._target, ImagePart):
-            image_count += 1
-            image_bytes = rel._target.blob
-            # 使用原始图片文件的扩展名（确保保存格式正确）
-            img_ext = os.path.splitext(rel._target.filename)[1]  # 包含点号，例如 ".png" 或 ".jpg"
-            # 构造输出图片文件名：{文档名}_image{序号}.{扩展名}
-            image_filename = f"{base_name}_image{image_count}{img_ext}"
+def get_cache_dir():
+    """获取转换缓存目录（位于 output 文件夹下的 .cache）。"""
+    return os.path.join(get_output_dir(), ".cache")
+
+def doc_to_markdown(doc_path, output_dir=None, incremental=False, stats=None):
+    """解析 Word 文档并返回对应的 Markdown 文本字符串。图片保存到 output_dir（默认 output 文件夹）。
+
+    incremental 为 True 时启用增量转换（见 iter_doc_markdown），stats 字典中会累加复用的单元数。
+    """
+    if output_dir is None:
+        output_dir = get_output_dir()
+    with _unit_cache(doc_path, output_dir, incremental, stats) as units:
+        # 组合所有块，段落之间空行分隔，形成最终 Markdown 文本
+        return "\n\n".join(iter_doc_markdown(doc_path, output_dir, units=units))
+
+def _iter_docx_block_events(reader):
+    """同 reader.iter_blocks()，启用剖析时把 XML 解析与块事件的生成计入 docx_body 阶段。"""
+    elements = reader.iter_block_elements()
+    while True:
+        with conversion_profile.stage("docx_body"):
+            element = next(elements, None)
+            block = reader.block_event(element) if element is not None else None
+        if block is None:
+            return
+        yield block
+
+def _docx_blocks(reader, progress=None):
+    """把正文块事件转换为模型块：每个标题开始新的一节，第一个标题之前的内容为第 0 节，空段落与空表格跳过。
+
+    progress 不为 None 时每处理一个块以正文部件已读取的字节数调用一次。
+    """
+    section = 0
+    for block in _iter_docx_block_events(reader):
+        if block[0] == "table":
+            if block[1]:
+                yield Table(block[1], section, None)
+        else:
+            text = block[1].strip()
+            if text and block[2]:
+                section += 1
+                yield Heading(block[2], text, section, None)
+            elif text:
+                yield Paragraph(text, section, None)
+        if progress is not None:
+            progress(reader.body_position())
+
+def _index_blocks(blocks, indexer):
+    """把模型块的文本加入检索索引并原样产出；标题块同时登记为其所在节的标题。"""
+    for block in blocks:
+        if isinstance(block, Heading):
+            indexer.add_heading(block.section, block.text)
+        text = block_text(block)
+        if text is not None:
+            indexer.add(block.section, text, block.page)
+        yield block
+
+def _iter_docx_units(reader, units, indexer=None):
+    """增量转换 Word 正文：正文部件（word/document.xml）未变化时直接复用上次的全部 Markdown，不再解析 XML。
+
+    正文的 Markdown 按每 DOCX_UNIT_BLOCKS 个块分段记录，复用时逐段读取，内存占用与文档大小无关。
+    需要更新检索索引（indexer 不为 None）时仍解析正文，以取得标题与分节信息。
+    """
+    part_fingerprint = reader.part_fingerprint(reader.document_part)
+    if indexer is None and f"{part_fingerprint}-0" in units:
+        index = 0
+        while f"{part_fingerprint}-{index}" in units:
+            key = f"{part_fingerprint}-{index}"
+            blocks = units.blocks(key)
+            units.record(key, blocks, reused=True, new_unit=index == 0)
+            yield from blocks
+            index += 1
+        return
+    index = 0
+    chunk = []
+    blocks = _docx_blocks(reader)
+    if indexer is not None:
+        blocks = _index_blocks(blocks, indexer)
+    for markdown in iter_markdown(blocks):
+        chunk.append(markdown)
+        if len(chunk) >= DOCX_UNIT_BLOCKS:
+            units.record(f"{part_fingerprint}-{index}", chunk, new_unit=index == 0)
+            yield from chunk
+            index += 1
+            chunk = []
+    units.record(f"{part_fingerprint}-{index}", chunk, new_unit=index == 0)
+    yield from chunk
+
+def iter_doc_markdown(doc_path, output_dir, image_files=None, units=None, indexer=None):
+    """逐块产出 Word 文档的 Markdown 文本（标题、段落与表格按文档顺序，图片引用在最后）。
+
+    正文由 DocxStreamReader 从 word/document.xml 流式解析，内存占用与文档大小无关。
+    图片在产出对应引用前写入 output_dir；传入 image_files 列表时追加写入的图片文件名。
+    传入 unit_cache.UnitCache 时按部件计算指纹：正文部件未变时复用上次的 Markdown，图片部件未变时不再重写。
+    传入 search_index.DocumentIndexer 时同时把正文按标题分节加入检索索引。
+    """
+    file_name = os.path.basename(doc_path)  # 图片文件名以含扩展名的源文件名开头
+
+    with DocxStreamReader(doc_path) as reader:
+        # 按文档顺序单次遍历正文
+        if units is None:
+            blocks = _docx_blocks(reader)
+            if indexer is not None:
+                blocks = _index_blocks(blocks, indexer)
+            yield from iter_markdown(blocks)
+        else:
+            yield from _iter_docx_units(reader, units, indexer)
+
+        # 提取图片并保存到 output 文件夹，Markdown 中插入对应引用
+        for image_count, part_name in enumerate(reader.iter_image_parts(), 1):
+            image_filename = _docx_image_filename(file_name, image_count, part_name)
             image_path = os.path.join(output_dir, image_filename)
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_bytes)
+            # 增量转换时，图片部件未变且输出文件仍在则不再重写
+            key = f"{reader.part_fingerprint(part_name)}-{image_filename}" if units is not None else None
+            reused = key is not None and key in units and os.path.exists(image_path)
+            if not reused:
+                with conversion_profile.stage("image_write") as profile_stage, \
+                        open(image_path, "wb") as img_file:
+                    profile_stage.add_bytes(img_file.write(reader.read_part(part_name)))
+            if units is not None:
+                units.record(key, [], reused=reused)
+            if image_files is not None:
+                image_files.append(image_filename)
             # 在 Markdown 内容中添加图片引用（图片存放在与 Markdown 同一目录下）
-            md_lines.append(f"![{image_filename}]({image_filename})")
+            yield block_markdown(Image(image_filename, None, None))
+
+def _docx_image_filename(prefix, image_count, part_name):
+    """Word 图片的输出文件名：{prefix}_image{序号}.{扩展名}，prefix 为源文件名（含扩展名），
+    扩展名沿用图片部件的原始扩展名。"""
+    return f"{prefix}_image{image_count}{os.path.splitext(part_name)[1]}"
+
+def _docx_source(source):
+    """DocxStreamReader 的输入：文件路径原样返回，内存中的字节包装为文件对象。"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
 
-    # 组合所有行，段落之间空行分隔，形成最终 Markdown 文本
-    markdown_text = "\n\n".join(md_lines)
-    return markdown_text
+class DocxBackend:
+    """Word 文档的模型后端（document_model），正文由 DocxStreamReader 流式解析，图片在正文之后。"""
+    kind = "docx"
 
-def pdf_to_markdown(pdf_path):
-    """解析 PDF 文档并返回对应的 Markdown 文本字符串。"""
-    output_dir = get_output_dir()
-    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-    md_lines = []
+    def scan(self, source):
+        """Word 文档没有书签目录（以标题块作为目录）；进度单位为正文部件的字节数。"""
+        with DocxStreamReader(_docx_source(source)) as reader:
+            return None, reader.body_size()
 
-    # 打开 PDF（PyMuPDF 用于文本和图片提取，pdfplumber 用于表格提取）
-    fitz_doc = fitz.open(pdf_path)
-    pdf = pdfplumber.open(pdf_path)
+    def iter_blocks(self, source, images, workers=1, stats=None, progress=None, cancelled=None):
+        # 正文逐块产出，调用方在块之间即可取消，不需要检查 cancelled
+        with DocxStreamReader(_docx_source(source)) as reader:
+            section = 0
+            for block in _docx_blocks(reader, progress):
+                section = block.section
+                yield block
+            for image_count, part_name in enumerate(reader.iter_image_parts(), 1):
+                image_filename = _docx_image_filename(images.prefix, image_count, part_name)
+                images.put(image_filename, reader.read_part(part_name))
+                yield Image(image_filename, section, None)
 
-    for page_index in range(len(fitz_doc)):
-        # 提取页面文本内容
-        page = fitz_doc[page_index]
+def _open_pdf(source):
+    """打开 PDF：source 为文件路径或内存中的 PDF 字节。"""
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+@contextmanager
+def _pdf_engine(source, stats=None):
+    """打开 PDF 的解析引擎（source 为文件路径或内存中的 PDF 字节），结束时累加表格预筛等统计到 stats。
+
+    书签、标题推断、页面指纹与串行解析都使用这一个引擎，同一文档只打开一次。
+    """
+    with (PdfEngine(stream=source) if isinstance(source, bytes) else PdfEngine(source)) as engine:
+        try:
+            yield engine
+        finally:
+            if stats is not None:
+                merge_stats(stats, engine.stats)
+
+def _pdf_bookmarks(fitz_doc):
+    """PDF 书签目录 [(级别, 标题, 节号)]，节号为书签指向页面的页序号（从 0 开始）；没有书签时返回 None。"""
+    toc = fitz_doc.get_toc(simple=True)
+    return [(level, title, max(page - 1, 0)) for level, title, page in toc] if toc else None
+
+def _infers_outline(bookmarks):
+    """没有书签时是否按字体统计推断标题（需要 pdf_headings）。"""
+    return bookmarks is None and pdf_headings is not None
+
+def _pdf_page_items(engine, page_index, seen_xrefs):
+    """提取单页内容，按输出顺序返回条目列表：("text", 页面文本)、("table", 表格行列表)
+    或 ("image", 图片字节, 扩展名, xref)。
+
+    seen_xrefs 中已出现过的图片不再提取字节（图片字节为 None），由 ImageStore 按 xref 复用。
+    """
+    items = []
+    page_number = page_index + 1
+    # 提取页面文本内容
+    with conversion_profile.stage("pdf_text", page_number):
+        page = engine[page_index]
         text = page.get_text().strip()
-        if text:
-            md_lines.append(text)
-        # 提取页面中的表格，并转换为 Markdown 表格
-        tables = pdf.pages[page_index].extract_tables()
-        for table in tables:
-            if table:
-                # 将表格第一行作为表头
-                header = [(cell if cell is not None else "").strip() for cell in table[0]]
-                col_count = len(header)
-                md_lines.append('|' + '|'.join(header) + '|')
-                md_lines.append('|' + '|'.join(['---'] * col_count) + '|')
-                for row in table[1:]:
-                    row_cells = [(cell if cell is not None else "").strip() for cell in row]
-                    md_lines.append('|' + '|'.join(row_cells) + '|')
-        # 提取页面中的图片
+    if text:
+        items.append(("text", text))
+    # 提取页面中的表格并清洗单元格空白（无框线的页面由引擎预筛跳过）
+    with conversion_profile.stage("pdf_tables", page_number):
+        tables = engine.extract_tables(page_index)
+    for table in tables:
+        if table:
+            items.append(("table", [[(cell if cell is not None else "").strip() for cell in row] for row in table]))
+    # 提取页面中的图片（只取字节，编号与写盘由主进程统一完成，保证编号确定）
+    with conversion_profile.stage("pdf_images", page_number) as profile_stage:
         images = page.get_images(full=True)
         for img in images:
             xref = img[0]  # 获取图像xref
+            if xref in seen_xrefs:
+                items.append(("image", None, None, xref))
+                continue
             try:
-                base_image = fitz_doc.extract_image(xref)
+                base_image = engine.doc.extract_image(xref)
             except Exception:
                 base_image = None
             if base_image:
-                image_bytes = base_image.get("image")
-                img_ext = base_image.get("ext", "png")  # 图片扩展名，如 'png', 'jpg' 等
-                # 构造输出图片文件名：{PDF名}_image{序号}.{扩展名}
-                # 使用全局计数避免不同页面图片重名
-                image_index = len([name for name in os.listdir(output_dir) if name.startswith(f"{base_name}_image")]) + 1
-                image_filename = f"{base_name}_image{image_index}.{img_ext}"
-                image_path = os.path.join(output_dir, image_filename)
-                with open(image_path, "wb") as img_file:
-                    img_file.write(image_bytes)
-                md_lines.append(f"![{image_filename}]({image_filename})")
-
-    # 关闭 PDF 文件
-    fitz_doc.close()
-    pdf.close()
-    # 组合 Markdown 内容
-    markdown_text = "\n\n".join(md_lines)
-    return markdown_text
-
-def parse_document(file_path):
-    """解析给定的文件（Word 或 PDF），生成 Markdown 文件并返回其路径。"""
-    file_ext = os.path.splitext(file_path)[1].lower()
-    if file_ext in [".doc", ".docx"]:
-        md_content = doc_to_markdown(file_path)
-    elif file_ext == ".pdf":
-        md_content = pdf_to_markdown(file_path)
+                # 图片扩展名，如 'png', 'jpg' 等
+                items.append(("image", base_image.get("image"), base_image.get("ext", "png"), xref))
+                profile_stage.add_bytes(len(base_image.get("image") or b""))
+                seen_xrefs.add(xref)
+    return items
+
+def _iter_pdf_pages(engine, pages=None):
+    """按给定页码顺序逐页产出已打开的引擎中每一页的条目列表（pages 为 None 表示全部页面）。"""
+    seen_xrefs = set()
+    if pages is None:
+        pages = range(len(engine))
+    for page_index in pages:
+        yield _pdf_page_items(engine, page_index, seen_xrefs)
+
+def _pdf_shard_items(pdf_path, pages, profile=False):
+    """工作进程入口：独立打开 PDF，返回 pages 中每一页的条目列表、统计信息以及剖析结果（未启用剖析时为 None）。"""
+    stats = {}
+    with _pdf_engine(pdf_path, stats) as engine:
+        if not profile:
+            return list(_iter_pdf_pages(engine, pages)), stats, None
+        with conversion_profile.profiling() as profiler:
+            items = list(_iter_pdf_pages(engine, pages))
+    return items, stats, profiler.as_dict()
+
+def _split_page_range(page_count, shard_count):
+    """将 [0, page_count) 切分为 shard_count 个连续且大小接近的页码区间。"""
+    shard_count = max(1, min(shard_count, page_count))
+    size, extra = divmod(page_count, shard_count)
+    ranges = []
+    start = 0
+    for i in range(shard_count):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def _iter_pdf_page_items(engine, source, workers, stats=None, pages=None):
+    """按页码顺序逐页产出条目列表；workers > 1 时各分片在独立进程中（各自打开 source）并行解析。
+
+    engine 为主进程中已打开的引擎，串行解析时直接使用；pages 为需要解析的页码列表（升序），None 表示全部页面。
+    stats 用于累加各工作进程的统计信息（主进程引擎的统计由 _pdf_engine 累加）。
+    """
+    if workers <= 1:
+        yield from _iter_pdf_pages(engine, pages)
+        return
+    if pages is None:
+        pages = range(len(engine))
+    if not pages:
+        return
+    # 分片数多于进程数，使页数不均匀的分片之间负载更平衡；单个分片页数有上限，控制内存占用
+    shard_count = max(workers * 4, -(-len(pages) // MAX_SHARD_PAGES))
+    shards = deque(pages[start:stop] for start, stop in _split_page_range(len(pages), shard_count))
+    profiler = conversion_profile.current()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 同时在途的分片数有上限，已完成但尚未消费的结果不会无限堆积；按提交顺序取结果保证页序
+        in_flight = deque()
+        while shards or in_flight:
+            while shards and len(in_flight) < workers * 2:
+                in_flight.append(executor.submit(_pdf_shard_items, source, shards.popleft(),
+                                                 profiler is not None))
+            shard_pages, shard_stats, shard_profile = in_flight.popleft().result()
+            if stats is not None:
+                merge_stats(stats, shard_stats)
+            if shard_profile is not None:
+                profiler.merge(shard_profile)
+            yield from shard_pages
+
+def pdf_page_fingerprints(doc):
+    """计算已打开的 PDF（fitz 文档）每一页的指纹：页面内容流、尺寸与旋转，以及页面引用的图片、字体、表单对象的内容。
+
+    只使用资源的名称与内容而不使用 xref 编号，文档重新保存导致对象重新编号时指纹保持不变。
+    """
+    fingerprints = []
+    stream_digests = {}  # xref -> 流内容哈希，同一图片被多页引用时只计算一次
+
+    def stream_digest(doc, xref):
+        if xref not in stream_digests:
+            try:
+                # 使用解压后的流内容，重新保存时改变压缩方式不影响指纹
+                stream_digests[xref] = hashlib.sha1(doc.xref_stream(xref) or b"").hexdigest()
+            except Exception:
+                stream_digests[xref] = ""
+        return stream_digests[xref]
+
+    for page in doc:
+        digest = hashlib.sha1()
+        digest.update(page.read_contents())
+        digest.update(repr((tuple(page.rect), page.rotation)).encode("utf-8"))
+        for img in page.get_images(full=True):
+            digest.update(repr(img[2:8]).encode("utf-8"))  # 尺寸、位深、色彩空间与资源名
+            digest.update(stream_digest(doc, img[0]).encode("ascii"))
+            if img[1]:  # 软蒙版
+                digest.update(stream_digest(doc, img[1]).encode("ascii"))
+        for font in page.get_fonts(full=True):
+            digest.update(repr(font[1:6]).encode("utf-8"))
+            digest.update(stream_digest(doc, font[0]).encode("ascii"))
+        for xobject in page.get_xobjects():
+            digest.update(repr((xobject[1], tuple(xobject[3]))).encode("utf-8"))
+            digest.update(stream_digest(doc, xobject[0]).encode("ascii"))
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+def pdf_to_markdown(pdf_path, output_dir=None, workers=1, stats=None, incremental=False):
+    """解析 PDF 文档并返回对应的 Markdown 文本字符串。图片保存到 output_dir（默认 output 文件夹）。
+
+    workers > 1 时按页切分为多个分片并用进程池并行解析，结果按页序合并，与串行输出逐字节一致。
+    传入 stats 字典时会累加表格预筛统计（table_pages_skipped 等）与图片去重统计（image_bytes_saved 等）。
+    incremental 为 True 时启用增量转换，只重新解析指纹变化的页面（见 iter_pdf_markdown）。
+    """
+    if output_dir is None:
+        output_dir = get_output_dir()
+    with _unit_cache(pdf_path, output_dir, incremental, stats) as units:
+        # 组合 Markdown 内容
+        return "\n\n".join(iter_pdf_markdown(pdf_path, output_dir, workers, stats, units=units))
+
+def iter_pdf_markdown(pdf_path, output_dir, workers=1, stats=None, image_files=None, units=None, indexer=None):
+    """逐页解析 PDF 并逐块产出 Markdown 文本，内存占用与文档总页数无关。
+
+    参数含义同 pdf_to_markdown；传入 image_files 列表时追加写入的图片文件名。
+    传入 unit_cache.UnitCache 时先计算每页指纹：指纹未变且所引用图片仍在的页面直接复用上次的
+    解析结果，只有其余页面被重新解析。
+    传入 search_index.DocumentIndexer 时同时把每页内容加入检索索引（以书签或推断出的标题作为所属标题）。
+    Markdown 由 PDF 后端产出的模型块渲染（见 _iter_pdf_model_pages），没有书签时包含推断出的标题。
+    """
+    # 图片文件名：{PDF 文件名（含扩展名）}_image{序号}.{扩展名}，序号来自内存计数，重复图片只写一次
+    images = ImageStore(output_dir, os.path.basename(pdf_path))
+    with _pdf_engine(pdf_path, stats) as engine:
+        if indexer is not None:
+            for _, title, section in _pdf_bookmarks(engine.doc) or []:
+                indexer.add_heading(section, title)
+        for page_index, blocks in _iter_pdf_model_pages(engine, pdf_path, images, workers, stats, units, output_dir):
+            if indexer is not None:
+                _index_pdf_page(blocks, indexer, page_index)
+            yield from iter_markdown(blocks)
+    conversion_profile.set_page(None)
+
+    if stats is not None:
+        merge_stats(stats, images.stats)
+    if image_files is not None:
+        image_files.extend(images.filenames)
+
+def _index_pdf_page(blocks, indexer, page_index):
+    """把一页的模型块加入检索索引：先登记该页的标题，再添加各块（图片除外）的 Markdown 文本。"""
+    for block in blocks:
+        if isinstance(block, Heading):
+            indexer.add_heading(page_index, block.text)
+    for block in blocks:
+        if not isinstance(block, Image):
+            markdown = block_markdown(block)
+            if markdown is not None:
+                indexer.add(page_index, markdown, page_index + 1)
+
+def _iter_pdf_model_pages(engine, source, images, workers=1, stats=None, units=None, output_dir=None,
+                          progress=None, cancelled=None, infer_headings=True):
+    """逐页产出 (页序号, 该页的模型块列表)，PDF 后端与 Markdown 导出共用。
+
+    engine 为已打开的解析引擎（source 为其文件路径或 PDF 字节，供并行的工作进程打开）；
+    图片交给 images 命名与保存。PDF 没有书签时先推断全文档的标题（_infer_pdf_headings），
+    各页文本在标题处切分为标题块与段落块。
+    progress 不为 None 时以已完成的页数调用，没有书签时先计入扫描的页数、再计入解析的页数
+    （总数为页数的两倍，见 PdfBackend.scan）；cancelled 为无参函数，在扫描中返回 True 时不再产出任何页面。
+    infer_headings 为 False 时不推断标题，每页文本保持为一个段落块。
+    传入 units 时复用指纹未变、所引用图片仍在 output_dir 中的页面；记录的是切分标题之前的块与各页的
+    行统计，文档其他页变化导致标题级别改变时仍可复用，复用的页面也不必重新扫描。
+    """
+    outline = infer_headings and _infers_outline(_pdf_bookmarks(engine.doc))
+    # 解析阶段的进度接在扫描阶段之后
+    offset = len(engine) if outline else 0
+    if units is None:
+        headings = {}
+        if outline:
+            inferred = _infer_pdf_headings(engine.doc, None, progress, cancelled)
+            if inferred is None:
+                return
+            headings = inferred[0]
+        for page_index, page_items in enumerate(_iter_pdf_page_items(engine, source, workers, stats)):
+            conversion_profile.set_page(page_index + 1)  # 图片与 Markdown 的写入计入该页
+            blocks = list(_pdf_page_blocks(page_index, page_items, images))
+            yield page_index, _split_pdf_headings(page_index, blocks, headings.get(page_index))
+            if progress is not None:
+                progress(offset + page_index + 1)
+        return
+
+    with conversion_profile.stage("fingerprint"):
+        fingerprints = pdf_page_fingerprints(engine.doc)
+    reused = set()
+    for page_index, fingerprint in enumerate(fingerprints):
+        if fingerprint in units and all(os.path.exists(os.path.join(output_dir, name))
+                                        for name, _ in units.images(fingerprint)) \
+                and (not outline or units.extra(fingerprint) is not None):
+            reused.add(page_index)
+    # 先登记上次转换的图片：内容未变的图片沿用原文件名，新图片不会占用已有序号
+    for name, digest in units.all_images():
+        images.remember(name, digest)
+    for page_index in sorted(reused):
+        for name, digest in units.images(fingerprints[page_index]):
+            images.reserve(name, digest)
+    headings, page_lines = {}, {}
+    if outline:
+        inferred = _infer_pdf_headings(
+            engine.doc, {page_index: units.extra(fingerprints[page_index])["lines"] for page_index in reused},
+            progress, cancelled)
+        if inferred is None:
+            return
+        headings, page_lines = inferred
+    fresh = [i for i in range(len(fingerprints)) if i not in reused]
+    fresh_items = _iter_pdf_page_items(engine, source, workers, stats, fresh)
+    try:
+        for page_index, fingerprint in enumerate(fingerprints):
+            conversion_profile.set_page(page_index + 1)
+            if page_index in reused:
+                blocks = [document_model.block_from_list(data) for data in units.blocks(fingerprint)]
+                page_images = units.images(fingerprint)
+            else:
+                page_images = []
+                blocks = list(_pdf_page_blocks(page_index, next(fresh_items), images, page_images))
+            extra = None
+            if outline:
+                lines = page_lines.pop(page_index)
+                extra = {"lines": lines if isinstance(lines, list) else lines.tolist()}
+            units.record(fingerprint, [document_model.block_to_list(block) for block in blocks], page_images,
+                         reused=page_index in reused, extra=extra)
+            yield page_index, _split_pdf_headings(page_index, blocks, headings.get(page_index))
+            if progress is not None:
+                progress(offset + page_index + 1)
+    finally:
+        fresh_items.close()
+
+def _pdf_page_blocks(page_index, page_items, images, page_images=None):
+    """将一页的条目转换为模型块（节号为页序号）；传入 page_images 列表时追加该页引用的 [图片文件名, 内容哈希]。"""
+    page_number = page_index + 1
+    for item in page_items:
+        if item[0] == "text":
+            yield Paragraph(item[1], page_index, page_number)
+        elif item[0] == "table":
+            yield Table(item[1], page_index, page_number)
+        else:
+            _, image_bytes, img_ext, xref = item
+            image_filename = images.add(image_bytes, img_ext, xref)
+            if page_images is not None:
+                page_images.append([image_filename, images.digest(image_filename)])
+            yield Image(image_filename, page_index, page_number)
+
+def _infer_pdf_headings(fitz_doc, known_lines=None, progress=None, cancelled=None):
+    """按字体统计推断全文档的标题，返回 ({页序号: [(级别, 起始偏移, 结束偏移)]}, {页序号: 行统计})。
+
+    先快速扫描一遍各页，只提取文本行统计（不提取表格与图片）；known_lines 为已知的 {页序号: 行统计}
+    （增量转换复用的页面），这些页面不再扫描。progress 不为 None 时每扫描一页以已扫描的页数调用；
+    cancelled 为无参函数，扫描每一页之前检查，返回 True 时停止扫描并返回 None。
+    """
+    page_lines = dict(known_lines or {})
+    headings = {}
+    with conversion_profile.stage("pdf_outline"):
+        for page_index in range(fitz_doc.page_count):
+            if cancelled is not None and cancelled():
+                return None
+            if page_index not in page_lines:
+                page_lines[page_index] = pdf_headings.page_text_lines(fitz_doc[page_index])[1]
+            if progress is not None:
+                progress(page_index + 1)
+        ordered = [page_lines[page_index] for page_index in range(fitz_doc.page_count)]
+        for level, page_index, start, end in pdf_headings.infer_headings(ordered):
+            headings.setdefault(page_index, []).append((level, start, end))
+    return headings, page_lines
+
+def _split_pdf_headings(page_index, blocks, page_headings):
+    """把一页的页面文本块（有标题的页面第一个块必为页面文本）在推断出的标题处切分为标题块与段落块。"""
+    if not page_headings:
+        return blocks
+    return list(_pdf_text_blocks(page_index, blocks[0].text, page_headings)) + blocks[1:]
+
+def _pdf_text_blocks(page_index, text, page_headings):
+    """按推断出的标题切分一页文本，产出标题块与段落块。"""
+    page_number = page_index + 1
+    for level, part in pdf_headings.split_page_text(text, page_headings):
+        if level is None:
+            yield Paragraph(part, page_index, page_number)
+        else:
+            yield Heading(level, part, page_index, page_number)
+
+class PdfBackend:
+    """PDF 的模型后端（document_model）：逐页产出页面文本、表格与图片，节号为页序号。
+
+    目录来自书签；没有书签时先快速扫描各页的文本行统计推断标题，再逐页产出，
+    页面文本在标题处切分为标题块与段落块。扫描期间同样报告进度，并可通过 cancelled 取消。
+    infer_headings 为 False 时不推断标题，每页文本始终是一个段落块（pdf_parser 保持每页一段文本）。
+    """
+    kind = "pdf"
+
+    def __init__(self, infer_headings=True):
+        self.infer_headings = infer_headings
+
+    def scan(self, source):
+        """读取书签目录与进度单位总数：进度单位为页，没有书签（需要推断标题）时为扫描与解析的页数之和。"""
+        with _open_pdf(source) as fitz_doc:
+            bookmarks = _pdf_bookmarks(fitz_doc)
+            scans = self.infer_headings and _infers_outline(bookmarks)
+            return bookmarks, fitz_doc.page_count * (2 if scans else 1)
+
+    def iter_blocks(self, source, images, workers=1, stats=None, progress=None, cancelled=None):
+        with _pdf_engine(source, stats) as engine:
+            for _, blocks in _iter_pdf_model_pages(engine, source, images, workers, stats,
+                                                   progress=progress, cancelled=cancelled,
+                                                   infer_headings=self.infer_headings):
+                yield from blocks
+        conversion_profile.set_page(None)
+
+@contextmanager
+def _unit_cache(file_path, output_dir, incremental, stats=None):
+    """incremental 为 True 时打开文档的指纹文件（UnitCache），否则返回 None；结束后累加复用统计。"""
+    if not incremental:
+        yield None
+        return
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    header = {"converter": "doc_parser", "version": CONVERTER_VERSION,
+              "kind": os.path.splitext(file_path)[1].lower()}
+    with UnitCache(units_path(output_dir, base_name), header) as units:
+        yield units
+    if stats is not None:
+        merge_stats(stats, units.stats)
+
+def write_markdown_blocks(md_path, blocks):
+    """将 Markdown 块逐个写入文件，块之间以空行分隔（结果与 "\\n\\n".join(blocks) 相同）。
+
+    写入过程中出错时不会留下写了一半的 .md 文件。
+    """
+    with MarkdownBlockWriter(md_path) as writer:
+        for block in blocks:
+            writer.write(block)
+
+def parse_document(file_path, output_dir=None, workers=1, stats=None, cache=None, incremental=False,
+                   profile=False, search_index=None):
+    """解析给定的文件（Word 或 PDF），生成 Markdown 文件并返回其路径。
+
+    output_dir 为 Markdown 与图片的输出目录，默认使用 get_output_dir()；
+    workers 为 PDF 按页并行解析的进程数（1 表示串行）；stats 字典用于收集转换统计信息；
+    cache 为 conversion_cache.ConversionCache 实例，文件内容未变时直接从缓存还原结果；
+    incremental 为 True 时在输出目录中保存每页/每个正文块的指纹，再次转换时只重新解析变化的部分，
+    复用的单元数累加到 stats 的 units_reused（总数为 units_total）；
+    profile 为 True 时按阶段、按页统计耗时、调用次数、写入字节数与峰值内存增长，
+    并在 Markdown 旁写出 JSON 报告 "{文档名}.profile.json"（见 conversion_profile）；
+    search_index 为 search_index.SearchIndex 实例，文档自上次建立索引后有修改时同时更新其检索索引
+    （此时不从转换缓存还原，也不复用 Word 正文的增量结果，以便取得分节信息）。
+    """
+    if not profile:
+        return _parse_document(file_path, output_dir, workers, stats, cache, incremental, search_index)
+    if stats is None:
+        stats = {}
+    with conversion_profile.profiling() as profiler:
+        md_path = _parse_document(file_path, output_dir, workers, stats, cache, incremental, search_index)
+    profiler.write_report(conversion_profile.profile_path(md_path), file=file_path, markdown=md_path,
+                          workers=workers, incremental=incremental, stats=stats)
+    return md_path
+
+def _parse_document(file_path, output_dir, workers, stats, cache, incremental, search_index=None):
+    if output_dir is None:
+        output_dir = get_output_dir()
     else:
+        os.makedirs(output_dir, exist_ok=True)
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext not in [".doc", ".docx", ".pdf"]:
         raise ValueError("不支持的文件格式！")
 
-    # 将 Markdown 内容写入文件，文件名与输入文档同名（扩展名为.md）
-    output_dir = get_output_dir()
-    md_filename = os.path.splitext(os.path.basename(file_path))[0] + ".md"
-    md_path = os.path.join(output_dir, md_filename)
-    with open(md_path, "w", encoding="utf-8") as md_file:
-        md_file.write(md_content)
+    # Markdown 文件名与输入文档同名（扩展名为.md）
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    md_path = os.path.join(output_dir, base_name + ".md")
+    needs_index = search_index is not None and not search_index.is_current(file_path)
+    if cache is not None:
+        # 图片文件名以文档名为前缀，因此文档名也是缓存键的一部分
+        with conversion_profile.stage("cache_restore"):
+            cache_key = cache.make_key(file_path, CONVERTER_VERSION, {"converter": "doc_parser", "name": base_name})
+            hit = cache.restore(cache_key, md_path) is not None
+        if stats is not None:
+            merge_stats(stats, {"cache_hits": int(hit), "cache_misses": int(not hit)})
+        if hit and not needs_index:
+            return md_path
+
+    # 边解析边写入 Markdown 文件，不在内存中拼接整篇文档
+    image_files = []
+    indexer = search_index.document_writer(file_path, md_path) if needs_index else nullcontext()
+    with _unit_cache(file_path, output_dir, incremental, stats) as units, indexer:
+        indexer = indexer if needs_index else None
+        if file_ext == ".pdf":
+            blocks = iter_pdf_markdown(file_path, output_dir, workers, stats, image_files, units, indexer)
+        else:
+            blocks = iter_doc_markdown(file_path, output_dir, image_files, units, indexer)
+        write_markdown_blocks(md_path, blocks)
+    if cache is not None:
+        with conversion_profile.stage("cache_store"):
+            cache.store(cache_key, md_path, image_files)
     return md_path
 
 
 
+
+def convert_bytes(source, name, workers=1, stats=None):
+    """在内存中转换一个文档，返回 document_bundle.DocumentBundle（Markdown、目录、全文与图片）。
+
+    source 为文档字节或可读取的二进制文件对象；name 为文档文件名，用于判断格式（.pdf 或 .docx）
+    以及 Markdown 与图片的命名。PDF 由 fitz 直接从内存打开，Word 作为内存中的 zip 包读取，
+    整个过程不读写磁盘；需要落盘时调用 bundle.save(output_dir)，或用 write_zip/write_tar 打包输出。
+    workers 为 PDF 按页并行解析的进程数；stats 字典用于收集转换统计信息（也保存在 bundle.stats 中）。
+    文档先解析为 document_model.Document，各项结果都由它渲染；需要模型本身时直接调用 load_document。
+    """
+    if hasattr(source, "read"):
+        source = source.read()
+    # 每次上传的内容通常不同，不放入进程内的模型缓存，常驻服务的内存占用不随请求增长
+    doc = document_model.load_document(bytes(source), name, workers, stats, use_cache=False)
+    return doc.to_bundle()
@@ -0,0 +1,102 @@
+# document_bundle.py
+"""内存中的转换结果：Markdown、目录、全文与图片，可整体序列化为 zip/tar/JSON 或按需写盘。
+
+doc_parser.convert_bytes 返回 DocumentBundle，整个转换过程不读写磁盘。打包方法接受任意可写的二进制
+文件对象（包括不可定位的流，例如 HTTP 响应或管道），边生成边写出，不需要先在内存中拼出整个归档：
+    bundle = doc_parser.convert_bytes(data, "报告.pdf")
+    with open("报告.zip", "wb") as f:
+        bundle.write_zip(f)
+    bundle.write_tar(sys.stdout.buffer, compression="gz")
+"""
+import base64
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+from markdown_writer import MarkdownBlockWriter
+
+BUNDLE_FORMATS = ("zip", "tar", "tar.gz")
+
+
+class DocumentBundle:
+    """一个文档的全部转换结果。
+
+    name       文档名（不含扩展名），Markdown 的文件名为 name + ".md"
+    markdown   Markdown 文本，图片以文件名引用 images 中的条目（与 Markdown 放在同一目录即可显示）
+    outline    目录 [(级别, 标题, 节号)]，节号规则同 main_window（PDF 为从 0 开始的页序号，Word 为标题序号）
+    full_text  纯文本内容
+    images     {文件名: 图片字节}，按在文档中首次出现的顺序
+    stats      转换统计信息
+    """
+
+    def __init__(self, name, markdown, outline=None, full_text="", images=None, stats=None):
+        self.name = name
+        self.markdown = markdown
+        self.outline = outline or []
+        self.full_text = full_text
+        self.images = images or {}
+        self.stats = stats or {}
+
+    @property
+    def md_name(self):
+        return self.name + ".md"
+
+    def iter_files(self):
+        """按归档中的顺序产出 (文件名, 字节)：先 Markdown，后各图片。"""
+        yield self.md_name, self.markdown.encode("utf-8")
+        yield from self.images.items()
+
+    def write_zip(self, fileobj):
+        """把 Markdown 与图片写成 zip 包；fileobj 可以是不可定位的流。"""
+        with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as archive:
+            for file_name, data in self.iter_files():
+                archive.writestr(file_name, data)
+
+    def write_tar(self, fileobj, compression=""):
+        """把 Markdown 与图片以流模式写成 tar 包；compression 可为 ""、"gz"、"bz2" 或 "xz"。"""
+        mtime = time.time()
+        with tarfile.open(fileobj=fileobj, mode=f"w|{compression}") as archive:
+            for file_name, data in self.iter_files():
+                info = tarfile.TarInfo(file_name)
+                info.size = len(data)
+                info.mtime = mtime
+                archive.addfile(info, io.BytesIO(data))
+
+    def write(self, fileobj, fmt="zip"):
+        """按 fmt（BUNDLE_FORMATS 之一）打包写入 fileobj；fileobj 可以是不可定位的流。"""
+        if fmt not in BUNDLE_FORMATS:
+            raise ValueError(f"不支持的打包格式：{fmt}")
+        if fmt == "zip":
+            self.write_zip(fileobj)
+        else:
+            self.write_tar(fileobj, "gz" if fmt == "tar.gz" else "")
+
+    def to_bytes(self, fmt="zip"):
+        """返回打包后的字节，fmt 为 BUNDLE_FORMATS 之一。"""
+        buffer = io.BytesIO()
+        self.write(buffer, fmt)
+        return buffer.getvalue()
+
+    def as_dict(self):
+        """可直接序列化为 JSON 的字典，图片内容为 base64 字符串。"""
+        return {
+            "name": self.name,
+            "markdown": self.markdown,
+            "outline": [list(entry) for entry in self.outline],
+            "text": self.full_text,
+            "images": {file_name: base64.b64encode(data).decode("ascii") for file_name, data in self.images.items()},
+            "stats": self.stats,
+        }
+
+    def save(self, output_dir):
+        """把 Markdown 与图片写入 output_dir（不存在时创建），返回 Markdown 文件路径。"""
+        os.makedirs(output_dir, exist_ok=True)
+        for file_name, data in self.images.items():
+            with open(os.path.join(output_dir, file_name), "wb") as f:
+                f.write(data)
+        md_path = os.path.join(output_dir, self.md_name)
+        with MarkdownBlockWriter(md_path) as writer:
+            writer.write(self.markdown)
+        return md_path
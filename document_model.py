@@ -0,0 +1,274 @@
+# document_model.py
+"""解析一次、多处渲染的中间文档模型。
+
+每个文档只由对应格式的后端解析一次，得到按文档顺序排列的块列表；Markdown、纯文本、目录与 JSON
+都由渲染器从同一个模型生成，渲染结果缓存在 Document 上。图形界面、内存转换接口与各导出器共用这套模型，
+不再各自打开、遍历同一个文件。
+
+块类型（section 为节号，规则同 main_window：PDF 为从 0 开始的页序号，Word 为标题序号，第一个标题之前
+的内容为第 0 节；page 为从 1 开始的页码锚点，Word 文档没有页码，为 None）：
+    Heading(level, text, section, page)    标题，级别 1-9
+    Paragraph(text, section, page)         段落（PDF 为整页文本）
+    Table(rows, section, page)             表格，rows 为单元格文本列表组成的行列表，第一行作为表头
+    Image(name, section, page)             图片引用，name 为 Document.images 中的文件名
+
+后端按扩展名注册（register_backend），需要实现：
+    scan(source)          不解析正文，快速返回 (书签目录或 None, 进度单位总数)
+    iter_blocks(source, images, workers=1, stats=None, progress=None, cancelled=None)
+                          按文档顺序产出块；图片交给 images（image_store.ImageStore）命名与保存，
+                          progress 不为 None 时以已完成的进度单位数调用（包括尚未产出任何块的准备阶段）；
+                          cancelled 为无参函数，返回 True 时后端应尽快停止产出
+内置的 PDF 与 Word 后端定义在 doc_parser 中，首次使用时才导入。
+
+用法示例：
+    doc = document_model.load_document("报告.pdf")
+    doc.render("markdown"); doc.render("text"); doc.render("outline"); doc.render("json")
+"""
+import hashlib
+import importlib
+import json
+import os
+from collections import OrderedDict, namedtuple
+
+from document_bundle import DocumentBundle
+from image_store import ImageStore
+
+Heading = namedtuple("Heading", "level text section page")
+Paragraph = namedtuple("Paragraph", "text section page")
+Table = namedtuple("Table", "rows section page")
+Image = namedtuple("Image", "name section page")
+
+_BLOCK_TYPES = {Heading: "heading", Paragraph: "paragraph", Table: "table", Image: "image"}
+_BLOCK_CLASSES = {name: cls for cls, name in _BLOCK_TYPES.items()}
+
+
+def block_to_list(block):
+    """块的可 JSON 序列化形式：[类型名, 各字段...]，例如 ["paragraph", 文本, 节号, 页码]。"""
+    return [_BLOCK_TYPES[type(block)], *block]
+
+
+def block_from_list(data):
+    """由 block_to_list 的结果还原块。"""
+    return _BLOCK_CLASSES[data[0]](*data[1:])
+
+# 扩展名 -> 后端实例，或 "模块:类名"（首次使用时导入并实例化，避免与 doc_parser 循环导入）
+_backends = {
+    ".pdf": "doc_parser:PdfBackend",
+    ".docx": "doc_parser:DocxBackend",
+    ".doc": "doc_parser:DocxBackend",
+}
+# 进程内缓存的已解析文档数
+MODEL_CACHE_SIZE = 8
+_model_cache = OrderedDict()
+
+
+def register_backend(extensions, backend):
+    """为一个或多个扩展名（如 ".pdf"）注册后端；backend 为后端实例或 "模块:类名"。"""
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    for ext in extensions:
+        _backends[ext.lower()] = backend
+    _model_cache.clear()
+
+
+def get_backend(name):
+    """按文件名的扩展名返回后端；不支持的格式抛出 ValueError。"""
+    ext = os.path.splitext(name)[1].lower()
+    backend = _backends.get(ext)
+    if backend is None:
+        raise ValueError("不支持的文件格式！")
+    if isinstance(backend, str):
+        module_name, class_name = backend.split(":")
+        backend = _backends[ext] = getattr(importlib.import_module(module_name), class_name)()
+    return backend
+
+
+def load_document(source, name=None, workers=1, stats=None, use_cache=True):
+    """解析一个文档并返回 Document；图片保存在内存中（Document.images）。
+
+    source 为文件路径、文档字节或二进制文件对象；后两者需要通过 name 给出文件名（用于判断格式与命名图片）。
+    use_cache 为 True 时在进程内缓存最近解析的 MODEL_CACHE_SIZE 个文档：同一文件（路径、大小与修改时间相同）
+    或同一内容再次加载时直接返回已有的 Document，连同其已缓存的渲染结果。
+    workers 为 PDF 按页并行解析的进程数；stats 字典用于收集转换统计信息。
+    """
+    if hasattr(source, "read"):
+        source = source.read()
+    if not isinstance(source, (str, os.PathLike)):
+        source = bytes(source)
+        if name is None:
+            raise ValueError("从内存加载文档时必须给出文件名")
+    elif name is None:
+        name = os.path.basename(source)
+    backend = get_backend(name)
+    key = _model_key(source, name) if use_cache else None
+    if key is not None and key in _model_cache:
+        _model_cache.move_to_end(key)
+        return _model_cache[key]
+
+    base_name = os.path.splitext(os.path.basename(name))[0]
+    if stats is None:
+        stats = {}
+    images = ImageStore(None, os.path.basename(name))
+    bookmarks, _ = backend.scan(source)
+    blocks = list(backend.iter_blocks(source, images, workers, stats))
+    for key_name, value in images.stats.items():
+        stats[key_name] = stats.get(key_name, 0) + value
+    doc = Document(base_name, backend.kind, blocks, images.images, bookmarks, stats)
+    if key is not None:
+        _model_cache[key] = doc
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return doc
+
+
+def _model_key(source, name):
+    if isinstance(source, bytes):
+        return ("bytes", name, hashlib.sha1(source).hexdigest())
+    try:
+        st = os.stat(source)
+    except OSError:
+        return None
+    return ("path", os.path.normcase(os.path.abspath(source)), name, st.st_size, st.st_mtime_ns)
+
+
+class Document:
+    """一个文档的中间模型。
+
+    name       文档名（不含扩展名）
+    kind       后端类型（"pdf" 或 "docx"）
+    blocks     按文档顺序排列的块列表
+    images     {文件名: 图片字节}；图片直接写到磁盘的流式解析中为空
+    bookmarks  文档自带的书签目录 [(级别, 标题, 节号)]，没有时为 None，此时以标题块作为目录
+    stats      转换统计信息
+    """
+
+    def __init__(self, name, kind, blocks, images=None, bookmarks=None, stats=None):
+        self.name = name
+        self.kind = kind
+        self.blocks = blocks
+        self.images = images or {}
+        self.bookmarks = bookmarks
+        self.stats = stats or {}
+        self._rendered = {}
+
+    def render(self, fmt, **options):
+        """用 RENDERERS 中名为 fmt 的渲染器渲染文档；同一格式与选项的结果只计算一次。"""
+        key = (fmt, tuple(sorted(options.items())))
+        try:
+            return self._rendered[key]
+        except KeyError:
+            pass
+        try:
+            renderer = RENDERERS[fmt]
+        except KeyError:
+            raise ValueError(f"不支持的渲染格式：{fmt}") from None
+        result = self._rendered[key] = renderer(self, **options)
+        return result
+
+    @property
+    def markdown(self):
+        return self.render("markdown")
+
+    @property
+    def text(self):
+        return self.render("text")
+
+    @property
+    def outline(self):
+        return self.render("outline")
+
+    def as_dict(self):
+        """可 JSON 序列化的模型（不含图片内容）；Document.from_dict 可据此还原。"""
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "bookmarks": [list(entry) for entry in self.bookmarks] if self.bookmarks is not None else None,
+            "blocks": [block_to_list(block) for block in self.blocks],
+            "images": list(self.images),
+        }
+
+    @classmethod
+    def from_dict(cls, data, images=None):
+        """从 as_dict 的结果还原模型；images 为图片内容（可省略）。"""
+        blocks = [block_from_list(entry) for entry in data["blocks"]]
+        bookmarks = data.get("bookmarks")
+        if bookmarks is not None:
+            bookmarks = [tuple(entry) for entry in bookmarks]
+        return cls(data["name"], data["kind"], blocks, images, bookmarks)
+
+    def to_bundle(self):
+        """转换为 document_bundle.DocumentBundle（Markdown、目录、全文与图片）。"""
+        return DocumentBundle(self.name, self.markdown, self.outline, self.text, self.images, self.stats)
+
+
+# --- 渲染器 ------------------------------------------------------------------------------
+def table_markdown_lines(rows):
+    """将表格行转换为 Markdown 表格的各行文本（第一行作为表头）；空表格返回空列表。"""
+    if not rows:
+        return []
+    header = rows[0]
+    lines = ['|' + '|'.join(header) + '|', '|' + '|'.join(['---'] * len(header)) + '|']
+    for row in rows[1:]:
+        lines.append('|' + '|'.join(row) + '|')
+    return lines
+
+
+def block_markdown(block, image_prefix=""):
+    """单个块的 Markdown 文本，没有内容（空表格）时返回 None；image_prefix 为图片引用路径的前缀。"""
+    if isinstance(block, Paragraph):
+        return block.text
+    if isinstance(block, Heading):
+        return "#" * block.level + " " + block.text
+    if isinstance(block, Table):
+        return "\n".join(table_markdown_lines(block.rows)) or None
+    return f"![{block.name}]({image_prefix}{block.name})"
+
+
+def iter_markdown(blocks, image_prefix=""):
+    """逐块产出 Markdown 文本（块之间以空行分隔）。"""
+    for block in blocks:
+        markdown = block_markdown(block, image_prefix)
+        if markdown is not None:
+            yield markdown
+
+
+def block_text(block, kind=None):
+    """单个块的纯文本，没有文本（图片）时返回 None。
+
+    PDF 的页面文本已经包含表格中的文字，kind 为 "pdf" 时表格不再重复输出。
+    """
+    if isinstance(block, (Paragraph, Heading)):
+        return block.text
+    if isinstance(block, Table) and kind != "pdf":
+        return "\n".join("\t".join(row) for row in block.rows) or None
+    return None
+
+
+def render_markdown(doc, image_prefix=""):
+    return "\n\n".join(iter_markdown(doc.blocks, image_prefix))
+
+
+def render_text(doc):
+    texts = (block_text(block, doc.kind) for block in doc.blocks)
+    return "\n".join(text for text in texts if text is not None)
+
+
+def render_outline(doc):
+    """目录 [(级别, 标题, 节号)]：有书签时使用书签，否则使用标题块。"""
+    if doc.bookmarks is not None:
+        return list(doc.bookmarks)
+    return [(block.level, block.text, block.section) for block in doc.blocks if isinstance(block, Heading)]
+
+
+def render_json(doc, indent=None):
+    data = doc.as_dict()
+    data["outline"] = [list(entry) for entry in doc.outline]
+    return json.dumps(data, ensure_ascii=False, indent=indent)
+
+
+RENDERERS = {
+    "markdown": render_markdown,
+    "text": render_text,
+    "outline": render_outline,
+    "json": render_json,
+}
@@ -0,0 +1,276 @@
+# docx_stream.py
+"""流式 Word 读取器：直接从 zip 中增量解析 word/document.xml，不构建 python-docx 的完整对象树。
+
+段落文本、标题级别、表格行的规则都与 python-docx 一致（包括 gridSpan 横向合并与 vMerge 纵向合并的
+单元格），正文中每个段落或表格处理完后立即从内存中释放，内存占用与文档大小无关。适合上百 MB 的大型报告。
+
+按文档顺序产出的块事件：
+    ("paragraph", 文本, 标题级别)   标题级别为 1-9，非标题段落为 None；文本为原始文本（未去除空白）
+    ("table", 行列表)               每行是单元格文本（已去除首尾空白）的列表，合并单元格按
+                                    python-docx 的 row.cells 规则在其覆盖的每一列重复出现
+"""
+import hashlib
+import posixpath
+import zipfile
+
+from docx.oxml.ns import qn
+from docx.styles import BabelFish
+from lxml import etree
+
+_RT_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_RT_STYLES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+_RT_IMAGE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+_REL_TAG = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+_BODY = qn('w:body')
+_P = qn('w:p')
+_TBL = qn('w:tbl')
+_TR = qn('w:tr')
+_TC = qn('w:tc')
+_R = qn('w:r')
+_HYPERLINK = qn('w:hyperlink')
+_VAL = qn('w:val')
+_TYPE = qn('w:type')
+_STYLE = qn('w:style')
+_STYLE_ID = qn('w:styleId')
+_DEFAULT = qn('w:default')
+_NAME = qn('w:name')
+
+# 与 python-docx 的 Run.text 一致：这些 run 子元素对应的文本（w:t 取其文本内容，w:br 视类型而定）
+_RUN_TEXT = {qn('w:tab'): '\t', qn('w:ptab'): '\t', qn('w:cr'): '\n', qn('w:noBreakHyphen'): '-'}
+_T = qn('w:t')
+_BR = qn('w:br')
+_P_STYLE_PATH = f"{qn('w:pPr')}/{qn('w:pStyle')}"
+
+# 样式名 -> 标题级别（None 表示不是标题样式）
+_heading_levels = {}
+
+
+def heading_level(style_name):
+    """根据样式名识别标题级别（支持英文 "Heading X" 与中文 "标题 X"），结果按样式名缓存。"""
+    try:
+        return _heading_levels[style_name]
+    except KeyError:
+        pass
+    level = None
+    lowered = style_name.lower()
+    for lvl in range(1, 10):
+        if lowered.startswith(f'heading {lvl}') or style_name == f'标题 {lvl}':
+            level = lvl
+            break
+    _heading_levels[style_name] = level
+    return level
+
+
+def _run_text(r):
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == _T:
+            parts.append(child.text or '')
+        elif tag == _BR:
+            # 只有换行符（默认类型 textWrapping）对应 "\n"，分页符与分栏符不产生文本
+            if child.get(_TYPE, 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        else:
+            text = _RUN_TEXT.get(tag)
+            if text is not None:
+                parts.append(text)
+    return ''.join(parts)
+
+
+def _paragraph_text(p):
+    """段落文本，规则同 python-docx 的 Paragraph.text（只取直接子元素 w:r 与 w:hyperlink 中的 run）。"""
+    parts = []
+    for child in p:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            parts.extend(_run_text(r) for r in child.iterchildren(_R))
+    return ''.join(parts)
+
+
+def _paragraph_style_id(p):
+    pStyle = p.find(_P_STYLE_PATH)
+    return pStyle.get(_VAL) if pStyle is not None else None
+
+
+def _int_val(element, path, default):
+    child = element.find(path)
+    if child is None:
+        return default
+    try:
+        return int(child.get(_VAL))
+    except (TypeError, ValueError):
+        return default
+
+
+def _table_rows(tbl):
+    """表格各行的单元格文本，合并单元格的处理与 python-docx 的 row.cells 相同：
+    gridSpan 横跨几列就重复几次，vMerge="continue" 的单元格取其上方起始单元格的文本。"""
+    rows = []
+    above = {}  # 上一行：网格列偏移 -> (单元格文本, 跨列数)
+    grid_span_path = f"{qn('w:tcPr')}/{qn('w:gridSpan')}"
+    v_merge_path = f"{qn('w:tcPr')}/{qn('w:vMerge')}"
+    grid_before_path = f"{qn('w:trPr')}/{qn('w:gridBefore')}"
+    for tr in tbl.iterchildren(_TR):
+        cells = []
+        current = {}
+        offset = _int_val(tr, grid_before_path, 0)
+        for tc in tr.iterchildren(_TC):
+            span = _int_val(tc, grid_span_path, 1)
+            v_merge = tc.find(v_merge_path)
+            if v_merge is not None and v_merge.get(_VAL, 'continue') == 'continue':
+                text, shown = above.get(offset, ('', span))
+            else:
+                text = '\n'.join(_paragraph_text(p) for p in tc.iterchildren(_P)).strip()
+                shown = span
+            cells.extend([text] * shown)
+            current[offset] = (text, shown)
+            offset += span
+        rows.append(cells)
+        above = current
+    return rows
+
+
+class DocxStreamReader:
+    """以流式方式读取 .docx 的正文块与图片。
+
+    docx_path 可以是文件路径，也可以是二进制文件对象（例如 io.BytesIO）。
+    """
+
+    def __init__(self, docx_path):
+        self.archive = zipfile.ZipFile(docx_path)
+        self.document_part = self._office_document_part()
+        self._rels = self._read_rels(self.document_part)
+        self._style_levels = None
+        self._body_stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.archive.close()
+
+    # --- 包结构 -------------------------------------------------------------------------
+    def _office_document_part(self):
+        for rel in self._read_rels('').values():
+            if rel[0] == _RT_OFFICE_DOCUMENT:
+                return rel[1]
+        return 'word/document.xml'
+
+    def _read_rels(self, part_name):
+        """读取部件的关系，返回 rId -> (关系类型, 目标部件名或外部地址, 是否外部)，保持文件中的顺序。"""
+        rels_name = posixpath.join(posixpath.dirname(part_name), '_rels',
+                                   posixpath.basename(part_name) + '.rels')
+        try:
+            root = etree.fromstring(self.archive.read(rels_name))
+        except KeyError:
+            return {}
+        base_dir = posixpath.dirname(part_name)
+        rels = {}
+        for rel in root.iterchildren(_REL_TAG):
+            target = rel.get('Target', '')
+            external = rel.get('TargetMode') == 'External'
+            if not external:
+                if target.startswith('/'):
+                    target = target[1:]
+                else:
+                    target = posixpath.normpath(posixpath.join(base_dir, target))
+            rels[rel.get('Id')] = (rel.get('Type'), target, external)
+        return rels
+
+    # --- 样式 -----------------------------------------------------------------------------
+    def _load_style_levels(self):
+        """读取 styles.xml，得到段落样式 ID -> 标题级别 的映射以及默认段落样式的标题级别。"""
+        levels = {}
+        default_level = None
+        target = next((target for rel_type, target, external in self._rels.values()
+                       if rel_type == _RT_STYLES and not external), None)
+        try:
+            root = etree.fromstring(self.archive.read(target)) if target else None
+        except KeyError:
+            root = None
+        if root is None:
+            return levels, default_level
+        for style in root.iterchildren(_STYLE):
+            if style.get(_TYPE, 'paragraph') != 'paragraph':
+                continue
+            name = style.find(_NAME)
+            name = name.get(_VAL) if name is not None else None
+            level = heading_level(BabelFish.internal2ui(name)) if name else None
+            levels.setdefault(style.get(_STYLE_ID), level)  # 样式 ID 重复时以第一个为准
+            if style.get(_DEFAULT) in ('1', 'true', 'on'):
+                default_level = level  # 有多个默认样式时以最后一个为准
+        return levels, default_level
+
+    def _heading_level(self, style_id):
+        if self._style_levels is None:
+            self._style_levels = self._load_style_levels()
+        levels, default_level = self._style_levels
+        # 与 python-docx 一致：未指定样式或样式不存在时使用默认段落样式
+        return levels.get(style_id, default_level) if style_id is not None else default_level
+
+    # --- 正文 -----------------------------------------------------------------------------
+    def iter_blocks(self):
+        """按文档顺序产出段落与表格块事件（格式见模块说明）。"""
+        for element in self.iter_block_elements():
+            yield self.block_event(element)
+
+    def iter_block_elements(self):
+        """按文档顺序产出正文中的 w:p 与 w:tbl 元素。
+
+        调用方在取下一个元素之前处理完当前元素；已处理的元素随后即被释放，
+        保证内存占用不随文档增长。
+        """
+        with self.archive.open(self.document_part) as stream:
+            self._body_stream = stream
+            context = etree.iterparse(stream, events=("end",), tag=(_P, _TBL), huge_tree=True)
+            for _, element in context:
+                parent = element.getparent()
+                if parent is None or parent.tag != _BODY:
+                    continue  # 表格单元格内的段落由所在表格统一处理
+                yield element
+                # 释放已处理的元素及其之前的兄弟节点
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    def body_size(self):
+        """正文部件解压后的字节数（用作进度总数）。"""
+        return self.archive.getinfo(self.document_part).file_size
+
+    def body_position(self):
+        """正文部件已读取的字节数（解析进度），尚未开始或已读完时分别为 0 与 body_size()。"""
+        stream = self._body_stream
+        if stream is None:
+            return 0
+        return self.body_size() if stream.closed else stream.tell()
+
+    def block_event(self, element):
+        """将 iter_block_elements 产出的元素转换为块事件。"""
+        if element.tag == _TBL:
+            return ("table", _table_rows(element))
+        return ("paragraph", _paragraph_text(element), self._heading_level(_paragraph_style_id(element)))
+
+    def iter_images(self):
+        """按关系顺序产出正文引用的图片 (部件名, 图片字节)，与 python-docx 的 doc.part.rels 顺序一致。"""
+        for part_name in self.iter_image_parts():
+            yield part_name, self.read_part(part_name)
+
+    def iter_image_parts(self):
+        """按关系顺序产出正文引用的图片部件名。"""
+        for rel_type, target, external in self._rels.values():
+            if rel_type == _RT_IMAGE and not external:
+                yield target
+
+    def read_part(self, part_name):
+        return self.archive.read(part_name)
+
+    def part_fingerprint(self, part_name):
+        """部件的指纹：取自 zip 目录中记录的 CRC32 与大小，无需解压部件内容。"""
+        info = self.archive.getinfo(part_name)
+        return hashlib.sha1(f"{part_name}:{info.CRC:08x}:{info.file_size}".encode("utf-8")).hexdigest()
@@ -1,6 +1,6 @@
 # file_selector.py
 from PyQt5.QtWidgets import QMainWindow, QLabel, QLineEdit, QPushButton, QFileDialog, QHBoxLayout, QVBoxLayout, QWidget
-from main_window import MainWindow
+# main_window 依赖 fitz/docx 等解析库，推迟到打开主界面时才导入（通常此前已由后台线程预热，见 gui_startup）
 
 class FileSelectorWindow(QMainWindow):
     def __init__(self):
@@ -42,6 +42,7 @@ class FileSelectorWindow(QMainWindow):
     def open_main_window(self):
         if not self.selected_file:
             return
+        from main_window import MainWindow
         self.main_window = MainWindow(self.selected_file)
         self.main_window.show()
         self.close()
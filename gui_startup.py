@@ -0,0 +1,107 @@
+# gui_startup.py
+"""图形界面启动：后台预热解析库，以及启动耗时测量。
+
+文件选择窗口只依赖 PyQt5；fitz、docx、pdfplumber、PIL 与 main_window 在窗口显示之后由后台线程
+导入，用户浏览文件时即完成加载，点击“下一步”时不再等待。
+
+启动过程中的各个里程碑（相对 main.py 开始执行的时间，单位秒）：
+    process       进程创建到 main.py 开始执行（解释器启动；能获取进程创建时间时才有）
+    qt_imported   PyQt5 导入完成
+    selector_shown 文件选择窗口显示并处理完首批事件
+    parsers_warm  后台预热完成（解析库全部导入）
+运行 main.py --measure-startup 时程序在预热完成后输出上述数据（JSON）并退出，
+可配合 --startup-log 文件路径 逐行追加记录，用于跨版本跟踪启动耗时。
+"""
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+# 后台预热导入的模块（按主界面首次解析时的使用顺序）
+PREWARM_MODULES = ("fitz", "docx", "pdfplumber", "PIL.Image", "doc_parser", "main_window")
+
+
+def process_uptime():
+    """当前进程自创建以来经过的秒数；无法获取时返回 None。"""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/stat", "rb") as f:
+                # 进程名可能含空格，从最后一个右括号之后开始解析；第 22 个字段为启动时刻（时钟滴答）
+                fields = f.read().rsplit(b")", 1)[1].split()
+            start_ticks = int(fields[19])
+            with open("/proc/uptime", "rb") as f:
+                uptime = float(f.read().split()[0])
+            return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            creation, exit_time, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exit_time),
+                                                          ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+            # FILETIME 为自 1601-01-01 起的 100 纳秒数
+            created = ((creation.dwHighDateTime << 32) | creation.dwLowDateTime) / 1e7 - 11644473600
+            return time.time() - created
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    return None
+
+
+class StartupTimer:
+    """记录启动里程碑；可在任意线程中调用 mark。"""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        uptime = process_uptime()
+        # 进程创建到 start 之间的耗时（解释器启动、导入 main.py 之前的部分）
+        self.process_seconds = (uptime - (time.perf_counter() - self.start)) if uptime is not None else None
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.setdefault(name, time.perf_counter() - self.start)
+
+    def has(self, name):
+        with self._lock:
+            return name in self.marks
+
+    def report(self):
+        with self._lock:
+            marks = {name: round(seconds, 4) for name, seconds in self.marks.items()}
+        if self.process_seconds is not None:
+            marks["process"] = round(self.process_seconds, 4)
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "marks": marks,
+        }
+
+    def write_log(self, path):
+        """把本次启动的数据作为一行 JSON 追加到 path。"""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.report(), ensure_ascii=False) + "\n")
+
+
+def prewarm(modules=PREWARM_MODULES, timer=None):
+    """在后台守护线程中依次导入 modules，完成后记录 parsers_warm 里程碑；返回该线程。
+
+    某个模块导入失败时跳过它，等到真正使用时再在主线程中报错。
+    """
+    def run():
+        for module in modules:
+            try:
+                __import__(module)
+            except Exception:
+                pass
+        if timer is not None:
+            timer.mark("parsers_warm")
+
+    thread = threading.Thread(target=run, name="prewarm", daemon=True)
+    thread.start()
+    return thread
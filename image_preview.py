@@ -0,0 +1,298 @@
+# image_preview.py
+"""Lazy, downscaled image rendering for the Markdown preview pane.
+
+By default QTextEdit decodes every image referenced by the Markdown at full resolution as soon
+as it is laid out, and keeps all of them in the document's resource cache. For scanned PDFs with
+hundreds of large page images that costs a lot of memory and seconds of decoding.
+
+LazyImageHandler replaces Qt's image handler of an editor's document layout instead:
+  - layout only needs the size of each image, which is read from the file header;
+  - an image is decoded only when it is painted, i.e. when it is inside the viewport;
+  - decoding happens on a background thread pool, directly at thumbnail size
+    (QImageReader.setScaledSize), and a placeholder is drawn until the thumbnail is ready;
+  - thumbnails are kept in a ThumbnailCache, an LRU bounded by the memory of the decoded
+    images, optionally backed by a directory of thumbnail files so that reopening a
+    document does not decode the originals again.
+"""
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+from PyQt5.QtCore import QCoreApplication, QObject, QRunnable, QSize, QSizeF, QThreadPool, QUrl, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QImageReader, QPainter, QTextFormat, QTextObjectInterface
+
+# Largest width of a thumbnail in pixels (images are never shown wider than the pane anyway)
+THUMBNAIL_WIDTH = 480
+# Memory used by decoded thumbnails before the least recently shown ones are dropped
+MEMORY_BYTES = 64 * 1024 * 1024
+# Size of the on-disk thumbnail cache before the oldest files are removed
+DISK_BYTES = 256 * 1024 * 1024
+# Number of background threads decoding images
+DECODE_THREADS = 2
+# Size of the box drawn for images that cannot be read
+PLACEHOLDER_SIZE = QSize(16, 16)
+# Bumped whenever the way thumbnails are generated changes (invalidates the disk cache)
+THUMBNAIL_VERSION = 1
+
+
+class ThumbnailCache(QObject):
+    """Downscaled images by file path, decoded in the background and kept in a memory-bounded LRU.
+
+    Entries are keyed by path, size and modification time of the original file, so a file that
+    is rewritten (e.g. when a document is converted again) gets a fresh thumbnail.
+    """
+
+    ready = pyqtSignal(str)   # path whose thumbnail became available
+
+    def __init__(self, disk_dir=None, max_bytes=MEMORY_BYTES, max_width=THUMBNAIL_WIDTH,
+                 disk_bytes=DISK_BYTES, parent=None):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self.max_width = max_width
+        self.disk_dir = disk_dir
+        self._images = OrderedDict()   # key -> QImage, least recently used first
+        self._bytes = 0
+        self._sizes = {}               # key -> full-resolution size read from the header
+        self._pending = set()
+        self._failed = set()
+        self._priority = 0
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(DECODE_THREADS)
+        self._signals = _JobSignals()
+        self._signals.loaded.connect(self._on_loaded)
+        app = QCoreApplication.instance()
+        if app is not None:
+            # Do not make the application wait at exit for thumbnails nobody will see
+            app.aboutToQuit.connect(self._pool.clear)
+        if disk_dir is not None:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+                self._prune_disk(disk_bytes)
+            except OSError:
+                self.disk_dir = None   # e.g. a read-only output folder: keep thumbnails in memory only
+
+    @staticmethod
+    def _key(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return path, st.st_size, st.st_mtime_ns
+
+    def display_size(self, path):
+        """Size the image at path is shown with (at most max_width wide), or None if it cannot be read."""
+        key = self._key(path)
+        if key is None:
+            return None
+        size = self._sizes.get(key)
+        if size is None:
+            size = self._sizes[key] = QImageReader(path).size()
+        if not size.isValid() or size.isEmpty():
+            return None
+        return self._fit(size)
+
+    def _fit(self, size):
+        if size.width() <= self.max_width:
+            return QSize(size)
+        return size.scaled(self.max_width, size.height(), Qt.KeepAspectRatio)
+
+    def get(self, path):
+        """The thumbnail of path if it is ready; otherwise schedules decoding and returns None."""
+        key = self._key(path)
+        if key is None:
+            return None
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image
+        if key not in self._pending and key not in self._failed:
+            self._pending.add(key)
+            # Most recently requested images first: after fast scrolling only what is now
+            # in the viewport matters
+            self._priority += 1
+            self._pool.start(_ThumbnailJob(self._signals, key, self.max_width, self.disk_dir), self._priority)
+        return None
+
+    def clear(self):
+        """Drop all thumbnails held in memory (the disk cache is kept)."""
+        self._images.clear()
+        self._bytes = 0
+        self._sizes.clear()
+        self._failed.clear()
+
+    def _on_loaded(self, key, image):
+        self._pending.discard(key)
+        if image.isNull():
+            self._failed.add(key)
+            return
+        self._images[key] = image
+        self._bytes += image.sizeInBytes()
+        while self._bytes > self.max_bytes and len(self._images) > 1:
+            _, dropped = self._images.popitem(last=False)
+            self._bytes -= dropped.sizeInBytes()
+        self.ready.emit(key[0])
+
+    def _prune_disk(self, limit):
+        # Remove the least recently used thumbnail files until the directory fits in limit bytes
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file():
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def _disk_paths(disk_dir, max_width, key):
+    if disk_dir is None:
+        return []
+    name = hashlib.sha1(f"{THUMBNAIL_VERSION}|{max_width}|{key[0]}|{key[1]}|{key[2]}".encode("utf-8")).hexdigest()
+    # PNG for images with transparency, JPEG otherwise
+    return [os.path.join(disk_dir, name + ext) for ext in (".jpg", ".png")]
+
+
+def _read_disk(paths):
+    for disk_path in paths:
+        if os.path.exists(disk_path):
+            image = QImage(disk_path)
+            if not image.isNull():
+                try:
+                    os.utime(disk_path)   # keeps recently used thumbnails when pruning
+                except OSError:
+                    pass
+                return image
+    return None
+
+
+def _write_disk(paths, image):
+    alpha = image.hasAlphaChannel()
+    disk_path = paths[1] if alpha else paths[0]
+    # Decoding runs on a thread pool, so two threads may write the same thumbnail at once
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(disk_path), suffix=".tmp")
+        os.close(fd)
+    except OSError:
+        return
+    if image.save(tmp_path, "PNG" if alpha else "JPG", -1 if alpha else 85):
+        try:
+            os.replace(tmp_path, disk_path)
+        except OSError:
+            pass
+    if os.path.exists(tmp_path):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def decode_thumbnail(key, max_width, disk_dir=None):
+    """Decode the image of a ThumbnailCache key at most max_width wide (thread-safe).
+
+    Returns a null QImage if the file cannot be decoded.
+    """
+    paths = _disk_paths(disk_dir, max_width, key)
+    image = _read_disk(paths)
+    if image is not None:
+        return image
+    reader = QImageReader(key[0])
+    size = reader.size()
+    downscale = size.isValid() and size.width() > max_width
+    if downscale:
+        # Lets decoders that support it (e.g. JPEG) skip the full-resolution image entirely
+        reader.setScaledSize(size.scaled(max_width, size.height(), Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return image
+    if image.width() > max_width:
+        image = image.scaledToWidth(max_width, Qt.SmoothTransformation)
+    if downscale and paths:
+        _write_disk(paths, image)
+    return image
+
+
+class _JobSignals(QObject):
+    # Not parented to the cache, so that jobs still queued at shutdown keep it alive
+    loaded = pyqtSignal(object, object)   # (key, QImage)
+
+
+class _ThumbnailJob(QRunnable):
+
+    def __init__(self, signals, key, max_width, disk_dir):
+        super().__init__()
+        self.signals = signals
+        self.key = key
+        self.max_width = max_width
+        self.disk_dir = disk_dir
+
+    def run(self):
+        try:
+            image = decode_thumbnail(self.key, self.max_width, self.disk_dir)
+        except Exception:
+            image = QImage()
+        try:
+            self.signals.loaded.emit(self.key, image)
+        except RuntimeError:
+            pass   # the interpreter is shutting down and the receiver is gone
+
+
+class LazyImageHandler(QObject, QTextObjectInterface):
+    """Lays out and paints the images of a QTextEdit through a ThumbnailCache.
+
+    Installed for the editor's current document; image names are resolved against the
+    document's base URL like QTextDocument does.
+    """
+
+    def __init__(self, editor, cache):
+        super().__init__(editor)
+        self.editor = editor
+        self.cache = cache
+        cache.ready.connect(self._on_ready)
+        editor.document().documentLayout().registerHandler(QTextFormat.ImageObject, self)
+
+    @staticmethod
+    def _path(document, image_format):
+        return document.baseUrl().resolved(QUrl(image_format.name())).toLocalFile()
+
+    def intrinsicSize(self, document, position, text_format):
+        image_format = text_format.toImageFormat()
+        path = self._path(document, image_format)
+        size = self.cache.display_size(path) if path else None
+        if size is None:
+            size = QSize(PLACEHOLDER_SIZE)
+        width, height = image_format.width(), image_format.height()
+        if width > 0 and height > 0:
+            return QSizeF(width, height)
+        if width > 0:
+            return QSizeF(width, size.height() * width / size.width())
+        if height > 0:
+            return QSizeF(size.width() * height / size.height(), height)
+        # Never wider than the pane
+        available = document.textWidth() - 2 * document.documentMargin()
+        if 0 < available < size.width():
+            return QSizeF(available, size.height() * available / size.width())
+        return QSizeF(size)
+
+    def drawObject(self, painter, rect, document, position, text_format):
+        path = self._path(document, text_format.toImageFormat())
+        image = self.cache.get(path) if path else None
+        if image is None:
+            painter.fillRect(rect, QColor(235, 235, 235))
+            painter.setPen(QColor(200, 200, 200))
+            painter.drawRect(rect.adjusted(0, 0, -1, -1))
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawImage(rect, image)
+        painter.restore()
+
+    def _on_ready(self, path):
+        # Sizes are known from the file headers, so a repaint is enough
+        self.editor.viewport().update()
@@ -0,0 +1,116 @@
+# image_store.py
+"""文档级图片存储：按内存计数器编号，并按 xref 与内容哈希去重。
+
+同一张图片（例如每页重复出现的 Logo、页眉）只写盘一次，Markdown 中多次引用同一个文件。
+"""
+import hashlib
+import os
+import re
+
+import conversion_profile
+
+
+class ImageStore:
+    """为单个文档分配图片文件名并写盘，统计去重节省的字节数与写入次数。
+
+    文件名格式为 {prefix}_image{序号}.{扩展名}，序号从 1 开始，只与本文档中
+    不同图片出现的先后顺序有关，与输出目录中已有的文件无关。
+    output_dir 为 None 时不写盘，图片保存在 images 字典（文件名 -> 字节）中；
+    传入 transcoder（image_transcoder.ImageTranscoder）时图片交给它按格式策略转换后写盘，
+    转换与解析同时进行，不在内存中积累图片字节。
+    """
+
+    def __init__(self, output_dir, prefix, transcoder=None):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.transcoder = transcoder
+        self.images = {}
+        self._counter = 0
+        self._by_xref = {}   # xref -> (文件名, 字节数)
+        self._by_hash = {}   # 内容哈希 -> 文件名
+        self._digests = {}   # 文件名 -> 内容哈希
+        self._previous = {}  # 内容哈希 -> 上次转换使用的文件名（增量转换）
+        self.filenames = []  # 按写入顺序记录的文件名
+        self.stats = {
+            "images_total": 0,        # 引用的图片总次数
+            "images_written": 0,      # 实际写盘的图片数
+            "image_bytes_written": 0,
+            "image_writes_saved": 0,  # 因去重而省掉的写入次数
+            "image_bytes_saved": 0,   # 因去重而省掉的写入字节数
+        }
+
+    def reserve(self, filename, digest):
+        """登记一张已存在于输出目录中的图片（增量转换时复用的页面所引用），不再写盘。
+
+        之后内容相同的图片直接复用该文件。
+        """
+        if filename in self._digests:
+            return
+        self.remember(filename, digest)
+        self._by_hash.setdefault(digest, filename)
+        self._digests[filename] = digest
+        self.filenames.append(filename)
+
+    def remember(self, filename, digest):
+        """记住上次转换时该内容使用的文件名：再次出现时沿用原文件名，新图片的序号从其后开始。"""
+        match = re.fullmatch(re.escape(self.prefix) + r"_image(\d+)\.\w+", filename)
+        if match:
+            self._counter = max(self._counter, int(match.group(1)))
+        self._previous.setdefault(digest, filename)
+
+    def digest(self, filename):
+        """已登记图片的内容哈希。"""
+        return self._digests[filename]
+
+    def add(self, image_bytes, ext, xref=None):
+        """登记一张图片并返回其文件名；重复的图片直接返回已有文件名而不再写盘。
+
+        已登记过的 xref 可以传入 image_bytes=None。
+        """
+        self.stats["images_total"] += 1
+        if xref is not None and xref in self._by_xref:
+            filename, size = self._by_xref[xref]
+            self._record_saved(size)
+            return filename
+        if image_bytes is None:
+            raise ValueError(f"未登记的图片 xref={xref} 缺少图片数据")
+
+        digest = hashlib.sha1(image_bytes).hexdigest()
+        filename = self._by_hash.get(digest)
+        if filename is not None:
+            self._record_saved(len(image_bytes))
+        else:
+            filename = self._previous.get(digest)
+            if filename is None:
+                self._counter += 1
+                filename = f"{self.prefix}_image{self._counter}.{ext}"
+            self._save(filename, image_bytes)
+            self._by_hash[digest] = filename
+            self._digests[filename] = digest
+        if xref is not None:
+            self._by_xref[xref] = (filename, len(image_bytes))
+        return filename
+
+    def put(self, filename, image_bytes):
+        """按给定文件名保存一张图片（不编号、不去重，用于 Word 文档中按部件命名的图片）。"""
+        self.stats["images_total"] += 1
+        self._save(filename, image_bytes)
+        return filename
+
+    def _save(self, filename, image_bytes):
+        if self.transcoder is not None:
+            stem, ext = os.path.splitext(filename)
+            self.transcoder.submit(image_bytes, ext, stem)
+        elif self.output_dir is None:
+            self.images[filename] = image_bytes
+        else:
+            with conversion_profile.stage("image_write") as profile_stage, \
+                    open(os.path.join(self.output_dir, filename), "wb") as img_file:
+                profile_stage.add_bytes(img_file.write(image_bytes))
+        self.filenames.append(filename)
+        self.stats["images_written"] += 1
+        self.stats["image_bytes_written"] += len(image_bytes)
+
+    def _record_saved(self, size):
+        self.stats["image_writes_saved"] += 1
+        self.stats["image_bytes_saved"] += size
@@ -0,0 +1,115 @@
+# image_transcoder.py
+"""在内存中完成图片解码与格式转换，并用线程池并行处理。
+
+图片字节直接交给 PIL 解码、编码，只把最终结果写盘一次，不再经历
+"写原图 -> 重新打开 -> 另存 -> 删除原图" 的过程。格式策略：
+    keep  保留原始字节与扩展名
+    png   转换为 PNG（默认，与原有行为一致）
+    webp  转换为 WebP（JPEG 来源使用有损压缩，其他来源使用无损压缩）
+源格式与目标格式相同时跳过转换，直接写出原始字节。
+"""
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+import conversion_profile
+
+IMAGE_POLICIES = ("keep", "png", "webp")
+DEFAULT_IMAGE_POLICY = "png"
+WEBP_QUALITY = 85
+
+# 各目标格式对应的 PIL 格式名与可直接编码的图像模式
+_TARGETS = {
+    "png": ("PNG", {"1", "L", "LA", "I", "I;16", "P", "RGB", "RGBA"}),
+    "webp": ("WEBP", {"RGB", "RGBA"}),
+}
+_SAME_FORMAT = {"png": {"png"}, "webp": {"webp"}}
+
+
+def transcode_image(image_bytes, ext, policy=DEFAULT_IMAGE_POLICY):
+    """按策略转换图片，返回 (图片字节, 扩展名)；ext 不含点号。
+
+    无需转换（keep 策略或源格式已是目标格式）时原样返回；PIL 无法解码的图片（如 EMF/WMF）
+    会抛出异常，由调用方决定如何处理。
+    """
+    if policy not in IMAGE_POLICIES:
+        raise ValueError(f"不支持的图片格式策略: {policy}")
+    ext = ext.lstrip(".")
+    if policy == "keep" or ext.lower() in _SAME_FORMAT[policy]:
+        return image_bytes, ext
+    ext = ext.lower()
+    pil_format, modes = _TARGETS[policy]
+    with Image.open(io.BytesIO(image_bytes)) as im:
+        if im.mode not in modes:
+            has_alpha = im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info
+            im = im.convert("RGBA" if has_alpha else "RGB")
+        out = io.BytesIO()
+        if policy == "webp":
+            lossless = ext not in ("jpg", "jpeg")
+            im.save(out, format=pil_format, lossless=lossless, quality=WEBP_QUALITY)
+        else:
+            im.save(out, format=pil_format)
+    return out.getvalue(), policy
+
+
+class ImageTranscoder:
+    """把图片转换与写盘任务提交到线程池，按提交顺序返回生成的文件路径。
+
+    同时在途的任务数有上限，未处理的图片字节不会无限堆积在内存中。
+    """
+
+    def __init__(self, output_dir, policy=DEFAULT_IMAGE_POLICY, workers=None):
+        if policy not in IMAGE_POLICIES:
+            raise ValueError(f"不支持的图片格式策略: {policy}")
+        self.output_dir = output_dir
+        self.policy = policy
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._in_flight = deque()
+        self.paths = []  # 已完成的图片路径，按提交顺序排列
+        self.stats = {"images_transcoded": 0, "images_kept": 0, "image_transcode_failures": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, image_bytes, ext, stem):
+        """提交一张图片，输出文件名为 stem 加上转换后格式的扩展名。"""
+        while len(self._in_flight) >= self.workers * 2:
+            self._collect(self._in_flight.popleft())
+        self._in_flight.append(self._executor.submit(self._process, image_bytes, ext, stem))
+
+    def close(self):
+        """等待全部任务完成并关闭线程池，返回所有生成的图片路径（按提交顺序）。"""
+        try:
+            while self._in_flight:
+                self._collect(self._in_flight.popleft())
+        finally:
+            self._executor.shutdown()
+        return self.paths
+
+    def _collect(self, future):
+        path, outcome = future.result()
+        self.paths.append(path)
+        self.stats[outcome] += 1
+
+    def _process(self, image_bytes, ext, stem):
+        outcome = "images_kept"
+        try:
+            with conversion_profile.stage("image_transcode"):
+                data, new_ext = transcode_image(image_bytes, ext, self.policy)
+            if data is not image_bytes:
+                outcome = "images_transcoded"
+        except Exception as e:
+            # 解码或编码失败时保留原图
+            print(f"图片转换{self.policy.upper()}格式失败: {e}")
+            data, new_ext, outcome = image_bytes, ext.lstrip("."), "image_transcode_failures"
+        path = os.path.join(self.output_dir, f"{stem}.{new_ext}" if new_ext else stem)
+        with conversion_profile.stage("image_write") as profile_stage, open(path, "wb") as f:
+            profile_stage.add_bytes(f.write(data))
+        return path, outcome
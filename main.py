@@ -1,10 +1,62 @@
 # main.py
+import time
+_START = time.perf_counter()  # 启动耗时测量的起点，尽量早于其他导入
+
+import json
 import sys
-from PyQt5.QtWidgets import QApplication
-from file_selector import FileSelectorWindow
+import multiprocessing
 
 if __name__ == "__main__":
+    # 打包后的 exe 中使用进程池时必须先调用 freeze_support
+    multiprocessing.freeze_support()
+    # 批量模式：main.exe batch <目录> [-o 输出目录] [-j 进程数]，不加载任何 Qt 模块
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch_convert import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    # 服务模式：main.exe serve [--port 端口] [-j 进程数]，常驻本地转换服务，同样不加载 Qt 模块
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from convert_server import main as serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+    # 监视模式：main.exe watch <目录> [-o 输出目录] [-j 进程数]，自动转换新增与修改的文档，不加载 Qt 模块
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        from watch_folder import main as watch_main
+        sys.exit(watch_main(sys.argv[2:]))
+
+    # 启动耗时测量：main.exe --measure-startup [--startup-log 文件]，预热完成后输出各阶段耗时并退出
+    measure = "--measure-startup" in sys.argv
+    startup_log = None
+    if "--startup-log" in sys.argv[:-1]:
+        startup_log = sys.argv[sys.argv.index("--startup-log") + 1]
+
+    from gui_startup import StartupTimer, prewarm
+    timer = StartupTimer(_START)
+
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from file_selector import FileSelectorWindow  # 只依赖 PyQt5，解析库在窗口显示后由后台线程加载
+    timer.mark("qt_imported")
+
     app = QApplication(sys.argv)
     selector = FileSelectorWindow()
     selector.show()
+
+    def on_shown():
+        # 窗口显示后的首批事件处理完毕，再开始后台预热，避免与首次绘制争用
+        timer.mark("selector_shown")
+        prewarm(timer=timer)
+        if measure:
+            poll = QTimer(app)
+
+            def check():
+                if timer.has("parsers_warm"):
+                    poll.stop()
+                    print(json.dumps(timer.report(), ensure_ascii=False), flush=True)
+                    if startup_log:
+                        timer.write_log(startup_log)
+                    app.quit()
+
+            poll.timeout.connect(check)
+            poll.start(20)
+
+    QTimer.singleShot(0, on_shown)
     sys.exit(app.exec_())
@@ -1,189 +1,350 @@
-import sys, os
-import fitz                  # PyMuPDF for PDF parsing
-import docx                  # python-docx for Word parsing
+import sys, os, time
+import sqlite3
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QSplitter, QTreeWidget, QTreeWidgetItem,
-    QPlainTextEdit, QTextEdit, QFileDialog
+    QPlainTextEdit, QTextEdit, QFileDialog, QProgressBar, QLabel,
+    QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
 )
-from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtCore import Qt, QUrl, QThread, QTimer, pyqtSignal
+from conversion_cache import ConversionCache
+from doc_parser import CONVERTER_VERSION, get_cache_dir
+from document_model import Document, Heading, block_markdown, block_text, get_backend
+from image_preview import LazyImageHandler, ThumbnailCache
+from image_store import ImageStore
+from markdown_writer import MarkdownBlockWriter
+from preview_pane import PagedPreview
+from search_index import SearchIndex
 
-def parse_document(file_path):
+# Bumped whenever the layout of the viewer's cache entries changes
+VIEWER_CACHE_VERSION = 4
+
+_cache = None
+_thumbnails = None
+
+
+def get_cache():
+    """Return the process-wide conversion cache used by the viewer (created on first use)."""
+    global _cache
+    if _cache is None:
+        _cache = ConversionCache(get_cache_dir())
+    return _cache
+
+
+def get_thumbnail_cache():
+    """Return the image thumbnail cache shared by all viewer windows (created on first use)."""
+    global _thumbnails
+    if _thumbnails is None:
+        _thumbnails = ThumbnailCache(os.path.join(get_cache_dir(), "thumbnails"))
+    return _thumbnails
+
+
+def open_search_index():
+    """Open the shared full-text search index, or return None if it cannot be used
+    (e.g. the output folder is read-only). Each thread must open its own instance."""
+    try:
+        return SearchIndex()
+    except (sqlite3.Error, OSError):
+        return None
+
+
+def parse_document(file_path, use_cache=True):
     """
     Parse the given Word (.docx) or PDF document and return:
       - structure: list of (level, title) representing the document's outline (headings or bookmarks).
       - full_text: the complete plain text content of the document (no images).
       - md_path: file path to a generated Markdown file with the document's content and image links.
+    If use_cache is True and the file content has not changed since a previous conversion,
+    the results are restored from the conversion cache instead of parsing the document again.
     """
     structure = []
-    full_text = ''
+    text_parts = []
     md_path = ''
-    if file_path.lower().endswith(('.docx', '.doc')):
-        # --- Parse Word document ---
-        doc = docx.Document(file_path)
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        # Extract outline structure (headings) and full text content
-        for para in doc.paragraphs:
-            text = para.text.strip()
-            if not text:
-                continue
-            # Identify heading level by style name (supports English "Heading X" or Chinese "标题 X")
-            style_name = para.style.name if para.style else ''
-            level = None
-            for lvl in range(1, 10):
-                if style_name.lower().startswith(f'heading {lvl}') or style_name == f'Heading {lvl}' or style_name == f'标题 {lvl}':
-                    level = lvl
-                    break
-            if level:  # It's a heading, add to structure
-                structure.append((level, text))
-            # Append text to full content (with newline)
-            full_text += text + '\n'
-        # Prepare directory for extracted images
-        img_dir = os.path.join(os.path.dirname(file_path), f"{base_name}_images")
-        os.makedirs(img_dir, exist_ok=True)
-        md_lines = []
-        # Build Markdown text content
-        for para in doc.paragraphs:
-            text = para.text.strip()
-            style_name = para.style.name if para.style else ''
-            if text:
-                # Determine if paragraph is a heading and format accordingly
-                level = None
-                for lvl in range(1, 10):
-                    if style_name.lower().startswith(f'heading {lvl}') or style_name == f'Heading {lvl}' or style_name == f'标题 {lvl}':
-                        level = lvl
+    for event in iter_parse_document(file_path, use_cache):
+        kind = event[0]
+        if kind == "outline":
+            structure.append((event[1], event[2]))
+        elif kind == "text":
+            text_parts.append(event[1])
+        elif kind == "done":
+            md_path = event[1]
+    return structure, ''.join(text_parts), md_path
+
+
+def iter_parse_document(file_path, use_cache=True, search_index=None, progress=None, cancelled=None):
+    """
+    Incremental form of parse_document, used by the background parse worker. Yields events:
+      ("progress", done, total)           - units (body blocks or pages) processed so far
+      ("outline", level, title, section)  - one outline entry, in document order
+      ("text", chunk, section)            - the next piece of plain text
+      ("markdown", block, section)        - the next Markdown block (blocks are separated by a blank line)
+      ("done", md_path)                   - last event, the Markdown file has been written
+    section numbers the part of the document a piece belongs to (the page of a PDF, or the
+    heading section of a Word document); they never decrease and let the preview panes jump
+    to an outline entry without rendering everything before it.
+    Closing the generator early (cancellation) leaves no partially written .md file behind.
+    If search_index is given and the document changed since it was last indexed, its text is
+    added to that index (see search_index.SearchIndex) once the parse completes.
+    progress(done, total), if given, is also called directly whenever the backend reports progress,
+    including stretches that produce no block at all (the heading scan of a PDF without bookmarks);
+    cancelled(), if given, is polled by the backend during such stretches and stops it when it
+    returns True.
+    """
+    events = _iter_document_events(file_path, use_cache, progress, cancelled)
+    if search_index is None:
+        return events
+    return _index_events(events, search_index, file_path)
+
+
+def _index_events(events, search_index, file_path):
+    """Pass the events through while collecting their outline and text for the search index.
+    The index is only updated when the parse runs to completion."""
+    try:
+        if search_index.is_current(file_path):
+            yield from events
+            return
+        is_pdf = file_path.lower().endswith('.pdf')
+        indexer = search_index.document_writer(file_path)
+        try:
+            with indexer:
+                for event in events:
+                    kind = event[0]
+                    if kind == "done":
+                        indexer.md_path = event[1]
                         break
-                if level:
-                    md_lines.append('#' * level + ' ' + text)   # Convert heading to Markdown syntax
-                else:
-                    md_lines.append(text)
-            else:
-                # Empty paragraph (could be a blank line or an image placeholder)
-                md_lines.append('')
-        # Extract images from the Word document and save them, adding references in Markdown
-        image_counter = 1
-        for rel in doc.part.rels.values():
-            if "image" in rel.target_ref:  # Identify image relationships in the docx
-                image_bytes = rel.target_part.blob
-                # Determine image file extension
-                ext = os.path.splitext(rel.target_ref)[1]
-                if not ext:
-                    ext = '.png'
-                img_filename = f"image_{image_counter}{ext}"
-                img_path = os.path.join(img_dir, img_filename)
-                # Save image to the images directory
-                with open(img_path, 'wb') as img_file:
-                    img_file.write(image_bytes)
-                # Add an image reference to the Markdown content (relative path)
-                md_lines.append(f"![image_{image_counter}]({os.path.basename(img_dir)}/{img_filename})")
-                image_counter += 1
-        # Write the Markdown content to a .md file
-        md_content = '\n\n'.join(md_lines)
-        md_path = os.path.join(os.path.dirname(file_path), f"{base_name}.md")
-        with open(md_path, 'w', encoding='utf-8') as f:
-            f.write(md_content)
-        return structure, full_text, md_path
-
-    elif file_path.lower().endswith('.pdf'):
-        # --- Parse PDF document ---
-        doc = fitz.open(file_path)
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        # Extract outline structure from PDF bookmarks (table of contents)
-        toc = doc.get_toc(simple=True)  # list of [level, title, page] entries
-        structure = [(lvl, title) for (lvl, title, page) in toc]
-        # Extract full text from all pages
-        for page in doc:
-            full_text += page.get_text("text")
-        # Prepare directory for extracted images
-        img_dir = os.path.join(os.path.dirname(file_path), f"{base_name}_images")
-        os.makedirs(img_dir, exist_ok=True)
-        md_lines = []
-        # Build Markdown text content from PDF text, preserving paragraph breaks
-        for line in full_text.splitlines():
-            if line.strip() == "":
-                md_lines.append("")  # blank line for paragraph separation
-            else:
-                md_lines.append(line)
-        # Extract images from each page and save them, adding references in Markdown
-        image_counter = 1
-        for page_number in range(len(doc)):
-            page = doc[page_number]
-            for img in page.get_images(full=True):  # list of images on this page
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                ext = base_image.get("ext", "png")
-                img_filename = f"image_{page_number+1}_{image_counter}.{ext}"
-                img_path = os.path.join(img_dir, img_filename)
-                # Save the image file
-                with open(img_path, "wb") as img_file:
-                    img_file.write(image_bytes)
-                # Add image reference to Markdown (relative path)
-                md_lines.append(f"![image_{page_number+1}_{image_counter}]({os.path.basename(img_dir)}/{img_filename})")
-                image_counter += 1
-        # Write the Markdown content to a .md file
-        md_content = '\n\n'.join(md_lines)
-        md_path = os.path.join(os.path.dirname(file_path), f"{base_name}.md")
-        with open(md_path, 'w', encoding='utf-8') as f:
-            f.write(md_content)
-        return structure, full_text, md_path
-
-    else:
-        raise ValueError("Unsupported file format: must be .docx or .pdf")
+                    if kind == "outline":
+                        indexer.add_heading(event[3], event[2])
+                    elif kind == "text":
+                        # PDF sections are pages
+                        indexer.add(event[2], event[1], event[2] + 1 if is_pdf else None)
+                    yield event
+        except sqlite3.Error:
+            pass  # the document itself was converted; it is indexed again next time
+        yield event
+    finally:
+        events.close()
+
+
+def _iter_document_events(file_path, use_cache, on_progress=None, cancelled=None):
+    """Parse the document once into a document_model.Document, streaming the events of each
+    block as it is produced. The Markdown and images are written next to the document; a cache
+    hit restores them and replays the cached model, so the .md file is never read back."""
+    backend = get_backend(file_path)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    md_path = os.path.join(os.path.dirname(file_path), f"{base_name}.md")
+    # Images live in a folder of their own next to the .md file
+    image_prefix = f"{base_name}_images/"
+    if use_cache:
+        cache = get_cache()
+        key = cache.make_key(file_path, CONVERTER_VERSION, {
+            "converter": "main_window", "name": base_name, "viewer_cache": VIEWER_CACHE_VERSION})
+        meta = cache.restore(key, md_path)
+        if meta is not None:
+            doc = Document.from_dict(meta["document"])
+            for level, title, section in doc.bookmarks or []:
+                yield ("outline", level, title, section)
+            for block in doc.blocks:
+                yield from _block_events(block, doc, image_prefix)
+            yield ("done", md_path)
+            return
+
+    img_dir = os.path.join(os.path.dirname(file_path), image_prefix)
+    os.makedirs(img_dir, exist_ok=True)
+    # Image names start with the full source file name, like every other entry point
+    images = ImageStore(img_dir, os.path.basename(file_path))
+    bookmarks, total = backend.scan(file_path)
+    doc = Document(base_name, backend.kind, [], bookmarks=bookmarks)
+    for level, title, section in bookmarks or []:
+        yield ("outline", level, title, section)
+    progress = []  # units (pages, or bytes of a Word body) reported by the backend
+
+    def report(done):
+        progress.append(done)
+        if on_progress is not None:
+            on_progress(done, total)
+
+    # Write the Markdown content to the .md file incrementally
+    with MarkdownBlockWriter(md_path) as writer:
+        for block in backend.iter_blocks(file_path, images, progress=report, cancelled=cancelled):
+            doc.blocks.append(block)
+            for event in _block_events(block, doc, image_prefix):
+                if event[0] == "markdown":
+                    writer.write(event[1])
+                yield event
+            if progress:
+                yield ("progress", progress[-1], total)
+                progress.clear()
+        # Still inside the writer: a consumer that stops here (e.g. because the backend was
+        # cancelled) discards the .md file instead of keeping a truncated one
+        yield ("progress", total, total)
+    if use_cache:
+        cache.store(key, md_path, [image_prefix + name for name in images.filenames],
+                    outline=doc.outline, extra={"document": doc.as_dict()})
+    yield ("done", md_path)
+
+
+def _block_events(block, doc, image_prefix):
+    """The outline, text and Markdown events of one block of the document model.
+    Headings only make outline entries when the document has no bookmarks of its own."""
+    if doc.bookmarks is None and isinstance(block, Heading):
+        yield ("outline", block.level, block.text, block.section)
+    text = block_text(block, doc.kind)
+    if text is not None:
+        yield ("text", text + '\n', block.section)
+    markdown = block_markdown(block, image_prefix)
+    if markdown is not None:
+        yield ("markdown", markdown, block.section)
+
+
+class ParseWorker(QThread):
+    """Runs iter_parse_document off the GUI thread and forwards its events in batches.
+
+    Events are buffered and flushed at most every FLUSH_INTERVAL seconds so that very large
+    documents do not flood the GUI thread with one signal per paragraph.
+    """
+    FLUSH_INTERVAL = 0.1
+
+    progress = pyqtSignal(int, int)
+    outline_ready = pyqtSignal(list)    # list of (level, title, section)
+    text_ready = pyqtSignal(list)       # list of (section, text piece)
+    markdown_ready = pyqtSignal(list)   # list of (section, Markdown block)
+    parse_finished = pyqtSignal(str)    # md_path
+    parse_failed = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+
+    def run(self):
+        # SQLite connections are tied to their thread, so the worker opens its own
+        search_index = open_search_index()
+        try:
+            self._run(search_index)
+        finally:
+            if search_index is not None:
+                search_index.close()
+
+    def _run(self, search_index):
+        outline, text, markdown = [], [], []
+        progress = None
+        last_flush = time.monotonic()
+
+        def flush():
+            if outline:
+                self.outline_ready.emit(outline[:])
+                outline.clear()
+            if text:
+                self.text_ready.emit(text[:])
+                text.clear()
+            if markdown:
+                self.markdown_ready.emit(markdown[:])
+                markdown.clear()
+            if progress:
+                self.progress.emit(*progress)
+
+        last_progress = [0.0]
+
+        def on_progress(done, total):
+            # Progress reported while no events are produced (the heading scan of a PDF
+            # without bookmarks), throttled like the event batches
+            now = time.monotonic()
+            if now - last_progress[0] >= self.FLUSH_INTERVAL:
+                last_progress[0] = now
+                self.progress.emit(done, total)
+
+        events = iter_parse_document(self.file_path, search_index=search_index,
+                                     progress=on_progress, cancelled=self.isInterruptionRequested)
+        try:
+            for event in events:
+                if self.isInterruptionRequested():
+                    events.close()  # removes the partially written .md file
+                    return
+                kind = event[0]
+                if kind == "outline":
+                    outline.append((event[1], event[2], event[3]))
+                elif kind == "text":
+                    text.append((event[2], event[1]))
+                elif kind == "markdown":
+                    markdown.append((event[2], event[1]))
+                elif kind == "progress":
+                    progress = (event[1], event[2])
+                elif kind == "done":
+                    flush()
+                    self.parse_finished.emit(event[1])
+                    return
+                now = time.monotonic()
+                if now - last_flush >= self.FLUSH_INTERVAL:
+                    flush()
+                    progress = None
+                    last_flush = now
+        except Exception as e:
+            flush()
+            self.parse_failed.emit(str(e))
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, file_path):
+    SEARCH_DELAY_MS = 250
+    SEARCH_LIMIT = 50
+
+    def __init__(self, file_path, jump_to_section=None):
         super().__init__()
         self.setWindowTitle("文档查看")  # Main window title
-
-        # Parse the selected document to get outline, text, and markdown content
-        structure, full_text, md_path = parse_document(file_path)
+        self.file_path = file_path
+        # Section to show once parsing finishes (set when opened from a search hit)
+        self._pending_jump = jump_to_section
+        self._search_index = None
+        self._opened_windows = []
 
         # Create a splitter to divide the window into three panels
         splitter = QSplitter(Qt.Horizontal)
 
         # Left Panel: QTreeWidget for the document outline (headings/bookmarks)
-        tree_widget = QTreeWidget()
-        tree_widget.setHeaderHidden(True)  # no header needed for outline
-        # Populate the tree with the outline structure
-        parents = {0: None}
-        for level, title in structure:
-            item = QTreeWidgetItem([title])
-            parent_item = parents.get(level - 1)
-            if parent_item is None:
-                # This is a top-level item
-                tree_widget.addTopLevelItem(item)
-            else:
-                # Add as a child to the appropriate parent item
-                parent_item.addChild(item)
-            parents[level] = item  # update the current level parent
-        tree_widget.expandAll()  # expand all nodes to show the full hierarchy
+        self.tree_widget = QTreeWidget()
+        self.tree_widget.setHeaderHidden(True)  # no header needed for outline
+        self.tree_widget.itemClicked.connect(self._on_outline_clicked)
+        self._outline_parents = {0: None}
+
+        # Search box over every converted document; hits are listed above the outline
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索已转换的文档...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_results = QListWidget()
+        self.search_results.setWordWrap(True)
+        self.search_results.hide()
+        self.search_results.itemClicked.connect(self._on_search_hit_clicked)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self._run_search)
+        self.search_edit.textChanged.connect(self._search_timer.start)
+        self.search_edit.returnPressed.connect(self._run_search)
+        left_panel = QWidget()
+        left_layout = QVBoxLayout(left_panel)
+        left_layout.setContentsMargins(0, 0, 0, 0)
+        left_layout.addWidget(self.search_edit)
+        left_layout.addWidget(self.search_results, 1)
+        left_layout.addWidget(self.tree_widget, 2)
 
         # Middle Panel: QPlainTextEdit for full text content
-        text_edit = QPlainTextEdit()
-        text_edit.setPlainText(full_text)
-        text_edit.setReadOnly(True)  # make it view-only
+        self.text_edit = QPlainTextEdit()
+        self.text_edit.setReadOnly(True)  # make it view-only
 
         # Right Panel: QTextEdit for Markdown content (with images preview)
-        markdown_edit = QTextEdit()
-        markdown_edit.setReadOnly(True)
-        # Load the generated Markdown file content
-        md_content = ""
-        try:
-            with open(md_path, 'r', encoding='utf-8') as f:
-                md_content = f.read()
-        except Exception as e:
-            md_content = f"无法加载 Markdown 文件: {e}"
+        self.markdown_edit = QTextEdit()
+        self.markdown_edit.setReadOnly(True)
         # Set base URL for image references so that local images can be displayed
-        base_url = QUrl.fromLocalFile(os.path.join(os.path.dirname(md_path), ''))
-        markdown_edit.document().setBaseUrl(base_url)
-        # Display the Markdown content (Qt will render formatting and images)
-        markdown_edit.setMarkdown(md_content)
+        base_url = QUrl.fromLocalFile(os.path.join(os.path.dirname(os.path.abspath(file_path)), ''))
+        self.markdown_edit.document().setBaseUrl(base_url)
+        # Images are decoded as downscaled thumbnails, only when they scroll into view
+        self.image_handler = LazyImageHandler(self.markdown_edit, get_thumbnail_cache())
+
+        # Only the part of the document near the viewport is laid out in the two preview panes
+        self.text_preview = PagedPreview(self.text_edit, markdown=False, parent=self)
+        self.markdown_preview = PagedPreview(self.markdown_edit, markdown=True, parent=self)
 
         # Add all three panels to the splitter
-        splitter.addWidget(tree_widget)
-        splitter.addWidget(text_edit)
-        splitter.addWidget(markdown_edit)
+        splitter.addWidget(left_panel)
+        splitter.addWidget(self.text_edit)
+        splitter.addWidget(self.markdown_edit)
         # Adjust initial proportions of the splitter (optional)
         splitter.setStretchFactor(0, 1)
         splitter.setStretchFactor(1, 2)
@@ -192,6 +353,117 @@ class MainWindow(QMainWindow):
         # Set the splitter as the central widget of the main window
         self.setCentralWidget(splitter)
 
+        # Status bar: parsing progress
+        self.status_label = QLabel("正在解析...")
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # busy indicator until the first progress report
+        self.statusBar().addWidget(self.status_label)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+
+        # Parse the selected document in the background; results are shown as they arrive
+        self.worker = ParseWorker(file_path, self)
+        self.worker.progress.connect(self._on_progress)
+        self.worker.outline_ready.connect(self._on_outline)
+        self.worker.text_ready.connect(self.text_preview.append)
+        self.worker.markdown_ready.connect(self.markdown_preview.append)
+        self.worker.parse_finished.connect(self._on_finished)
+        self.worker.parse_failed.connect(self._on_failed)
+        self.worker.start()
+
+    def _on_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def _on_outline(self, entries):
+        # Populate the tree with the outline structure
+        for level, title, section in entries:
+            item = QTreeWidgetItem([title])
+            item.setData(0, Qt.UserRole, section)  # where the entry's section starts
+            parent_item = self._outline_parents.get(level - 1)
+            if parent_item is None:
+                # This is a top-level item
+                self.tree_widget.addTopLevelItem(item)
+            else:
+                # Add as a child to the appropriate parent item
+                parent_item.addChild(item)
+                parent_item.setExpanded(True)  # show the full hierarchy
+            self._outline_parents[level] = item  # update the current level parent
+
+    def _on_outline_clicked(self, item, column):
+        # Jump both panes straight to the section of the clicked entry
+        section = item.data(0, Qt.UserRole)
+        if section is not None:
+            self.text_preview.jump_to_section(section)
+            self.markdown_preview.jump_to_section(section)
+
+    def _on_finished(self, md_path):
+        self.progress_bar.hide()
+        self.status_label.setText(f"解析完成: {md_path}")
+        if self._pending_jump is not None:
+            self.text_preview.jump_to_section(self._pending_jump)
+            self.markdown_preview.jump_to_section(self._pending_jump)
+            self._pending_jump = None
+        if self.search_edit.text().strip():
+            self._run_search()  # this document may just have been indexed
+
+    def _run_search(self):
+        self._search_timer.stop()
+        query = self.search_edit.text().strip()
+        self.search_results.clear()
+        if not query:
+            self.search_results.hide()
+            return
+        if self._search_index is None:
+            self._search_index = open_search_index()
+            if self._search_index is None:
+                self.status_label.setText("无法打开检索索引")
+                return
+        start = time.perf_counter()
+        try:
+            hits = self._search_index.search(query, self.SEARCH_LIMIT)
+        except sqlite3.Error as e:
+            self.status_label.setText(f"检索失败: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        for hit in hits:
+            location = f"第 {hit.page} 页" if hit.page else (hit.heading or "开头")
+            if hit.page and hit.heading:
+                location += f" · {hit.heading}"
+            item = QListWidgetItem(f"{os.path.basename(hit.file_path)}（{location}）\n{hit.snippet}")
+            item.setData(Qt.UserRole, (hit.file_path, hit.section))
+            item.setToolTip(hit.file_path)
+            self.search_results.addItem(item)
+        self.search_results.setVisible(bool(hits))
+        self.status_label.setText(f"找到 {len(hits)} 条结果（{elapsed * 1000:.1f} ms）")
+
+    def _on_search_hit_clicked(self, item):
+        file_path, section = item.data(Qt.UserRole)
+        if os.path.normcase(os.path.abspath(self.file_path)) == file_path:
+            self.text_preview.jump_to_section(section)
+            self.markdown_preview.jump_to_section(section)
+        elif os.path.exists(file_path):
+            # Open the other document in its own window and jump there once it is parsed
+            window = MainWindow(file_path, jump_to_section=section)
+            window.resize(self.size())
+            window.show()
+            self._opened_windows.append(window)
+        else:
+            self.status_label.setText(f"文件不存在: {file_path}")
+
+    def _on_failed(self, message):
+        self.progress_bar.hide()
+        self.status_label.setText(f"解析失败: {message}")
+
+    def closeEvent(self, event):
+        # Cancel a running parse; the worker stops at the next paragraph or page (or page scanned)
+        if self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.worker.wait()
+        if self._search_index is not None:
+            self._search_index.close()
+            self._search_index = None
+        super().closeEvent(event)
+
 
 # If running this module directly, allow selecting a file to open
 if __name__ == "__main__":
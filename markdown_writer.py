@@ -1,5 +1,12 @@
 # markdown_writer.py
 import os
+import tempfile
+
+import conversion_profile
+
+# 进程的 umask（导入时读取一次）：mkstemp 创建的临时文件权限为 0600，替换前改回普通文件的默认权限
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 def save_as_markdown(output_md_path, text_runs, tables_data, image_files):
     # 打开输出Markdown文件
@@ -30,3 +37,45 @@ def save_as_markdown(output_md_path, text_runs, tables_data, image_files):
             for img_path in image_files:
                 md.write(f"![提取图片]({img_path})\n\n")
     print(f"Markdown 文件已保存: {output_md_path}")
+
+
+class MarkdownBlockWriter:
+    """逐块写入 Markdown 文件，块之间以空行分隔（结果与 "\\n\\n".join(blocks) 相同）。
+
+    内容先写入同目录下的临时文件，正常结束时再原子替换为目标文件；
+    中途出错或被取消时删除临时文件，读者永远不会看到写了一半的 Markdown。
+    """
+
+    def __init__(self, md_path):
+        self.md_path = md_path
+        self.tmp_path = None
+        self._file = None
+        self._separator = ""
+
+    def __enter__(self):
+        # 每个写入器独占一个临时文件，同一进程内并发写同一目标（如两个线程同时解析）也不会互相覆盖
+        fd, self.tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.md_path) or ".",
+            prefix=f".{os.path.basename(self.md_path)}.", suffix=".tmp")
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+        return self
+
+    def write(self, block):
+        with conversion_profile.stage("markdown_write") as profile_stage:
+            self._file.write(self._separator)
+            self._file.write(block)
+            profile_stage.add_text(self._separator)
+            profile_stage.add_text(block)
+        self._separator = "\n\n"
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.chmod(self.tmp_path, 0o666 & ~_UMASK)
+            os.replace(self.tmp_path, self.md_path)
+        else:
+            try:
+                os.remove(self.tmp_path)
+            except OSError:
+                pass
+        return False
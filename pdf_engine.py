@@ -0,0 +1,129 @@
+# pdf_engine.py
+"""单次打开的 PDF 解析引擎。
+
+PyMuPDF 负责文本、图片与表格预筛；通过预筛的页面由 pdf_tables 直接从矢量图形中提取表格，
+pdfplumber 只在快速提取无法处理该页（或未安装 NumPy）时才懒加载，
+从而避免对每一页都执行代价很高的 extract_tables()。
+"""
+import io
+
+import fitz
+import pdfplumber
+
+try:
+    import pdf_tables
+except ImportError:  # 未安装 NumPy 时表格全部由 pdfplumber 提取
+    pdf_tables = None
+
+# 判定水平/垂直线段时允许的坐标偏差（单位：pt），与 pdfplumber 默认的 snap 容差一致
+LINE_TOLERANCE = 3
+
+
+def _count_rulings(page):
+    """统计页面矢量图形中的水平线与垂直线数量（矩形计为两条水平线加两条垂直线）。"""
+    horizontal = vertical = 0
+    # get_cdrawings 直接返回原始元组，比 get_drawings 构造 Point/Rect 对象更快
+    drawings = page.get_cdrawings() if hasattr(page, "get_cdrawings") else page.get_drawings()
+    for path in drawings:
+        for item in path["items"]:
+            op = item[0]
+            if op == "l" or op == "c":
+                # 曲线按首尾端点近似为线段，与 pdfplumber 将曲线拆分为边的处理保持保守一致
+                p1, p2 = item[1], item[-1]
+                if abs(p1[1] - p2[1]) <= LINE_TOLERANCE:
+                    horizontal += 1
+                elif abs(p1[0] - p2[0]) <= LINE_TOLERANCE:
+                    vertical += 1
+            elif op == "re" or op == "qu":
+                horizontal += 2
+                vertical += 2
+        if horizontal >= 2 and vertical >= 2:
+            break
+    return horizontal, vertical
+
+
+def page_may_have_table(page):
+    """快速判断页面是否可能含有 pdfplumber（lines 策略）能识别的表格。
+
+    pdfplumber 默认只依据页面上的线段和矩形边框构造单元格，至少需要两条水平线和两条垂直线；
+    不满足该条件的页面无需再调用 extract_tables()。
+    """
+    horizontal, vertical = _count_rulings(page)
+    return horizontal >= 2 and vertical >= 2
+
+
+def merge_stats(total, stats):
+    """将 stats 中的计数累加到 total 字典中（用于合并多个分片的统计信息）。"""
+    for key, value in stats.items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+
+class PdfEngine:
+    """对同一个 PDF 只打开一次的解析引擎，并统计表格预筛跳过的页数。
+
+    可以传入文件路径 pdf_path，也可以传入内存中的 PDF 字节 stream。
+    fast_tables 为 False 时不使用 pdf_tables，所有候选页都由 pdfplumber 提取（用于对比）。
+    """
+
+    def __init__(self, pdf_path=None, stream=None, table_prefilter=True, fast_tables=True):
+        if pdf_path is None and stream is None:
+            raise ValueError("必须提供 pdf_path 或 stream")
+        self.pdf_path = pdf_path
+        self._stream = stream
+        if stream is not None:
+            self.doc = fitz.open(stream=stream, filetype="pdf")
+        else:
+            self.doc = fitz.open(pdf_path)
+        self.table_prefilter = table_prefilter
+        self.fast_tables = fast_tables and pdf_tables is not None
+        self._plumber = None
+        self.stats = {
+            "pages": 0,                 # 已请求表格提取的页数
+            "table_candidate_pages": 0, # 通过预筛、实际提取表格的页数
+            "table_pages_skipped": 0,   # 被预筛跳过的页数
+            "table_plumber_pages": 0,   # 其中由 pdfplumber 提取（快速提取无法处理）的页数
+            "tables_found": 0,          # 提取到的表格总数
+        }
+
+    def __len__(self):
+        return len(self.doc)
+
+    def __getitem__(self, page_index):
+        return self.doc[page_index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def plumber(self):
+        """懒加载的 pdfplumber 文档，只有真正需要提取表格时才解析。"""
+        if self._plumber is None:
+            if self._stream is not None:
+                self._plumber = pdfplumber.open(io.BytesIO(self._stream))
+            else:
+                self._plumber = pdfplumber.open(self.pdf_path)
+        return self._plumber
+
+    def extract_tables(self, page_index):
+        """返回指定页面的表格列表（格式同 pdfplumber 的 extract_tables()）。"""
+        self.stats["pages"] += 1
+        if self.table_prefilter and not page_may_have_table(self.doc[page_index]):
+            self.stats["table_pages_skipped"] += 1
+            return []
+        self.stats["table_candidate_pages"] += 1
+        tables = pdf_tables.extract_tables(self.doc[page_index]) if self.fast_tables else None
+        if tables is None:
+            self.stats["table_plumber_pages"] += 1
+            tables = self.plumber.pages[page_index].extract_tables()
+        self.stats["tables_found"] += len(tables)
+        return tables
+
+    def close(self):
+        self.doc.close()
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
@@ -0,0 +1,176 @@
+# pdf_headings.py
+"""没有书签的 PDF 按字体统计推断标题（NumPy 向量化）。
+
+多数 PDF 没有书签，get_toc() 为空，主界面的目录与 Markdown 的 # 标题都无从得到。本模块：
+    1. 正式解析之前快速扫描一遍各页，只用 extractDICT() 提取每一行的字号、粗体、字符数、位置等统计
+       （不提取表格与图片）；由各行重建的页面文本与 page.get_text() 完全相同，推断出的字符偏移
+       可以直接用于正式解析时提取的页面文本；
+    2. 全文档的行统计拼成一个数组后一次性计算：按字符数加权出现最多的字号为正文字号，
+       明显大于正文的字号按从大到小分为各级标题，与正文同字号但整行加粗、独占一行的短行为最低一级；
+       在很多页上重复出现的行（页眉页脚）、不含文字的行（页码）、目录页中带引导点的行、过长的行
+       与文字占比过高的字号不作为标题；
+    3. 同一文本块中相邻的同级标题行合并为一个标题，结果为带页序号与页内字符偏移的分级目录。
+"""
+import re
+import zlib
+
+import fitz
+import numpy as np
+
+# 行统计数组的列
+OFFSET, LENGTH, SIZE, BOLD, CHARS, BLOCK, TOP, BOTTOM, KEY, TITLE = range(10)
+COLUMNS = 10
+# 字号按该精度（pt）归并为同一档
+SIZE_STEP = 0.5
+# 字号不小于正文字号的该倍数时作为标题候选
+HEADING_SIZE_RATIO = 1.15
+# 某一字号的文字占全文的比例超过该值时视为正文字体，不作为标题
+MAX_TIER_SHARE = 0.3
+# 标题行的最大字符数（不含空白）与标题所在文本块的最大行数
+MAX_HEADING_CHARS = 120
+MAX_HEADING_LINES = 3
+# 同一行文字出现在至少这么多页、且不少于总页数的该比例时视为页眉页脚
+REPEAT_MIN_PAGES = 3
+REPEAT_PAGE_SHARE = 0.2
+# 判断两行是否在同一水平位置时允许的重叠误差（pt）
+ROW_TOLERANCE = 1.0
+# 最多的标题级别数，更小的字号并入最后一级
+MAX_LEVEL = 6
+
+_LETTER_RE = re.compile(r"[^\W\d_]")
+# 目录页中标题与页码之间的引导点
+_LEADER_RE = re.compile(r"(?:\.\s?){4,}|…{2,}|·{4,}")
+_BOLD_FONT_RE = re.compile(r"bold|black|heavy|semibold", re.IGNORECASE)
+
+
+def page_text_lines(page):
+    """提取一页的文本与行统计，返回 (去掉首尾空白的页面文本, N×COLUMNS 数组)。
+
+    文本与 page.get_text().strip() 相同；数组每行对应文本中的一行，OFFSET 为该行在返回文本中的
+    字符偏移（首部空白中的行为负数），KEY 为该行文字的 CRC32，用于识别跨页重复的行，
+    TITLE 表示该行的文字可以作为标题（含有文字、不是目录页中带引导点的条目）。
+    """
+    data = page.get_textpage(flags=fitz.TEXTFLAGS_TEXT).extractDICT()
+    parts = []
+    rows = []
+    offset = 0
+    for block_number, block in enumerate(data["blocks"]):
+        if block["type"] != 0:
+            continue
+        for line in block["lines"]:
+            spans = line["spans"]
+            text = "".join(span["text"] for span in spans)
+            chars = bold = best = 0
+            size = 0.0
+            for span in spans:
+                count = len(span["text"]) - span["text"].count(" ")
+                chars += count
+                if span["flags"] & fitz.TEXT_FONT_BOLD or _BOLD_FONT_RE.search(span["font"]):
+                    bold += count
+                if count > best:
+                    best, size = count, span["size"]
+            stripped = text.strip()
+            rows.append((offset, len(text), size, chars > 0 and bold == chars, chars, block_number,
+                         line["bbox"][1], line["bbox"][3], zlib.crc32(stripped.encode("utf-8")),
+                         _title_like(stripped)))
+            parts.append(text)
+            parts.append("\n")
+            offset += len(text) + 1
+    raw = "".join(parts)
+    text = raw.strip()
+    # 坐标与字号保留两位小数即可，行统计随增量转换的指纹一起保存时更紧凑
+    lines = np.round(np.array(rows, dtype=float).reshape(-1, COLUMNS), 2)
+    lines[:, OFFSET] -= len(raw) - len(raw.lstrip())
+    return text, lines
+
+
+def _title_like(text):
+    # 含有文字（不是页码之类的纯数字行），且不是目录页中带引导点的条目
+    return _LETTER_RE.search(text) is not None and _LEADER_RE.search(text) is None
+
+
+def infer_headings(page_lines):
+    """由全文档的行统计推断标题，返回按文档顺序排列的 [(级别, 页序号, 起始偏移, 结束偏移)]。
+
+    page_lines 按页序排列，元素为 page_text_lines 返回的数组或与之相同的嵌套列表（没有文本的页为 None）；
+    偏移为标题在该页文本中的字符位置，多行标题的结束偏移为最后一行的末尾。
+    """
+    arrays = [np.asarray(lines, dtype=float).reshape(-1, COLUMNS) if lines is not None else np.empty((0, COLUMNS))
+              for lines in page_lines]
+    if not arrays:
+        return []
+    lines = np.concatenate(arrays)
+    chars = lines[:, CHARS]
+    total = chars.sum()
+    if total <= 0:
+        return []
+    pages = np.repeat(np.arange(len(arrays)), [len(array) for array in arrays])
+    size = np.round(lines[:, SIZE] / SIZE_STEP) * SIZE_STEP
+
+    # 正文字号：按字符数加权出现最多的字号
+    tiers, tier_of_line = np.unique(size, return_inverse=True)
+    tier_chars = np.bincount(tier_of_line, weights=chars, minlength=len(tiers))
+    body = tiers[np.argmax(tier_chars)]
+
+    # 页眉页脚：同一文字出现在很多页上
+    _, key_of_line = np.unique(lines[:, KEY], return_inverse=True)
+    key_pages = np.unique(np.stack([key_of_line, pages], axis=1), axis=0)[:, 0]
+    repeat_pages = max(REPEAT_MIN_PAGES, REPEAT_PAGE_SHARE * len(arrays))
+    repeated = np.bincount(key_pages, minlength=key_of_line.max() + 1)[key_of_line] >= repeat_pages
+
+    # 每个文本块的行数
+    _, block_of_line, block_lines = np.unique(pages * (lines[:, BLOCK].max() + 1) + lines[:, BLOCK],
+                                              return_inverse=True, return_counts=True)
+    candidate = ((chars > 0) & (chars <= MAX_HEADING_CHARS) & (lines[:, TITLE] > 0) & ~repeated
+                 & (block_lines[block_of_line] <= MAX_HEADING_LINES))
+
+    larger = candidate & (size >= body * HEADING_SIZE_RATIO) & (tier_chars[tier_of_line] <= MAX_TIER_SHARE * total)
+    # 与正文同字号的粗体行还要求同一水平位置上没有其他行，排除表格的表头与行内加粗的词
+    bold = candidate & ~larger & (lines[:, BOLD] > 0) & (size >= body) & _alone_in_row(lines, pages)
+
+    heading_sizes = np.unique(size[larger])[::-1]
+    level = np.zeros(len(lines), dtype=int)
+    level[larger] = np.searchsorted(-heading_sizes, -size[larger]) + 1
+    level[bold] = len(heading_sizes) + 1
+    level = np.minimum(level, MAX_LEVEL)
+
+    # 同一文本块中连续的同级标题行合并为一个标题
+    index = np.flatnonzero(level)
+    if not len(index):
+        return []
+    starts = np.ones(len(index), dtype=bool)
+    starts[1:] = ((np.diff(index) != 1) | (np.diff(block_of_line[index]) != 0) | (np.diff(level[index]) != 0))
+    first = index[starts]
+    last = index[np.append(np.flatnonzero(starts)[1:] - 1, len(index) - 1)]
+    return [(int(level[i]), int(pages[i]), int(lines[i, OFFSET]), int(lines[j, OFFSET] + lines[j, LENGTH]))
+            for i, j in zip(first, last)]
+
+
+def _alone_in_row(lines, pages):
+    """每一行在其所在页上是否独占所在的水平位置（与上下相邻的行在纵向上不重叠）。"""
+    order = np.lexsort((lines[:, TOP], pages))
+    top, bottom, page = lines[order, TOP], lines[order, BOTTOM], pages[order]
+    overlaps_next = (page[1:] == page[:-1]) & (top[1:] < bottom[:-1] - ROW_TOLERANCE)
+    alone = np.ones(len(lines), dtype=bool)
+    alone[order[:-1]] &= ~overlaps_next
+    alone[order[1:]] &= ~overlaps_next
+    return alone
+
+
+def split_page_text(text, headings):
+    """按一页的标题 [(级别, 起始偏移, 结束偏移)] 切分页面文本，产出 (级别, 文本)。
+
+    级别为 None 的是标题之间的正文片段；多行标题的各行以空格连接。
+    """
+    position = 0
+    for level, start, end in headings:
+        body = text[position:start].strip()
+        if body:
+            yield None, body
+        title = " ".join(line.strip() for line in text[start:end].splitlines() if line.strip())
+        if title:
+            yield level, title
+        position = max(position, end)
+    rest = text[position:].strip()
+    if rest:
+        yield None, rest
@@ -0,0 +1,251 @@
+# pdf_tables.py
+"""基于 PyMuPDF 矢量图形的快速表格提取（NumPy 向量化），结果与 pdfplumber 默认的 lines 策略一致。
+
+pdfplumber.extract_tables() 需要用 pdfminer 把页面再解析一遍，并逐个对象地构造边、交点与单元格，
+是 PDF 转换中最慢的一步。本模块直接读取已经打开的 fitz 页面：
+    1. 从 get_cdrawings() 的线段、矩形与四边形中取出水平边与垂直边（矩形拆为四条边）；
+    2. 把相距不超过 SNAP_TOLERANCE 的平行边吸附到平均位置，再把同一直线上首尾相距不超过
+       JOIN_TOLERANCE 的边连成一条，丢弃短于 EDGE_MIN_LENGTH 的边；
+    3. 以广播方式一次求出全部交点，在交点网格上为每个交点找出以它为左上角的最小闭合单元格；
+    4. 共享角点的单元格组成表格，按行列展开（被合并单元格占据的位置为 None）；
+    5. 把 get_text("words") 的单词框按中心点一次性分配到单元格，按行、按横坐标拼成单元格文本。
+各步骤的容差与判定规则取 pdfplumber 的默认值，返回值格式与 extract_tables() 相同。
+遇到无法可靠处理的页面（页面旋转、含曲线、同一交点上有多条重叠的边）时返回 None，
+由调用方改用 pdfplumber。
+"""
+import numpy as np
+
+# 以下参数与 pdfplumber 的默认表格设置一致（单位：pt）
+SNAP_TOLERANCE = 3
+JOIN_TOLERANCE = 3
+EDGE_MIN_LENGTH = 3
+EDGE_MIN_LENGTH_PREFILTER = 1
+INTERSECTION_TOLERANCE = 3
+TEXT_Y_TOLERANCE = 3
+# 判定线段水平或垂直时允许的浮点误差
+_AXIS_EPSILON = 0.01
+
+
+def _add_segment(horizontal, vertical, p1, p2):
+    (x1, y1), (x2, y2) = p1, p2
+    if abs(y1 - y2) <= _AXIS_EPSILON:
+        horizontal.append((y1, min(x1, x2), max(x1, x2)))
+    elif abs(x1 - x2) <= _AXIS_EPSILON:
+        vertical.append((x1, min(y1, y2), max(y1, y2)))
+
+
+def _edge_array(edges):
+    edges = np.array(edges, dtype=float).reshape(-1, 3)
+    return edges[edges[:, 2] - edges[:, 1] >= EDGE_MIN_LENGTH_PREFILTER]
+
+
+def page_edges(page):
+    """返回页面的 (水平边, 垂直边)，每个都是 N×3 数组，每行为 (位置, 起点, 终点)。
+
+    水平边的位置为 y、起止为 x，垂直边反之。页面含曲线时返回 None（曲线拆分为边的方式无法与
+    pdfplumber 保持一致）。
+    """
+    horizontal, vertical = [], []
+    # get_cdrawings 直接返回原始元组，比 get_drawings 构造 Point/Rect 对象更快
+    drawings = page.get_cdrawings() if hasattr(page, "get_cdrawings") else page.get_drawings()
+    for path in drawings:
+        for item in path["items"]:
+            op = item[0]
+            if op == "l":
+                _add_segment(horizontal, vertical, tuple(item[1]), tuple(item[2]))
+            elif op == "re":
+                x0, y0, x1, y1 = item[1]
+                x0, x1 = min(x0, x1), max(x0, x1)
+                y0, y1 = min(y0, y1), max(y0, y1)
+                horizontal += [(y0, x0, x1), (y1, x0, x1)]
+                vertical += [(x0, y0, y1), (x1, y0, y1)]
+            elif op == "qu":
+                ul, ur, ll, lr = (tuple(point) for point in item[1])
+                for p1, p2 in ((ul, ur), (ur, lr), (lr, ll), (ll, ul)):
+                    _add_segment(horizontal, vertical, p1, p2)
+            elif op == "c":
+                return None
+    return _edge_array(horizontal), _edge_array(vertical)
+
+
+def _snap(positions, tolerance):
+    """把相邻差值不超过 tolerance 的位置聚为一类（链式聚类），返回每个位置所属类的平均值。"""
+    order = np.argsort(positions, kind="stable")
+    labels = np.empty(len(positions), dtype=np.intp)
+    labels[order] = np.concatenate(([0], np.cumsum(np.diff(positions[order]) > tolerance)))
+    return (np.bincount(labels, weights=positions) / np.bincount(labels))[labels]
+
+
+def merge_edges(edges):
+    """吸附并连接一组同方向的边（N×3 数组），返回合并后长度不小于 EDGE_MIN_LENGTH 的边。"""
+    if not len(edges):
+        return edges
+    edges = edges.copy()
+    edges[:, 0] = _snap(edges[:, 0], SNAP_TOLERANCE)
+    edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+    position, start, end = edges.T
+    new_line = np.concatenate(([True], position[1:] != position[:-1]))
+    # 同一直线内到当前边为止的最远终点：按直线编号加上偏移后做前缀最大值，各直线互不影响
+    line = np.cumsum(new_line) - 1
+    shift = end.max() - end.min() + 1
+    reach = np.maximum.accumulate(end - end.min() + line * shift) - line * shift + end.min()
+    # 起点超出前面各边最远终点 JOIN_TOLERANCE 以上时另起一条边
+    new_edge = new_line.copy()
+    new_edge[1:] |= start[1:] > reach[:-1] + JOIN_TOLERANCE
+    first = np.flatnonzero(new_edge)
+    merged = np.column_stack((position[first], start[first], np.maximum.reduceat(end, first)))
+    return merged[merged[:, 2] - merged[:, 1] >= EDGE_MIN_LENGTH]
+
+
+def _intersections(horizontal, vertical):
+    """返回交点的 (垂直边序号, 水平边序号) 两个数组；同一交点上有多条边时返回 None。"""
+    tol = INTERSECTION_TOLERANCE
+    x = vertical[:, 0, None]
+    y = horizontal[None, :, 0]
+    hit = ((vertical[:, 1, None] <= y + tol) & (vertical[:, 2, None] >= y - tol)
+           & (x >= horizontal[None, :, 1] - tol) & (x <= horizontal[None, :, 2] + tol))
+    v_index, h_index = np.nonzero(hit)
+    points = np.column_stack((vertical[v_index, 0], horizontal[h_index, 0]))
+    if len(np.unique(points, axis=0)) != len(points):
+        return None
+    return v_index, h_index
+
+
+def _find_cells(v_grid, h_grid, ix, iy):
+    """在交点网格上为每个交点找出以它为左上角的最小单元格，返回 M×4 的网格下标 (x0, y0, x1, y1)。
+
+    v_grid/h_grid 为网格上每个交点所在的垂直/水平边序号（没有交点处为 -1）。
+    规则与 pdfplumber 相同：下方交点按由近到远、右方交点按由近到远依次尝试，第一个四边都有边相连的
+    矩形即为该交点的单元格。同一条边上的交点在网格上是连续的，所以多数交点只需检查紧邻的下方与右方交点。
+    """
+    count = len(ix)
+    v_id, h_id = v_grid[ix, iy], h_grid[ix, iy]
+    below = np.full(count, -1)
+    right = np.full(count, -1)
+    order = np.lexsort((iy, ix))  # 按列、列内自上而下
+    same = (ix[order][1:] == ix[order][:-1]) & (v_id[order][1:] == v_id[order][:-1])
+    below[order[:-1][same]] = iy[order][1:][same]
+    order = np.lexsort((ix, iy))  # 按行、行内自左向右
+    same = (iy[order][1:] == iy[order][:-1]) & (h_id[order][1:] == h_id[order][:-1])
+    right[order[:-1][same]] = ix[order][1:][same]
+
+    candidate = (below >= 0) & (right >= 0)
+    bx, by = right.clip(0), below.clip(0)
+    closed = (candidate & (v_grid[bx, by] == v_grid[bx, iy])
+              & (h_grid[bx, by] == h_grid[ix, by]) & (v_grid[bx, by] >= 0))
+    cells = [np.column_stack((ix[closed], iy[closed], right[closed], below[closed]))]
+    # 紧邻的矩形不闭合（如合并单元格的边缘）时逐个扩大搜索范围
+    for k in np.flatnonzero(candidate & ~closed):
+        cell = _find_cell_slow(v_grid, h_grid, ix[k], iy[k])
+        if cell is not None:
+            cells.append(np.array([cell]))
+    return np.concatenate(cells)
+
+
+def _find_cell_slow(v_grid, h_grid, a, b):
+    ys = np.flatnonzero(v_grid[a, b + 1:] == v_grid[a, b]) + b + 1
+    xs = np.flatnonzero(h_grid[a + 1:, b] == h_grid[a, b]) + a + 1
+    corner_v = v_grid[np.ix_(xs, ys)]
+    corner_h = h_grid[np.ix_(xs, ys)]
+    closed = (corner_v >= 0) & (corner_v == v_grid[xs, b][:, None]) & (corner_h == h_grid[a, ys][None, :])
+    if not closed.any():
+        return None
+    # 先按下方交点、再按右方交点的顺序取第一个
+    y, x = divmod(int(np.argmax(closed.T)), len(xs))
+    return a, b, xs[x], ys[y]
+
+
+def _group_tables(cells, ny):
+    """把共享角点的单元格归为同一个表格（并查集），返回单元格下标列表的列表。"""
+    parent = list(range(len(cells)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner = {}
+    for i, (x0, y0, x1, y1) in enumerate(cells.tolist()):
+        for corner in (x0 * ny + y0, x0 * ny + y1, x1 * ny + y0, x1 * ny + y1):
+            j = owner.setdefault(corner, i)
+            if j != i:
+                parent[find(i)] = find(j)
+    groups = {}
+    for i in range(len(cells)):
+        groups.setdefault(find(i), []).append(i)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def _cell_texts(cells, words):
+    """按单词框中心点把单词分配到单元格（单元格为 M×4 坐标数组），返回每个单元格的文本。"""
+    texts = [""] * len(cells)
+    if not len(words):
+        return texts
+    boxes = np.array([word[:4] for word in words], dtype=float)
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    inside = ((cx >= cells[:, 0, None]) & (cx < cells[:, 2, None])
+              & (cy >= cells[:, 1, None]) & (cy < cells[:, 3, None]))
+    assigned = inside.any(axis=0)
+    if not assigned.any():
+        return texts
+    cell = np.argmax(inside, axis=0)[assigned]
+    index = np.flatnonzero(assigned)
+    top, x0 = boxes[index, 1], boxes[index, 0]
+    # 单元格内按 top 链式聚类成行，行内按 x0 排序
+    order = np.lexsort((top, cell))
+    cell, index, top, x0 = cell[order], index[order], top[order], x0[order]
+    new_line = np.concatenate(([True], (cell[1:] != cell[:-1]) | (np.diff(top) > TEXT_Y_TOLERANCE)))
+    line = np.cumsum(new_line)
+    order = np.lexsort((x0, line))
+    lines = {}
+    for c, ln, i in zip(cell[order].tolist(), line[order].tolist(), index[order].tolist()):
+        lines.setdefault(c, {}).setdefault(ln, []).append(words[i][4])
+    for c, cell_lines in lines.items():
+        texts[c] = "\n".join(" ".join(line_words) for _, line_words in sorted(cell_lines.items()))
+    return texts
+
+
+def extract_tables(page, words=None):
+    """提取页面上的表格，格式同 pdfplumber 的 extract_tables()：表格列表，每个表格为行的列表，
+    每行为单元格文本（被合并单元格占据的位置为 None）。无法处理的页面返回 None。
+
+    words 为 page.get_text("words") 的结果，调用方已经取得时可以传入以免重复提取。
+    """
+    if page.rotation:
+        return None
+    edges = page_edges(page)
+    if edges is None:
+        return None
+    horizontal, vertical = (merge_edges(e) for e in edges)
+    if len(horizontal) < 2 or len(vertical) < 2:
+        return []
+    found = _intersections(horizontal, vertical)
+    if found is None:
+        return None
+    v_index, h_index = found
+    xs, ix = np.unique(vertical[v_index, 0], return_inverse=True)
+    ys, iy = np.unique(horizontal[h_index, 0], return_inverse=True)
+    v_grid = np.full((len(xs), len(ys)), -1)
+    h_grid = np.full((len(xs), len(ys)), -1)
+    v_grid[ix, iy] = v_index
+    h_grid[ix, iy] = h_index
+    cells = _find_cells(v_grid, h_grid, ix.ravel(), iy.ravel())
+    groups = _group_tables(cells, len(ys))
+    if not groups:
+        return []
+
+    if words is None:
+        words = page.get_text("words")
+    coords = np.column_stack((xs[cells[:, 0]], ys[cells[:, 1]], xs[cells[:, 2]], ys[cells[:, 3]]))
+    texts = _cell_texts(coords, words)
+    tables = []
+    # 表格按最上方（其次最左侧）单元格的位置排序
+    for group in sorted(groups, key=lambda g: min((cells[i, 1], cells[i, 0]) for i in g)):
+        columns = sorted({int(cells[i, 0]) for i in group})
+        rows = {}
+        for i in group:
+            rows.setdefault(int(cells[i, 1]), {})[int(cells[i, 0])] = texts[i]
+        tables.append([[row.get(x) for x in columns] for _, row in sorted(rows.items())])
+    return tables
@@ -0,0 +1,249 @@
+# preview_pane.py
+"""Virtualized preview for the text and Markdown panes of MainWindow.
+
+The document content is kept in a PreviewModel, split into chunks of roughly CHUNK_CHARS
+characters that never span two sections (pages for PDF, heading sections for Word).
+PagedPreview only lays out a small window of consecutive chunks in the editor, loads the
+next or previous chunk when the user scrolls near either end and drops chunks that are far
+away from the viewport, so the cost of layout and rendering no longer grows with the size
+of the document.
+"""
+import bisect
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QTextCursor, QTextDocument, QTextDocumentFragment
+
+# Maximum size of one chunk, how much is loaded at a time when the user scrolls near an end,
+# and how much is kept in the editor at most (all in characters of source text)
+CHUNK_CHARS = 20000
+LOAD_CHARS = 40000
+WINDOW_CHARS = 120000
+
+
+class PreviewModel:
+    """Document content as a list of chunks, each chunk being a list of pieces of one section.
+
+    Text pieces are concatenated as they are; Markdown pieces are blocks separated by a blank
+    line. Sections must be appended in non-decreasing order.
+    """
+
+    def __init__(self, markdown=False):
+        self.markdown = markdown
+        self.chunks = []          # list of lists of pieces
+        self._chunk_sizes = []
+        self._sections = []       # section ids in order of appearance
+        self._section_chunks = [] # index of the first chunk of each section in _sections
+        self._current_section = None
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def chunk_size(self, chunk_index):
+        return self._chunk_sizes[chunk_index]
+
+    def append(self, section, piece):
+        """Append a piece to the given section; returns the index of the chunk it went into."""
+        if self.markdown and not piece:
+            return len(self.chunks) - 1  # empty blocks only separate paragraphs
+        if section != self._current_section:
+            self._current_section = section
+            self._sections.append(section)
+            self._section_chunks.append(len(self.chunks))
+            self._new_chunk()
+        elif self._chunk_sizes[-1] >= CHUNK_CHARS:
+            self._new_chunk()
+        self.chunks[-1].append(piece)
+        self._chunk_sizes[-1] += len(piece)
+        return len(self.chunks) - 1
+
+    def _new_chunk(self):
+        self.chunks.append([])
+        self._chunk_sizes.append(0)
+
+    def chunk_for_section(self, section):
+        """Index of the first chunk of the given section (or of the next section that has content)."""
+        i = bisect.bisect_left(self._sections, section)
+        if i >= len(self._sections):
+            return max(len(self.chunks) - 1, 0)
+        return self._section_chunks[i]
+
+    def render(self, chunk_index, start=0):
+        """Source text of a chunk from its start-th piece onwards."""
+        pieces = self.chunks[chunk_index][start:]
+        return "\n\n".join(pieces) if self.markdown else "".join(pieces)
+
+
+class PagedPreview(QObject):
+    """Shows a sliding window of PreviewModel chunks in a QPlainTextEdit or QTextEdit.
+
+    Chunks are inserted with QTextCursor so appending does not re-layout what is already shown;
+    each chunk starts in its own text block and the block number of every chunk start is kept
+    so that chunks can be removed again from either end.
+    """
+
+    def __init__(self, editor, markdown=False, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.model = PreviewModel(markdown)
+        self._first = 0         # first chunk in the window
+        self._last = 0          # one past the last chunk in the window
+        self._tail_pieces = 0   # pieces of chunk _last - 1 already shown (it may still grow)
+        self._starts = []       # block number where each chunk of the window starts
+        self._busy = False
+        self._follow_tail = True
+        editor.verticalScrollBar().valueChanged.connect(self._on_scroll)
+
+    # --- feeding content -------------------------------------------------------------
+    def append(self, items):
+        """Append (section, piece) items; new content is shown if the window is at the tail."""
+        for section, piece in items:
+            self.model.append(section, piece)
+        if self._follow_tail:
+            self._extend_tail()
+
+    def _extend_tail(self):
+        # Show newly arrived pieces of the last chunk, then further chunks while space remains
+        self._flush_tail()
+        while self._last < len(self.model) and self._window_chars() < WINDOW_CHARS:
+            self._append_chunk()
+        self._follow_tail = self._last == len(self.model)
+
+    # --- navigation ------------------------------------------------------------------
+    def jump_to_section(self, section):
+        """Show the given section at the top of the editor without rendering what precedes it."""
+        chunk = self.model.chunk_for_section(section)
+        self._busy = True
+        try:
+            self.editor.clear()
+            self._first = self._last = chunk
+            self._starts = []
+            self._tail_pieces = 0
+            while self._last < len(self.model) and self._window_chars() < LOAD_CHARS:
+                self._append_chunk()
+            self._follow_tail = self._last == len(self.model)
+        finally:
+            self._busy = False
+        self.editor.verticalScrollBar().setValue(0)
+
+    def _on_scroll(self, value):
+        if self._busy:
+            return
+        # Defer to the event loop so that loading does not happen inside the scroll handler
+        QTimer.singleShot(0, self._load_near_viewport)
+
+    def _load_near_viewport(self):
+        scroll_bar = self.editor.verticalScrollBar()
+        margin = max(scroll_bar.pageStep(), 1)
+        self._busy = True
+        try:
+            if scroll_bar.value() >= scroll_bar.maximum() - margin and self._last < len(self.model):
+                self._flush_tail()
+                loaded = 0
+                while self._last < len(self.model) and loaded < LOAD_CHARS:
+                    loaded += self.model.chunk_size(self._last)
+                    self._append_chunk()
+                while self._last - self._first > 1 and self._window_chars() > WINDOW_CHARS:
+                    self._drop_first_chunk()
+                self._follow_tail = self._last == len(self.model)
+            elif scroll_bar.value() <= margin and self._first > 0:
+                loaded = 0
+                while self._first > 0 and loaded < LOAD_CHARS:
+                    self._prepend_chunk()
+                    loaded += self.model.chunk_size(self._first)
+                while self._last - self._first > 1 and self._window_chars() > WINDOW_CHARS:
+                    self._drop_last_chunk()
+        finally:
+            self._busy = False
+
+    # --- editing the window --------------------------------------------------------
+    def _window_chars(self):
+        return sum(self.model.chunk_size(i) for i in range(self._first, self._last))
+
+    def _document(self):
+        return self.editor.document()
+
+    def _insert(self, cursor, source):
+        if self.model.markdown:
+            # QTextCursor.insertMarkdown is not available in PyQt5: render into a scratch
+            # document and insert the result as a fragment
+            scratch = QTextDocument()
+            scratch.setMarkdown(source)
+            cursor.insertFragment(QTextDocumentFragment(scratch))
+        else:
+            cursor.insertText(source)
+
+    def _insert_at_end(self, source, new_chunk):
+        """Insert source at the end of the document, starting a fresh block for a new chunk."""
+        document = self._document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        last_block = document.lastBlock()
+        if (new_chunk or self.model.markdown) and last_block.length() > 1:
+            cursor.insertBlock()
+        if new_chunk:
+            self._starts.append(document.blockCount() - 1)
+        self._insert(cursor, source)
+
+    def _flush_tail(self):
+        """Show pieces that arrived for the last chunk of the window after it was inserted."""
+        if self._last == 0:
+            return
+        pieces = self.model.chunks[self._last - 1]
+        if self._tail_pieces < len(pieces):
+            self._insert_at_end(self.model.render(self._last - 1, self._tail_pieces), new_chunk=False)
+            self._tail_pieces = len(pieces)
+
+    def _append_chunk(self):
+        self._insert_at_end(self.model.render(self._last), new_chunk=True)
+        self._tail_pieces = len(self.model.chunks[self._last])
+        self._last += 1
+
+    def _prepend_chunk(self):
+        document = self._document()
+        scroll_bar = self.editor.verticalScrollBar()
+        before_max, before_blocks = scroll_bar.maximum(), document.blockCount()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.Start)
+        cursor.insertBlock()
+        cursor.movePosition(QTextCursor.Start)
+        self._first -= 1
+        self._insert(cursor, self._prepend_source(self._first))
+        added = document.blockCount() - before_blocks
+        self._starts = [0] + [start + added for start in self._starts]
+        # Keep the content under the viewport where it was
+        scroll_bar.setValue(scroll_bar.value() + scroll_bar.maximum() - before_max)
+
+    def _drop_first_chunk(self):
+        document = self._document()
+        scroll_bar = self.editor.verticalScrollBar()
+        before_max = scroll_bar.maximum()
+        removed = self._starts[1]
+        cursor = QTextCursor(document)
+        cursor.setPosition(0)
+        cursor.setPosition(document.findBlockByNumber(removed).position(), QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self._starts = [start - removed for start in self._starts[1:]]
+        self._first += 1
+        scroll_bar.setValue(scroll_bar.value() - (before_max - scroll_bar.maximum()))
+
+    def _drop_last_chunk(self):
+        document = self._document()
+        start = self._starts.pop()
+        cursor = QTextCursor(document)
+        if start == 0:
+            cursor.select(QTextCursor.Document)
+        else:
+            # Remove from the end of the previous chunk (including the block separator)
+            cursor.setPosition(document.findBlockByNumber(start).position() - 1)
+            cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self._last -= 1
+        self._tail_pieces = len(self.model.chunks[self._last - 1]) if self._last else 0
+        self._follow_tail = False
+
+    def _prepend_source(self, chunk_index):
+        source = self.model.render(chunk_index)
+        # The chunk is followed by its own block separator, so a trailing line break would add an empty line
+        if not self.model.markdown and source.endswith("\n"):
+            source = source[:-1]
+        return source
@@ -0,0 +1,267 @@
+# search_index.py
+"""已转换文档的全文检索索引（SQLite FTS5 倒排索引），支持中文。
+
+分词规则（建索引与查询使用同一规则）：
+    中日韩文字  连续的汉字（以及假名、谚文）按相邻两字切分为二元词，每段末尾再加一个单字，
+                使单字查询也能匹配到任意位置；多字查询转换为二元词短语，相当于子串匹配
+    拉丁文字    按字母数字切分为单词并转为小写
+FTS5 对这些预先切好、以空格分隔的词建立倒排索引，查询按 BM25 排序。
+
+每个文档按“节”保存：节号与 main_window 中的一致（PDF 为从 0 开始的页序号，Word 为标题序号，
+第一个标题之前的内容为第 0 节），并记录页码与所属标题，检索结果可以直接跳转到对应位置。
+过长的节拆成多行，结果摘要更精确。索引默认保存在 output/.search_index.sqlite。
+
+用法示例：
+    python search_index.py 年度报告 性能
+"""
+import argparse
+import bisect
+import os
+import re
+import sqlite3
+import time
+from collections import namedtuple
+
+INDEX_FILE = ".search_index.sqlite"
+# 单行索引内容的最大字符数，更长的节拆成多行
+ROW_CHARS = 4000
+SNIPPET_CHARS = 60
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"  # 假名、汉字、谚文
+_TOKEN_RE = re.compile(f"([{_CJK}]+)|([0-9A-Za-z\u00c0-\u024f]+)")
+
+SearchHit = namedtuple("SearchHit", "file_path md_path section page heading snippet score")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    md_path TEXT,
+    fingerprint TEXT,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL,
+    section INTEGER NOT NULL,
+    page INTEGER,
+    heading TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_doc ON sections(doc_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS section_terms USING fts5(terms, tokenize='unicode61');
+"""
+
+
+def default_index_path():
+    """默认索引文件路径（output 文件夹下）。"""
+    from doc_parser import get_output_dir
+    return os.path.join(get_output_dir(), INDEX_FILE)
+
+
+def _cjk_tokens(run):
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]]
+
+
+def tokenize(text):
+    """把文本切分为索引词列表。"""
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(text):
+        if cjk:
+            tokens.extend(_cjk_tokens(cjk))
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+def build_query(text):
+    """把用户输入转换为 FTS5 查询表达式（各部分之间为“与”的关系）；没有可检索的词时返回 None。"""
+    parts = []
+    for cjk, word in _TOKEN_RE.findall(text):
+        if cjk and len(cjk) == 1:
+            parts.append(f'"{cjk}"*')  # 单字：匹配以该字开头的二元词或段末单字
+        elif cjk:
+            parts.append('"' + " ".join(cjk[i:i + 2] for i in range(len(cjk) - 1)) + '"')
+        else:
+            parts.append(f'"{word.lower()}"')
+    return " ".join(parts) if parts else None
+
+
+def document_fingerprint(file_path):
+    """文档的指纹（大小与修改时间），用于判断索引是否需要更新。"""
+    st = os.stat(file_path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _doc_key(file_path):
+    return os.path.normcase(os.path.abspath(file_path))
+
+
+def _snippet(text, query):
+    """取第一个命中词附近的原文作为摘要。"""
+    lowered = text.lower()
+    positions = [lowered.find(term) for term in _query_terms(query)]
+    positions = [p for p in positions if p >= 0]
+    start = max(0, min(positions) - SNIPPET_CHARS // 3) if positions else 0
+    snippet = " ".join(text[start:start + SNIPPET_CHARS].split())
+    return ("…" if start > 0 else "") + snippet + ("…" if start + SNIPPET_CHARS < len(text) else "")
+
+
+def _query_terms(query):
+    return [cjk or word.lower() for cjk, word in _TOKEN_RE.findall(query)]
+
+
+class SearchIndex:
+    """持久化的全文检索索引。一个实例只能在创建它的线程中使用。"""
+
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # 多个批量转换进程可能同时写入：WAL 模式下读写互不阻塞，写入冲突时等待
+        self.conn = sqlite3.connect(self.path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def is_current(self, file_path):
+        """文档自上次建立索引后是否未被修改。"""
+        row = self.conn.execute("SELECT fingerprint FROM documents WHERE path = ?",
+                                (_doc_key(file_path),)).fetchone()
+        try:
+            return row is not None and row[0] == document_fingerprint(file_path)
+        except OSError:
+            return False
+
+    def document_writer(self, file_path, md_path=None):
+        """返回一个 DocumentIndexer，在 with 块正常结束时用新内容替换该文档的全部索引。"""
+        return DocumentIndexer(self, file_path, md_path)
+
+    def remove(self, file_path):
+        with self.conn:
+            self._delete(_doc_key(file_path))
+
+    def _delete(self, key):
+        row = self.conn.execute("SELECT id FROM documents WHERE path = ?", (key,)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("DELETE FROM section_terms WHERE rowid IN (SELECT id FROM sections WHERE doc_id = ?)",
+                          (row[0],))
+        self.conn.execute("DELETE FROM sections WHERE doc_id = ?", (row[0],))
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+    def _replace(self, file_path, md_path, fingerprint, rows):
+        key = _doc_key(file_path)
+        with self.conn:
+            self._delete(key)
+            doc_id = self.conn.execute(
+                "INSERT INTO documents (path, md_path, fingerprint, indexed_at) VALUES (?, ?, ?, ?)",
+                (key, md_path, fingerprint, time.time())).lastrowid
+            for section, page, heading, text in rows:
+                row_id = self.conn.execute(
+                    "INSERT INTO sections (doc_id, section, page, heading, text) VALUES (?, ?, ?, ?, ?)",
+                    (doc_id, section, page, heading, text)).lastrowid
+                self.conn.execute("INSERT INTO section_terms (rowid, terms) VALUES (?, ?)",
+                                  (row_id, " ".join(tokenize(text))))
+
+    def search(self, query, limit=20, file_path=None):
+        """检索并按相关度返回 SearchHit 列表；file_path 不为 None 时只在该文档中检索。"""
+        expression = build_query(query)
+        if expression is None:
+            return []
+        sql = ("SELECT d.path, d.md_path, s.section, s.page, s.heading, s.text, bm25(section_terms) AS rank "
+               "FROM section_terms JOIN sections s ON s.id = section_terms.rowid "
+               "JOIN documents d ON d.id = s.doc_id WHERE section_terms MATCH ?")
+        params = [expression]
+        if file_path is not None:
+            sql += " AND d.path = ?"
+            params.append(_doc_key(file_path))
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        return [SearchHit(path, md_path, section, page, heading, _snippet(text, query), -rank)
+                for path, md_path, section, page, heading, text, rank in self.conn.execute(sql, params)]
+
+
+class DocumentIndexer:
+    """逐段收集一个文档的内容，结束时在一个短事务中替换该文档的索引。
+
+    add 按文档顺序调用（节号不减）；同一节的连续内容合并为一行，超过 ROW_CHARS 时另起一行。
+    with 块中出现异常（包括转换被取消）时不修改索引。
+    """
+
+    def __init__(self, index, file_path, md_path=None):
+        self.index = index
+        self.file_path = file_path
+        self.md_path = md_path
+        self.fingerprint = document_fingerprint(file_path)
+        self._rows = []
+        self._pending = None  # [节号, 页码, 文本片段列表, 字符数]
+        self._heading_sections = []  # 已排序的标题节号
+        self._headings = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._flush()
+            self.index._replace(self.file_path, self.md_path, self.fingerprint, self._rows)
+        return False
+
+    def add_heading(self, section, title):
+        """登记一个标题（目录项）：该节及其后、下一个标题之前的内容都归属于它。"""
+        i = bisect.bisect_right(self._heading_sections, section)
+        self._heading_sections.insert(i, section)
+        self._headings.insert(i, title)
+
+    def heading_for(self, section):
+        i = bisect.bisect_right(self._heading_sections, section)
+        return self._headings[i - 1] if i else None
+
+    def add(self, section, text, page=None):
+        """添加一段属于 section 节（页码为 page，可省略）的文本。"""
+        if not text or not text.strip():
+            return
+        pending = self._pending
+        if pending is None or pending[0] != section or pending[3] >= ROW_CHARS:
+            self._flush()
+            pending = self._pending = [section, page, [], 0]
+        pending[2].append(text)
+        pending[3] += len(text)
+
+    def _flush(self):
+        if self._pending is not None:
+            section, page, pieces, _ = self._pending
+            self._rows.append((section, page, self.heading_for(section), "\n".join(pieces)))
+            self._pending = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在已转换文档的全文索引中检索")
+    parser.add_argument("query", nargs="+", help="检索词")
+    parser.add_argument("--index", help="索引文件路径，默认为 output/.search_index.sqlite")
+    parser.add_argument("-n", "--limit", type=int, default=20, help="最多显示的结果数，默认 20")
+    args = parser.parse_args(argv)
+    with SearchIndex(args.index) as index:
+        start = time.perf_counter()
+        hits = index.search(" ".join(args.query), args.limit)
+        elapsed = time.perf_counter() - start
+    for hit in hits:
+        location = f"第 {hit.page} 页" if hit.page else f"第 {hit.section} 节"
+        heading = f" · {hit.heading}" if hit.heading else ""
+        print(f"{hit.file_path}（{location}{heading}）\n    {hit.snippet}")
+    print(f"共 {len(hits)} 条结果，耗时 {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+# unit_cache.py
+"""增量转换：按页（PDF）或按部件（Word 的正文与图片）记录指纹与对应的 Markdown。
+
+指纹文件保存在输出目录中，文件名为 ".{文档名}.units"。再次转换同一文档时，指纹未变的
+单元直接拼接上次生成的 Markdown，只重新解析发生变化的页面或部件。
+
+文件格式为每行一个单元：
+    指纹 \\t 图片列表 JSON \\t Markdown 块列表 JSON [\\t 附加数据 JSON]
+附加数据可省略，用于保存单元的其他解析结果（例如 PDF 页面的行字体统计）。
+第一行是头部（转换器版本等），头部不一致时不复用任何单元。读取时只在内存中保留指纹、
+图片列表与行偏移，Markdown 内容在真正复用时才按偏移读取。
+"""
+import json
+import os
+import tempfile
+
+UNITS_SUFFIX = ".units"
+
+
+def units_path(output_dir, base_name):
+    """文档的指纹文件路径。"""
+    return os.path.join(output_dir, f".{base_name}{UNITS_SUFFIX}")
+
+
+class UnitCache:
+    """读取上次转换的单元指纹，并写出本次转换的单元指纹。
+
+    作为上下文管理器使用：正常结束时用新的指纹文件原子替换旧文件，出错或被取消时保留旧文件。
+    """
+
+    def __init__(self, path, header):
+        self.path = path
+        self._header_line = json.dumps(header, sort_keys=True).encode("utf-8") + b"\n"
+        self.tmp_path = None
+        self._index = {}  # 指纹 -> (图片列表, Markdown 块所在的行偏移)
+        self._old = None
+        self._new = None
+        self.stats = {"units_total": 0, "units_reused": 0}
+
+    def __enter__(self):
+        self._load_index()
+        # 临时文件名由 mkstemp 生成，同一进程内同时转换同一文档也不会共用一个临时文件
+        fd, self.tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.path) or ".", prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+        self._new = os.fdopen(fd, "wb")
+        self._new.write(self._header_line)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._old is not None:
+            self._old.close()
+        self._new.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        else:
+            try:
+                os.remove(self.tmp_path)
+            except OSError:
+                pass
+        return False
+
+    def _load_index(self):
+        try:
+            old = open(self.path, "rb")
+        except OSError:
+            return
+        if old.readline() != self._header_line:
+            old.close()
+            return
+        self._old = old
+        offset = old.tell()
+        for line in old:
+            parts = line.split(b"\t", 2)
+            if len(parts) == 3 and line.endswith(b"\n"):  # 忽略上次中断时未写完整的行
+                self._index[parts[0].decode("ascii")] = (parts[1], offset)
+            offset += len(line)
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self._index
+
+    def images(self, fingerprint):
+        """上次转换中该单元引用的图片，列表元素为 [文件名, 内容哈希]。"""
+        return json.loads(self._index[fingerprint][0])
+
+    def all_images(self):
+        """上次转换中所有单元引用过的图片 [文件名, 内容哈希]。"""
+        for images, _ in self._index.values():
+            yield from json.loads(images)
+
+    def _fields(self, fingerprint):
+        self._old.seek(self._index[fingerprint][1])
+        return self._old.readline().rstrip(b"\n").split(b"\t")
+
+    def blocks(self, fingerprint):
+        """上次转换中该单元生成的 Markdown 块列表。"""
+        return json.loads(self._fields(fingerprint)[2])
+
+    def extra(self, fingerprint):
+        """上次转换中与该单元一起记录的附加数据，没有时返回 None。"""
+        fields = self._fields(fingerprint)
+        return json.loads(fields[3]) if len(fields) > 3 else None
+
+    def record(self, fingerprint, blocks, images=(), reused=False, new_unit=True, extra=None):
+        """记录本次转换中一个单元的指纹、Markdown 块与引用的图片，extra 为可选的附加数据（可 JSON 序列化）。
+
+        一个单元的内容分多行记录时，只有第一行传入 new_unit=True，统计中仍计为一个单元。
+        """
+        if new_unit:
+            self.stats["units_total"] += 1
+            if reused:
+                self.stats["units_reused"] += 1
+        fields = [
+            fingerprint.encode("ascii"),
+            json.dumps(list(images), ensure_ascii=False).encode("utf-8"),
+            json.dumps(blocks, ensure_ascii=False).encode("utf-8"),
+        ]
+        if extra is not None:
+            fields.append(json.dumps(extra, ensure_ascii=False).encode("utf-8"))
+        self._new.write(b"\t".join(fields) + b"\n")
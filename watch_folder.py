@@ -0,0 +1,300 @@
+# watch_folder.py
+"""监视文件夹：常驻运行，自动转换放入目录（含子目录）中的新文档与被修改的文档。
+
+用法示例：
+    python watch_folder.py input_files -o output -j 2
+    main.exe watch input_files -o output -j 2
+
+工作方式：
+    - 每隔 --interval 秒扫描一次目录树（只读取目录项的大小与修改时间，不依赖操作系统的文件通知）；
+      文件的大小与修改时间连续 --settle 秒不变才认为已写完（防抖），仍在复制或保存中的文件不会被转换
+    - 已写完的文件先计算内容哈希，与上次成功转换时的哈希相同（例如只是被重新保存或修改时间变化）则跳过
+    - 待转换的文件排队交给固定大小的进程池（-j），同时在途的任务数不超过进程数，其余留在队列中
+    - 每个文档由 doc_parser.parse_document 转换，Markdown 先写入临时文件再原子替换，读者不会看到写了一半
+      的结果；输出目录保持输入目录的子目录结构（同 batch_convert）
+    - 状态文件（默认为输出目录下的 .watch_status.json）随时反映积压数量、处理速率与最近的结果，同样原子替换；
+      已转换文档的内容哈希保存在输出目录下的 .watch_state.json 中，重启后不会重复转换未变化的文档
+
+本模块不导入任何 PyQt5 组件，可在无图形界面的服务器上运行。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import doc_parser
+from batch_convert import convert_one, iter_documents, target_dir
+from conversion_cache import DEFAULT_MAX_BYTES, file_digest
+from search_index import default_index_path
+
+STATUS_FILE = ".watch_status.json"
+STATE_FILE = ".watch_state.json"
+DEFAULT_INTERVAL = 1.0
+DEFAULT_SETTLE = 2.0
+# 处理速率按最近这么多秒内完成的文档计算
+RATE_WINDOW = 300
+# 状态文件中保留的最近结果数
+RECENT_RESULTS = 20
+
+
+def write_json_atomic(path, data):
+    """把 data 写成 JSON：先写同目录下的临时文件再原子替换，读者只会看到完整的旧文件或新文件。"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _timestamp(seconds=None):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(seconds))
+
+
+class FolderWatcher:
+    """扫描目录、防抖、去重并把文档分派到进程池；poll() 完成一轮扫描与结果收集。
+
+    参数含义同 batch_convert.run_batch；settle 为文件大小与修改时间保持不变多少秒后才开始转换，
+    status_path 为状态文件路径（默认为输出目录下的 STATUS_FILE）。
+    """
+
+    def __init__(self, root_dir, output_dir=None, workers=None, settle=DEFAULT_SETTLE, status_path=None,
+                 page_workers=1, cache_dir=None, cache_size=None, incremental=False, index_path=None,
+                 on_result=None):
+        self.root_dir = root_dir
+        self.output_dir = output_dir or doc_parser.get_output_dir()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.settle = settle
+        self.status_path = status_path or os.path.join(self.output_dir, STATUS_FILE)
+        self.state_path = os.path.join(self.output_dir, STATE_FILE)
+        self.convert_args = (page_workers, cache_dir, cache_size or DEFAULT_MAX_BYTES, incremental, False,
+                             index_path)
+        self.on_result = on_result
+        self.started = time.time()
+        self._handled = {}    # 路径 -> 已处理（排队、跳过或转换）时的 (大小, 修改时间)
+        self._settling = {}   # 路径 -> (大小, 修改时间, 首次看到该状态的时刻)
+        self._queue = deque()         # 待转换的 (路径, 内容哈希)
+        self._in_flight = {}          # future -> (路径, 内容哈希)
+        self._state = self._load_state()  # 路径 -> 上次成功转换时的内容哈希与 Markdown 路径
+        self._finished = deque()      # 最近 RATE_WINDOW 秒内完成的 (完成时刻, 页数)
+        self._recent = deque(maxlen=RECENT_RESULTS)
+        self.counters = {"converted": 0, "failed": 0, "skipped_unchanged": 0}
+        self._executor = None
+
+    # --- 状态持久化 -------------------------------------------------------------------------
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        write_json_atomic(self.state_path, self._state)
+
+    # --- 扫描与防抖 -------------------------------------------------------------------------
+    def scan(self, now=None):
+        """扫描一次目录树，把已写完且内容有变化的文档加入队列；返回本轮加入队列的文档数。"""
+        now = time.monotonic() if now is None else now
+        busy = {path for path, _ in self._queue} | {path for path, _ in self._in_flight.values()}
+        present = set()
+        queued = 0
+        for path in iter_documents(self.root_dir):
+            present.add(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # 扫描期间被删除或移走
+            signature = (st.st_size, st.st_mtime_ns)
+            if self._handled.get(path) == signature:
+                continue
+            settling = self._settling.get(path)
+            if settling is None or settling[:2] != signature:
+                self._settling[path] = (*signature, now)
+                continue
+            if now - settling[2] < self.settle or path in busy:
+                continue  # 仍可能在写入中；或同一文档正在转换，完成后再处理新内容
+            del self._settling[path]
+            self._handled[path] = signature
+            try:
+                digest = file_digest(path)
+            except OSError:
+                continue
+            previous = self._state.get(path)
+            if previous is not None and previous["digest"] == digest and os.path.exists(previous["md_path"]):
+                self.counters["skipped_unchanged"] += 1
+                continue
+            self._queue.append((path, digest))
+            queued += 1
+        # 已删除的文档不再跟踪（输出结果与内容哈希保留：保存时先删除再改名的文档重新出现后仍可跳过）
+        for table in (self._handled, self._settling):
+            for path in [p for p in table if p not in present]:
+                del table[path]
+        return queued
+
+    # --- 分派与结果收集 ---------------------------------------------------------------------
+    def _dispatch(self):
+        """在途任务数不足进程数时从队列中提交新任务。"""
+        while self._queue and len(self._in_flight) < self.workers:
+            path, digest = self._queue.popleft()
+            output_dir = target_dir(path, self.root_dir, self.output_dir)
+            future = self._executor.submit(convert_one, path, output_dir, *self.convert_args)
+            self._in_flight[future] = (path, digest)
+
+    def _collect(self, timeout):
+        """等待最多 timeout 秒，收集已完成的任务。"""
+        if not self._in_flight:
+            time.sleep(timeout)
+            return
+        done, _ = wait(list(self._in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+        broken = False
+        for future in done:
+            path, digest = self._in_flight.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                broken = True
+                result = {"file": path, "pages": 0, "seconds": 0.0, "status": "error", "error": "工作进程异常退出"}
+            self._record(result, digest)
+        if broken:
+            # 某个工作进程崩溃时整个进程池不可再用：其余在途任务放回队列，在新进程池中重新转换
+            for path, digest in self._in_flight.values():
+                self._queue.appendleft((path, digest))
+            self._in_flight.clear()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def _record(self, result, digest):
+        now = time.time()
+        path = result["file"]
+        if result["status"] == "ok":
+            self.counters["converted"] += 1
+            self._state[path] = {"digest": digest, "md_path": result["md_path"], "converted": _timestamp(now)}
+            self._save_state()
+            self._finished.append((now, result["pages"]))
+        else:
+            self.counters["failed"] += 1
+            # 转换失败的文档在内容再次变化后重试
+            self._state.pop(path, None)
+        entry = {key: result[key] for key in ("file", "status", "pages", "md_path", "error") if key in result}
+        entry["seconds"] = round(result["seconds"], 3)
+        entry["finished"] = _timestamp(now)
+        self._recent.appendleft(entry)
+        if self.on_result is not None:
+            self.on_result(result)
+
+    # --- 状态 -------------------------------------------------------------------------------
+    def status(self, state="running"):
+        """当前状态：积压（排队与在途）、防抖中的文档数、计数与最近 RATE_WINDOW 秒的处理速率。"""
+        now = time.time()
+        while self._finished and now - self._finished[0][0] > RATE_WINDOW:
+            self._finished.popleft()
+        # 刚启动不足一个窗口时按已运行的时间计算速率
+        window = max(1e-9, min(RATE_WINDOW, now - self.started))
+        pages = sum(p for _, p in self._finished)
+        return dict(
+            self.counters,
+            state=state,
+            root=os.path.abspath(self.root_dir),
+            output=os.path.abspath(self.output_dir),
+            pid=os.getpid(),
+            started=_timestamp(self.started),
+            updated=_timestamp(now),
+            workers=self.workers,
+            backlog=len(self._queue) + len(self._in_flight),
+            queued=len(self._queue),
+            in_flight=len(self._in_flight),
+            settling=len(self._settling),
+            rate_window_seconds=RATE_WINDOW,
+            docs_per_minute=round(len(self._finished) * 60 / window, 2),
+            pages_per_minute=round(pages * 60 / window, 2),
+            recent=list(self._recent),
+        )
+
+    def write_status(self, state="running"):
+        write_json_atomic(self.status_path, self.status(state))
+
+    # --- 主循环 -----------------------------------------------------------------------------
+    def poll(self, timeout):
+        """扫描、分派并等待最多 timeout 秒收集结果，最后更新状态文件。"""
+        self.scan()
+        self._dispatch()
+        self._collect(timeout)
+        self._dispatch()
+        self.write_status()
+
+    def idle(self):
+        """没有排队、在途或防抖中的文档。"""
+        return not (self._queue or self._in_flight or self._settling)
+
+    def run(self, interval=DEFAULT_INTERVAL, once=False):
+        """持续监视直到 Ctrl+C；once 为 True 时处理完当前目录中的全部文档后返回。
+
+        退出时等待在途的转换完成，状态文件的 state 记为 "stopped"。
+        """
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                self.poll(interval)
+                if once and self.idle():
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._queue.clear()
+            while self._in_flight:
+                self._collect(interval)
+            self._executor.shutdown()
+            self.write_status("stopped")
+        return self.counters
+
+
+def _print_result(result):
+    if result["status"] == "ok":
+        print(f"[{_timestamp()}] [OK]   {result['file']} ({result['pages']} 页, {result['seconds']:.2f}s)",
+              flush=True)
+    else:
+        print(f"[{_timestamp()}] [FAIL] {result['file']}: {result['error']}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="监视目录，自动将新增或修改的 Word/PDF 文档转换为 Markdown")
+    parser.add_argument("input_dir", help="监视的文档目录（包括子目录）")
+    parser.add_argument("-o", "--output", help="输出目录，默认为项目下的 output 文件夹")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="并行进程数，默认为 CPU 核心数")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help=f"扫描间隔（秒），默认 {DEFAULT_INTERVAL:g}")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                        help=f"文件大小与修改时间保持不变多少秒后才开始转换（防抖），默认 {DEFAULT_SETTLE:g}")
+    parser.add_argument("--status", help=f"状态文件路径，默认为输出目录下的 {STATUS_FILE}")
+    parser.add_argument("--once", action="store_true", help="转换完目录中现有的文档后退出，不持续监视")
+    parser.add_argument("--page-workers", type=int, default=1,
+                        help="单个 PDF 内按页并行解析的进程数（默认 1，即串行）")
+    parser.add_argument("--cache", action="store_true",
+                        help="启用转换缓存（缓存目录默认为 output/.cache）")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量转换：文档修改后只重新解析发生变化的页面或部件")
+    parser.add_argument("--index", nargs="?", const="", metavar="PATH",
+                        help="同时更新全文检索索引（默认为 output/.search_index.sqlite）")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"目录不存在: {args.input_dir}")
+    index_path = default_index_path() if args.index == "" else args.index
+    watcher = FolderWatcher(args.input_dir, args.output, args.workers, args.settle, args.status,
+                            page_workers=args.page_workers,
+                            cache_dir=doc_parser.get_cache_dir() if args.cache else None,
+                            incremental=args.incremental, index_path=index_path, on_result=_print_result)
+    print(f"正在监视 {os.path.abspath(args.input_dir)}（{watcher.workers} 个工作进程），"
+          f"状态文件：{watcher.status_path}，按 Ctrl+C 停止", flush=True)
+    counters = watcher.run(args.interval, args.once)
+    print(f"已停止：转换 {counters['converted']}，失败 {counters['failed']}，"
+          f"内容未变跳过 {counters['skipped_unchanged']}", flush=True)
+    return 1 if args.once and counters["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())